@@ -0,0 +1,236 @@
+# audio/cache.py
+import hashlib
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.dispatch import Signal, receiver
+from rest_framework.response import Response
+
+# Zakresy (scopes) z licznikami generacji. Zmiana danych podbija generację
+# zakresu, więc klucze zapisanych odpowiedzi przestają pasować i nieaktualne
+# wpisy nigdy nie są serwowane - bez kasowania czegokolwiek z cache.
+FEED_SCOPE = "feed"  # globalne listy: najnowsze, najwyżej oceniane
+TAG_LIST_SCOPE = "tag-list"  # lista tagów z licznikami plików
+TRENDING_SCOPE = "trending"  # trending i rankingi z dziennych statystyk
+SIMILAR_SCOPE = "similar"  # listy podobnych plików (build_similar_audio)
+USER_NAMES_SCOPE = "user-names"  # nazwy użytkowników (autorzy komentarzy)
+
+# Hook instrumentacji, wysyłany przy każdym odczycie cache odpowiedzi.
+# Argumenty: endpoint (str), hit (bool).
+response_cache_lookup = Signal()
+
+
+def tag_scope(tag_name):
+    # Widoki filtrują tagi przez iexact, więc klucz jest niezależny od wielkości liter
+    return f"tag:{hashlib.md5(tag_name.lower().encode()).hexdigest()}"
+
+
+def likes_scope(audio_file_id):
+    # Wersja liczników głosów jednego pliku (walidator ETag)
+    return f"likes:{audio_file_id}"
+
+
+def _generation_key(scope):
+    return f"audio:generation:{scope}"
+
+
+def get_generations(scopes):
+    """
+    Returns the current generation of each scope. A missing counter (never
+    set or evicted) starts at the current time in nanoseconds, so it can
+    never repeat a generation that was already used in a cache key.
+    """
+    keys = [_generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), timeout=None)
+        generations.update(cache.get_many(missing))
+    return [generations[key] for key in keys]
+
+
+def bump_generations(scopes):
+    for scope in set(scopes):
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def _normalized_query(request):
+    params = []
+    for name, values in sorted(request.query_params.lists()):
+        if name == "tags":
+            values = [value.lower() for value in values]
+        params.append((name, sorted(values)))
+    return params
+
+
+def cached_response(endpoint, scopes):
+    """
+    Caches the data of anonymous GET responses. The key is built from the
+    endpoint, the normalized query params, the URL kwargs and the current
+    generations of the scopes returned by `scopes(request, **kwargs)`.
+    """
+
+    def decorator(get):
+        @wraps(get)
+        def wrapper(view, request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return get(view, request, *args, **kwargs)
+
+            generations = get_generations(scopes(request, **kwargs))
+            fingerprint = repr(
+                (_normalized_query(request), sorted(kwargs.items()), generations)
+            )
+            key = (
+                f"audio:response:{endpoint}:"
+                f"{hashlib.md5(fingerprint.encode()).hexdigest()}"
+            )
+
+            data = cache.get(key)
+            response_cache_lookup.send(
+                sender=view.__class__, endpoint=endpoint, hit=data is not None
+            )
+            if data is not None:
+                return Response(data)
+
+            response = get(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, settings.AUDIO_RESPONSE_CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class ResponseCacheStats:
+    """In-process hit/miss counters per endpoint, fed by `response_cache_lookup`."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, hit):
+        with self._lock:
+            self._counts[(endpoint, hit)] += 1
+
+    def hit_ratio(self, endpoint):
+        with self._lock:
+            hits = self._counts[(endpoint, True)]
+            total = hits + self._counts[(endpoint, False)]
+        return hits / total if total else None
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+response_cache_stats = ResponseCacheStats()
+
+
+@receiver(response_cache_lookup)
+def record_response_cache_lookup(sender, endpoint, hit, **kwargs):
+    response_cache_stats.record(endpoint, hit)
+
+
+# --- STALE-WHILE-REVALIDATE DLA CIĘŻKICH AGREGATÓW ---
+_local_locks = {}  # klucz -> [blokada, liczba oczekujących i trzymających]
+_local_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _local_lock(key):
+    # Koalescencja w obrębie procesu: jeden wątek na klucz liczy wartość.
+    # Klucze zawierają numery generacji, więc wpis jest usuwany, gdy nikt
+    # już na niego nie czeka - inaczej słownik rósłby bez końca
+    with _local_locks_guard:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _local_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _local_locks[key]
+
+
+def _acquire_refresh_lock(key):
+    # Blokada w cache (współdzielona między procesami) z TTL, żeby padnięty
+    # worker nie zablokował odświeżania na zawsze
+    return cache.add(f"{key}:refresh-lock", True, settings.AUDIO_AGGREGATE_LOCK_TIMEOUT)
+
+
+def _release_refresh_lock(key):
+    cache.delete(f"{key}:refresh-lock")
+
+
+def _store(key, value, timeout):
+    fresh_until = time.time() + timeout
+    cache.set(
+        key, (value, fresh_until), timeout + settings.AUDIO_AGGREGATE_STALE_TIMEOUT
+    )
+    return value
+
+
+def _refresh_in_background(key, compute, timeout):
+    try:
+        _store(key, compute(), timeout)
+    except Exception as e:
+        print(f"AUDIO_CACHE_ERROR: Background refresh of {key} failed: {e}")
+    finally:
+        _release_refresh_lock(key)
+        connections.close_all()  # Połączenia tego wątku nie wrócą do puli
+
+
+def get_or_refresh(key, compute, timeout):
+    """
+    Returns the cached result of `compute()`, recomputing it at most once
+    at a time per key.
+
+    A fresh entry is returned as is. An expired entry is still returned
+    (stale-while-revalidate) while exactly one worker, holding a cache lock
+    with a TTL, recomputes it in a background thread. On a cold miss the
+    concurrent callers wait for the single worker that computes the value.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() >= fresh_until and _acquire_refresh_lock(key):
+            threading.Thread(
+                target=_refresh_in_background,
+                args=(key, compute, timeout),
+                daemon=True,
+            ).start()
+        return value
+
+    with _local_lock(key):
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+
+        deadline = time.monotonic() + settings.AUDIO_AGGREGATE_LOCK_TIMEOUT
+        while not _acquire_refresh_lock(key):
+            # Wartość liczy inny proces - czekamy na nią zamiast dublować zapytanie
+            if time.monotonic() >= deadline:
+                return compute()
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+
+        try:
+            return _store(key, compute(), timeout)
+        finally:
+            _release_refresh_lock(key)
@@ -0,0 +1,255 @@
+# audio/feed.py
+"""
+Lightweight read path for the audio list endpoints.
+
+Instead of building model instances and running DRF field machinery per row,
+the list views fetch only the needed columns with `.values()` (tags and vote
+counts come from correlated subqueries) and assemble the dicts directly. The
+output is identical to `AudioFileSerializer(..., many=True).data`.
+
+The parts of a representation that only change when the file itself changes
+are cached per object under its uuid and version (`updated_at`); the counters
+are merged in from the page query on every request.
+"""
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .models import AudioFile, Like
+
+_datetime_field = serializers.DateTimeField()
+
+_FILE_NAME_PLACEHOLDER = "__file_name__"
+
+
+def _file_url_prefix():
+    # urljoin liczony raz: dla zwykłej nazwy pliku (uuid.rozszerzenie) wynik to
+    # zawsze stały prefiks + nazwa
+    joined = urljoin(settings.AUDIO_FILE_BASE_URL + "/", _FILE_NAME_PLACEHOLDER)
+    return joined[: -len(_FILE_NAME_PLACEHOLDER)]
+
+
+def file_url(name, prefix):
+    if "/" in name or ":" in name or name.startswith((".", "?", "#")):
+        return urljoin(settings.AUDIO_FILE_BASE_URL + "/", name)
+    return prefix + name
+
+
+def _vote_count(is_liked):
+    votes = (
+        Like.objects.filter(audio_file=OuterRef("pk"), is_liked=is_liked)
+        .order_by()
+        .values("audio_file")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(votes), 0)
+
+
+def _reaction(user):
+    # Skalarne podzapytanie w zapytaniu o stronę zamiast osobnego żądania na plik
+    return Subquery(
+        Like.objects.filter(audio_file=OuterRef("pk"), user=user).values("is_liked")[:1]
+    )
+
+
+def _tag_names():
+    # Kolejność powiązań jak w instance.tags.all() (kolejność dodania)
+    tags = (
+        AudioFile.tags.through.objects.filter(audiofile=OuterRef("pk"))
+        .order_by()
+        .values("audiofile")
+        .annotate(names=ArrayAgg("tag__name", ordering="id"))
+        .values("names")
+    )
+    return Subquery(tags)
+
+
+# Pola w kolejności AudioFileSerializer; dla każdego: kolumny/adnotacje
+# potrzebne w .values() oraz funkcja budująca wartość z wiersza
+FEED_FIELDS = (
+    "id",
+    "uuid",
+    "title",
+    "description",
+    "file",
+    "is_public",
+    "uploaded_at",
+    "likes_count",
+    "dislikes_count",
+    "uploader",
+    "views",
+    "tags",
+)
+COMPACT_FIELDS = ("uuid", "title", "file", "uploader")
+# Głos zalogowanego użytkownika (True/False/None); pomijany dla anonimowych
+REACTION_FIELD = "my_reaction"
+LIST_FIELDS = FEED_FIELDS + (REACTION_FIELD,)
+
+_FIELD_SOURCES = {
+    "likes_count": lambda user: {"likes_total": _vote_count(True)},
+    "dislikes_count": lambda user: {"dislikes_total": _vote_count(False)},
+    "uploader": lambda user: {"uploader_name": F("user__name")},
+    "tags": lambda user: {"tag_names": _tag_names()},
+    REACTION_FIELD: lambda user: {"reaction": _reaction(user)},
+}
+
+_FIELD_BUILDERS = {
+    "uuid": lambda row, prefix: str(row["uuid"]),
+    "file": lambda row, prefix: file_url(row["file"], prefix),
+    "uploaded_at": lambda row, prefix: _datetime_field.to_representation(
+        row["uploaded_at"]
+    ),
+    "likes_count": lambda row, prefix: row["likes_total"],
+    "dislikes_count": lambda row, prefix: row["dislikes_total"],
+    "uploader": lambda row, prefix: (
+        row["uploader_name"] if row["uploader_name"] is not None else "Anonim"
+    ),
+    "tags": lambda row, prefix: row["tag_names"] or [],
+    REACTION_FIELD: lambda row, prefix: row["reaction"],
+}
+
+
+def requested_fields(query_params):
+    """
+    Returns the fields selected by the `fields=` (comma separated) or
+    `view=compact` query params, in serializer order. All fields (and the
+    caller's reaction) by default.
+    """
+    fields = [
+        name.strip()
+        for value in query_params.getlist("fields")
+        for name in value.split(",")
+        if name.strip()
+    ]
+    view = query_params.get("view")
+
+    if fields and view:
+        raise ValidationError("Use either 'fields' or 'view', not both.")
+    if view is not None and view not in ("compact", "full"):
+        raise ValidationError({"view": "Expected 'compact' or 'full'."})
+    if view == "compact":
+        return COMPACT_FIELDS
+    if not fields:
+        return LIST_FIELDS
+
+    unknown = sorted(set(fields) - set(LIST_FIELDS))
+    if unknown:
+        raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}."})
+    return tuple(name for name in LIST_FIELDS if name in fields)
+
+
+def _build(queryset, fields, extra_columns=(), user=None):
+    # Tylko kolumny i podzapytania potrzebne dla wybranych pól; "id" zawsze,
+    # bo służy do ustalania kolejności w feed_rows_in_order
+    columns = {"id", *extra_columns}
+    annotations = {}
+    for name in fields:
+        if name in _FIELD_SOURCES:
+            annotations.update(_FIELD_SOURCES[name](user))
+        else:
+            columns.add(name)
+    rows = queryset.values(*columns, **annotations)
+
+    prefix = _file_url_prefix()
+    builders = [
+        (name, _FIELD_BUILDERS.get(name, lambda row, prefix, name=name: row[name]))
+        for name in fields
+    ]
+    return [
+        (row, {name: build(row, prefix) for name, build in builders}) for row in rows
+    ]
+
+
+# Pola zmienne (liczniki) są zawsze czytane z bazy; reszta reprezentacji
+# zmienia się tylko razem z updated_at pliku i trafia do cache
+_VOLATILE_FIELDS = ("likes_count", "dislikes_count", "views", REACTION_FIELD)
+_CACHED_FIELDS = tuple(name for name in FEED_FIELDS if name not in _VOLATILE_FIELDS)
+
+
+def representation_cache_key(uuid, updated_at):
+    return f"audio:representation:{uuid}:{updated_at.isoformat()}"
+
+
+def _cached_representations(versions):
+    """
+    Returns {id: cached fields} for `versions` ({id: cache key}) with one
+    `get_many`, building and storing only the missing entries.
+    """
+    cached = cache.get_many(versions.values())
+    missing = [pk for pk, key in versions.items() if key not in cached]
+    if missing:
+        built = {
+            versions[row["id"]]: data
+            for row, data in _build(
+                AudioFile.objects.filter(id__in=missing), _CACHED_FIELDS
+            )
+        }
+        cache.set_many(built, settings.AUDIO_REPRESENTATION_CACHE_TIMEOUT)
+        cached.update(built)
+    return {pk: cached[key] for pk, key in versions.items() if key in cached}
+
+
+def _fetch(queryset, fields, user):
+    if user is None or not user.is_authenticated:
+        fields = [name for name in fields if name != REACTION_FIELD]
+        user = None
+
+    if set(fields) <= {"id", "uuid", *_VOLATILE_FIELDS}:
+        return [(row["id"], data) for row, data in _build(queryset, fields, user=user)]
+
+    # Strona: identyfikatory, wersje i świeże liczniki w jednym zapytaniu
+    volatile = [name for name in fields if name in _VOLATILE_FIELDS]
+    page = _build(queryset, volatile, extra_columns=("uuid", "updated_at"), user=user)
+    representations = _cached_representations(
+        {
+            row["id"]: representation_cache_key(row["uuid"], row["updated_at"])
+            for row, _ in page
+        }
+    )
+
+    results = []
+    for row, counters in page:
+        representation = representations.get(row["id"])
+        if representation is None:
+            continue  # Plik usunięty między zapytaniami
+        results.append(
+            (
+                row["id"],
+                {
+                    name: (counters[name] if name in counters else representation[name])
+                    for name in fields
+                },
+            )
+        )
+    return results
+
+
+def feed_rows(queryset, fields=FEED_FIELDS, user=None):
+    """
+    Returns the audio files in `queryset` (which may already be filtered,
+    ordered and sliced) as plain dicts. With all fields the dicts are equal
+    to what `AudioFileSerializer` returns for the same files; leaving a field
+    out also leaves out its columns and subqueries.
+
+    The page query reads only ids, versions (`updated_at`) and the counters;
+    the rest of each representation comes from the per-object cache, and
+    only the missing entries are built, in one more query.
+
+    `my_reaction` is filled in for an authenticated `user` from a subquery
+    in the same page query and dropped for anonymous requests.
+    """
+    return [data for _, data in _fetch(queryset, fields, user)]
+
+
+def feed_rows_in_order(ids, queryset=None, fields=FEED_FIELDS, user=None):
+    """Like `feed_rows`, for a list of ids, keeping the order of `ids`."""
+    queryset = AudioFile.objects.all() if queryset is None else queryset
+    rows = dict(_fetch(queryset.filter(id__in=ids), fields, user))
+    return [rows[pk] for pk in ids if pk in rows]
@@ -0,0 +1,114 @@
+import timeit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from audio.feed import COMPACT_FIELDS, FEED_FIELDS, feed_rows
+from audio.models import AudioFile, Like, Tag
+from audio.serializers import AudioFileSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-row cost of serializing a feed page with "
+        "AudioFileSerializer and with the values()-based read path in "
+        "audio.feed, and the payload size of a page with sparse fieldsets. "
+        "Seed data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        items = options["items"]
+        repeat = options["repeat"]
+
+        with transaction.atomic():
+            self.seed(items)
+            queryset = AudioFile.objects.filter(title__startswith="Benchmark").order_by(
+                "-uploaded_at", "-id"
+            )
+
+            def serializer_path():
+                return AudioFileSerializer(list(queryset), many=True).data
+
+            def feed_path():
+                return feed_rows(queryset)
+
+            serializer_body = JSONRenderer().render(serializer_path())
+            feed_body = JSONRenderer().render(feed_path())
+            self.stdout.write(
+                f"Payload: {items} items, {len(feed_body)} bytes "
+                f"(identical output: {serializer_body == feed_body})"
+            )
+
+            for name, build in (
+                ("AudioFileSerializer", serializer_path),
+                ("feed_rows", feed_path),
+            ):
+                with CaptureQueriesContext(connection) as queries:
+                    build()
+                seconds = timeit.timeit(build, number=repeat)
+                self.stdout.write(
+                    f"{name:>20}: {seconds / repeat / items * 1e6:8.1f} µs per row, "
+                    f"{len(queries)} queries per page"
+                )
+
+            page = queryset.all()[:10]
+            for name, fields in (
+                ("full", FEED_FIELDS),
+                ("view=compact", COMPACT_FIELDS),
+                ("fields=uuid,title", ("uuid", "title")),
+            ):
+                rows = feed_rows(page, fields)
+                self.stdout.write(
+                    f"{name:>20}: {len(JSONRenderer().render(rows))} bytes "
+                    f"per page of 10"
+                )
+
+            transaction.set_rollback(True)
+
+    def seed(self, items):
+        users = [
+            User.objects.create_user(
+                email=f"benchmark{index}@example.com",
+                password=None,
+                name=f"Benchmark Użytkownik {index}",
+            )
+            for index in range(10)
+        ]
+        tags = Tag.objects.bulk_create(
+            [Tag(name=f"benchmark-tag-{index}") for index in range(5)]
+        )
+        audio_files = AudioFile.objects.bulk_create(
+            [
+                AudioFile(
+                    user=users[index % len(users)],
+                    title=f"Benchmark utwór nr {index}",
+                    description="Opis pliku audio używany w benchmarku. " * 3,
+                    file=f"benchmark-{index}.mp3",
+                    views=index * 7,
+                )
+                for index in range(items)
+            ]
+        )
+        AudioFile.tags.through.objects.bulk_create(
+            [
+                AudioFile.tags.through(audiofile_id=audio_file.pk, tag_id=tag.pk)
+                for audio_file in audio_files
+                for tag in tags[:3]
+            ]
+        )
+        Like.objects.bulk_create(
+            [
+                Like(user=user, audio_file=audio_file, is_liked=index % 3 != 0)
+                for index, user in enumerate(users)
+                for audio_file in audio_files
+            ]
+        )
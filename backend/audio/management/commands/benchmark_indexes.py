@@ -0,0 +1,157 @@
+import random
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from audio.feed import _vote_count
+from audio.models import AudioFile, Like
+from comments.models import Comment
+
+User = get_user_model()
+
+# Indeksy mierzone przez komendę; w pomiarze "before" są usuwane (w transakcji)
+HOT_PATH_INDEXES = (
+    "audio_file_public_feed_idx",
+    "audio_like_file_vote_idx",
+    "comment_audio_thread_idx",
+)
+
+_EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds audio files, votes and comments, then prints EXPLAIN ANALYZE "
+        "plans of the hot-path queries with and without the hot-path indexes. "
+        "Seed data is committed (VACUUM needs it, so index-only scans are "
+        "possible) and deleted at the end; the indexes are dropped only inside "
+        "a rolled-back transaction. Run it against a development database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--files", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--private-ratio", type=float, default=0.3)
+        parser.add_argument(
+            "--plans", action="store_true", help="Print full plans, not only times."
+        )
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        with transaction.atomic():
+            sample = self.seed(options)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM ANALYZE")
+            after = self.measure(sample)
+
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for name in HOT_PATH_INDEXES:
+                        cursor.execute(f'DROP INDEX "{name}"')
+                before = self.measure(sample)
+                transaction.set_rollback(True)
+        finally:
+            self.delete_seed()
+
+        for name in after:
+            self.stdout.write(
+                f"{name:>22}: {before[name][0]:9.3f} ms -> {after[name][0]:9.3f} ms"
+            )
+            if options["plans"]:
+                self.stdout.write(f"--- before ---\n{before[name][1]}")
+                self.stdout.write(f"--- after ---\n{after[name][1]}\n")
+
+    def queries(self, sample):
+        audio_file_id, audio_file_uuid = sample
+        public = AudioFile.objects.filter(is_public=True)
+        return {
+            "feed page": public.order_by("-uploaded_at").values(
+                "id",
+                "uuid",
+                "updated_at",
+                "views",
+                likes_total=_vote_count(True),
+                dislikes_total=_vote_count(False),
+            )[:10],
+            "feed count": public.values("is_public").annotate(count=Count("*")),
+            "like counts": Like.objects.filter(audio_file_id=audio_file_id)
+            .values("is_liked")
+            .annotate(count=Count("*"))
+            .order_by(),
+            "comments of file": Comment.objects.filter(
+                audio_file_id=audio_file_uuid, parent_comment__isnull=True
+            ).values("id", "created_at")[:20],
+        }
+
+    def measure(self, sample):
+        results = {}
+        with connection.cursor() as cursor:
+            for name, queryset in self.queries(sample).items():
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                time = float(_EXECUTION_TIME.search(plan).group(1))
+                results[name] = (time, plan)
+        return results
+
+    def seed(self, options):
+        users = User.objects.bulk_create(
+            [
+                User(email=f"index-benchmark{index}@example.com", name=f"U{index}")
+                for index in range(options["users"])
+            ]
+        )
+        audio_files = AudioFile.objects.bulk_create(
+            [
+                AudioFile(
+                    user=random.choice(users),
+                    title=f"Benchmark {index}",
+                    file=f"index-benchmark-{index}.mp3",
+                    is_public=random.random() >= options["private_ratio"],
+                    views=random.randint(0, 1000),
+                )
+                for index in range(options["files"])
+            ],
+            batch_size=5000,
+        )
+        Like.objects.bulk_create(
+            [
+                Like(user=user, audio_file=audio_file, is_liked=random.random() < 0.8)
+                for audio_file in audio_files
+                for user in random.sample(users, random.randint(0, 20))
+            ],
+            batch_size=5000,
+        )
+        Comment.objects.bulk_create(
+            [
+                Comment(
+                    user=random.choice(users),
+                    audio_file_id=audio_file.uuid,
+                    content="Benchmark comment",
+                )
+                for audio_file in audio_files
+                for _ in range(random.randint(0, 5))
+            ],
+            batch_size=5000,
+        )
+        # Przykładowy plik do pomiaru liczników i komentarzy
+        sample = audio_files[0]
+        return sample.pk, sample.uuid
+
+    def delete_seed(self):
+        # Surowy DELETE: bez sygnałów (cache, statystyki) dla danych benchmarku
+        audio_files = AudioFile.objects.filter(file__startswith="index-benchmark-")
+        users = User.objects.filter(email__startswith="index-benchmark")
+        with transaction.atomic():
+            Comment.objects.filter(
+                audio_file_id__in=audio_files.values("uuid")
+            )._raw_delete(connection.alias)
+            Like.objects.filter(audio_file__in=audio_files)._raw_delete(
+                connection.alias
+            )
+            audio_files._raw_delete(connection.alias)
+            users._raw_delete(connection.alias)
@@ -0,0 +1,74 @@
+import timeit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from audio.models import AudioFile, Tag
+from audio.serializers import AudioFileSerializer
+from project.renderers import ORJSONRenderer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures render time of a serialized AudioFileSerializer payload with "
+        "DRF's JSONRenderer and with ORJSONRenderer. Seed data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            payload = self.build_payload(options["items"])
+            transaction.set_rollback(True)
+
+        stdlib_body = JSONRenderer().render(payload)
+        orjson_body = ORJSONRenderer().render(payload)
+        self.stdout.write(
+            f"Payload: {options['items']} items, {len(stdlib_body)} bytes "
+            f"(identical output: {stdlib_body == orjson_body})"
+        )
+
+        for name, renderer in (
+            ("JSONRenderer", JSONRenderer()),
+            ("ORJSONRenderer", ORJSONRenderer()),
+        ):
+            seconds = timeit.timeit(
+                lambda: renderer.render(payload), number=options["repeat"]
+            )
+            self.stdout.write(
+                f"{name:>16}: {seconds / options['repeat'] * 1e6:8.1f} µs per render"
+            )
+
+    def build_payload(self, items):
+        user = User.objects.create_user(
+            email="benchmark@example.com", password=None, name="Benchmark Użytkownik"
+        )
+        tags = Tag.objects.bulk_create(
+            [Tag(name=f"benchmark-tag-{index}") for index in range(5)]
+        )
+        audio_files = AudioFile.objects.bulk_create(
+            [
+                AudioFile(
+                    user=user,
+                    title=f"Utwór testowy nr {index}",
+                    description="Opis pliku audio używany w benchmarku. " * 3,
+                    file=f"benchmark-{index}.mp3",
+                    views=index * 7,
+                )
+                for index in range(items)
+            ]
+        )
+        AudioFile.tags.through.objects.bulk_create(
+            [
+                AudioFile.tags.through(audiofile_id=audio_file.pk, tag_id=tag.pk)
+                for audio_file in audio_files
+                for tag in tags[:3]
+            ]
+        )
+        return AudioFileSerializer(audio_files, many=True).data
@@ -0,0 +1,184 @@
+import re
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from audio.models import (
+    AudioFile,
+    Follow,
+    TimelineEntry,
+    UserAudioStats,
+    fan_out_audio_file,
+)
+from audio.timeline import encode_cursor, timeline_page
+
+User = get_user_model()
+
+_EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the home timeline at scale: the cost of fanning one upload out "
+        "to --followers followers, and the latency of reading a timeline page "
+        "(pushed entries only, and merged with a pulled popular uploader). Seed "
+        "data is committed and deleted at the end. Run it against a development "
+        "database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--followers", type=int, default=100000)
+        parser.add_argument("--uploads", type=int, default=3)
+        parser.add_argument(
+            "--plans", action="store_true", help="Print full plans, not only times."
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            uploader, follower = self.seed(options)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM ANALYZE")
+            self.measure_fan_out(uploader, options)
+            self.measure_reads(uploader, follower, options)
+        finally:
+            self.delete_seed()
+
+    def seed(self, options):
+        uploader, other = User.objects.bulk_create(
+            [
+                User(email="timeline-benchmark-uploader@example.com", name="Popular"),
+                User(email="timeline-benchmark-other@example.com", name="Other"),
+            ]
+        )
+        followers = User.objects.bulk_create(
+            [
+                User(email=f"timeline-benchmark{index}@example.com", name=f"F{index}")
+                for index in range(options["followers"])
+            ],
+            batch_size=10000,
+        )
+        Follow.objects.bulk_create(
+            [Follow(follower=user, followee=uploader) for user in followers],
+            batch_size=10000,
+        )
+        UserAudioStats.objects.update_or_create(
+            user=uploader, defaults={"follower_count": len(followers)}
+        )
+
+        # Pełna oś czasu (AUDIO_TIMELINE_MAX_ENTRIES) pierwszego obserwującego z
+        # plików drugiego uploadera oraz historia popularnego (tryb pull)
+        follower = followers[0]
+        Follow.objects.create(follower=follower, followee=other)
+        history = AudioFile.objects.bulk_create(
+            [
+                AudioFile(
+                    user=user,
+                    title=f"Timeline benchmark {index}",
+                    file=f"timeline-benchmark-{index}-{user.pk}.mp3",
+                )
+                for index in range(settings.AUDIO_TIMELINE_MAX_ENTRIES)
+                for user in (other, uploader)
+            ],
+            batch_size=5000,
+        )
+        # uploaded_at jest auto_now_add - rozrzucamy daty zapytaniem
+        AudioFile.objects.filter(
+            pk__in=[audio_file.pk for audio_file in history]
+        ).update(uploaded_at=timezone.now() - F("id") * timedelta(seconds=1))
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user=follower, audio_file_id=audio_file_id, uploaded_at=uploaded_at
+                )
+                for audio_file_id, uploaded_at in AudioFile.objects.filter(
+                    user=other
+                ).values_list("id", "uploaded_at")
+            ],
+            batch_size=5000,
+        )
+        return uploader, follower
+
+    def measure_fan_out(self, uploader, options):
+        # Wymuszony push (uploader jest ponad progiem) - koszt, którego pull unika
+        uploads = AudioFile.objects.bulk_create(
+            [
+                AudioFile(
+                    user=uploader,
+                    title=f"Timeline benchmark upload {index}",
+                    file=f"timeline-benchmark-upload-{index}.mp3",
+                )
+                for index in range(options["uploads"])
+            ]
+        )
+        timings = []
+        for audio_file in uploads:
+            started = time.perf_counter()
+            written = fan_out_audio_file(
+                audio_file.pk, uploader.pk, audio_file.uploaded_at
+            )
+            timings.append(time.perf_counter() - started)
+        average = statistics.mean(timings)
+        self.stdout.write(
+            f"{'fan-out (push)':>24}: {average * 1000:9.1f} ms per upload, "
+            f"{written} entries, {average / written * 1e6:.2f} us per follower"
+        )
+
+    def measure_reads(self, uploader, follower, options):
+        deep_cursor = self.cursor_at(follower, settings.AUDIO_TIMELINE_MAX_ENTRIES - 50)
+        with transaction.atomic():
+            # Wycofywane: bez obserwowania popularnego uploadera tylko push
+            Follow.objects.filter(follower=follower, followee=uploader).delete()
+            self.report("first page (push)", follower, None, options)
+            self.report("deep page (push)", follower, deep_cursor, options)
+            transaction.set_rollback(True)
+        self.report("first page (push+pull)", follower, None, options)
+        self.report("deep page (push+pull)", follower, deep_cursor, options)
+
+    def cursor_at(self, user, offset):
+        entry = TimelineEntry.objects.filter(user=user).order_by(
+            "-uploaded_at", "-audio_file_id"
+        )[offset]
+        return encode_cursor(entry.uploaded_at, entry.audio_file_id)
+
+    def report(self, name, user, cursor, options):
+        timings = []
+        for _ in range(20):
+            started = time.perf_counter()
+            timeline_page(user, cursor)
+            timings.append(time.perf_counter() - started)
+
+        with CaptureQueriesContext(connection) as queries:
+            timeline_page(user, cursor)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {queries[-1]['sql']}")
+            plan = "\n".join(row[0] for row in db_cursor.fetchall())
+        execution = float(_EXECUTION_TIME.search(plan).group(1))
+        self.stdout.write(
+            f"{name:>24}: {statistics.median(timings) * 1000:9.3f} ms "
+            f"(query {execution:.3f} ms)"
+        )
+        if options["plans"]:
+            self.stdout.write(plan)
+
+    def delete_seed(self):
+        # Surowy DELETE: bez sygnałów (cache, statystyki) dla danych benchmarku
+        users = User.objects.filter(email__startswith="timeline-benchmark")
+        audio_files = AudioFile.objects.filter(file__startswith="timeline-benchmark-")
+        with transaction.atomic():
+            TimelineEntry.objects.filter(audio_file__in=audio_files)._raw_delete(
+                connection.alias
+            )
+            TimelineEntry.objects.filter(user__in=users)._raw_delete(connection.alias)
+            Follow.objects.filter(followee__in=users)._raw_delete(connection.alias)
+            UserAudioStats.objects.filter(user__in=users)._raw_delete(connection.alias)
+            audio_files._raw_delete(connection.alias)
+            users._raw_delete(connection.alias)
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from audio.recommendations import METRICS, build_similar_audio
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the similar-audio neighbour lists from the likes (item-to-item "
+        "cosine or Jaccard similarity, computed in chunks of at most --max-pairs "
+        "co-occurrences)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--neighbors", type=int, default=settings.AUDIO_SIMILAR_NEIGHBORS
+        )
+        parser.add_argument(
+            "--metric", choices=METRICS, default=settings.AUDIO_SIMILAR_METRIC
+        )
+        parser.add_argument(
+            "--max-pairs", type=int, default=settings.AUDIO_SIMILAR_MAX_PAIRS
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stored = build_similar_audio(
+            k=options["neighbors"],
+            metric=options["metric"],
+            max_pairs=options["max_pairs"],
+        )
+        self.stdout.write(
+            f"Stored {stored} neighbours in {time.perf_counter() - started:.1f} s."
+        )
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from audio.play_events import drop_partitions_before, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the daily play event partitions for the next --ahead days and, "
+        "with --retain-days, drops the partitions older than that. Run it on a "
+        "schedule (e.g. daily), so partitions exist before their day starts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=7)
+        parser.add_argument("--retain-days", type=int)
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        ensure_partitions(
+            [today + timedelta(days=offset) for offset in range(options["ahead"] + 1)]
+        )
+        self.stdout.write(
+            f"Partitions ready until {today + timedelta(options['ahead'])}."
+        )
+
+        if options["retain_days"] is not None:
+            dropped = drop_partitions_before(
+                today - timedelta(days=options["retain_days"])
+            )
+            self.stdout.write(f"Dropped {len(dropped)} partitions.")
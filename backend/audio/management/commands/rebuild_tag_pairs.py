@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from audio.tag_pairs import rebuild_tag_pairs
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the tag co-occurrence counts (TagPair) from the tag links, "
+        "streaming the M2M table in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        stored = rebuild_tag_pairs(chunk_size=options["chunk_size"])
+        self.stdout.write(f"Rebuilt {stored} tag pairs.")
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from audio.models import AudioFile, Follow, Like, UserAudioStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes UserAudioStats (file count, total bytes, views, likes and "
+        "followers) from the audio files, votes and follows. With --fetch-sizes, "
+        "first reads the size of files uploaded before file_size existed from "
+        "the storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fetch-sizes", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["fetch_sizes"]:
+            self.fetch_sizes()
+
+        with transaction.atomic():
+            stats = {
+                row["user"]: UserAudioStats(
+                    user_id=row["user"],
+                    file_count=row["file_count"],
+                    total_bytes=row["total_bytes"] or 0,
+                    total_views=row["total_views"] or 0,
+                )
+                for row in AudioFile.objects.filter(user__isnull=False)
+                .values("user")
+                .annotate(
+                    file_count=Count("id"),
+                    total_bytes=Sum("file_size"),
+                    total_views=Sum("views"),
+                )
+                .order_by()
+            }
+            likes = (
+                Like.objects.filter(is_liked=True, audio_file__user__isnull=False)
+                .values("audio_file__user")
+                .annotate(total_likes=Count("id"))
+                .order_by()
+            )
+            for row in likes:
+                stats[row["audio_file__user"]].total_likes = row["total_likes"]
+            followers = (
+                Follow.objects.values("followee")
+                .annotate(follower_count=Count("id"))
+                .order_by()
+            )
+            for row in followers:
+                stats.setdefault(
+                    row["followee"], UserAudioStats(user_id=row["followee"])
+                ).follower_count = row["follower_count"]
+
+            UserAudioStats.objects.all().delete()
+            UserAudioStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+        self.stdout.write(f"Rebuilt audio stats for {len(stats)} users.")
+
+    def fetch_sizes(self):
+        missing = AudioFile.objects.filter(file_size=0).exclude(file="")
+        updated = 0
+        for audio_file in missing.only("id", "file").iterator(chunk_size=500):
+            try:
+                size = audio_file.file.size
+            except Exception as e:
+                self.stderr.write(f"Could not read size of {audio_file.file.name}: {e}")
+                continue
+            AudioFile.objects.filter(pk=audio_file.pk).update(file_size=size)
+            updated += 1
+        self.stdout.write(f"Fetched sizes of {updated} files.")
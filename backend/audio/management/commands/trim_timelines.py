@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from audio.timeline import trim_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes home timeline entries beyond the newest "
+        "AUDIO_TIMELINE_MAX_ENTRIES of every user. Run it periodically (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep", type=int, default=settings.AUDIO_TIMELINE_MAX_ENTRIES
+        )
+
+    def handle(self, *args, **options):
+        deleted = trim_timelines(options["keep"])
+        self.stdout.write(f"Deleted {deleted} timeline entries.")
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from audio.rollups import update_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds the votes, playback and view events since the previous run to "
+        "the daily stats and the trending scores. Run it periodically (cron), "
+        "or keep it running with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            help="Repeat every INTERVAL seconds instead of running once.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            updated = update_rollups()
+            self.stdout.write(f"Updated {updated} daily stats rows.")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:18
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="audiofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="audio_file_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="audio_tag_name_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
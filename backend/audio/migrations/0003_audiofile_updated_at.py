@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0002_trigram_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="audiofile",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0003_audiofile_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["user", "is_liked", "created_at"],
+                name="audio_like_user_liked_idx",
+            ),
+        ),
+    ]
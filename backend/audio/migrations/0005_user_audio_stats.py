@@ -0,0 +1,78 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_user_audio_stats(apps, schema_editor):
+    # Rozmiary istniejących plików nie są znane (file_size = 0); uzupełnia je
+    # `manage.py rebuild_user_audio_stats --fetch-sizes`
+    AudioFile = apps.get_model("audio", "AudioFile")
+    Like = apps.get_model("audio", "Like")
+    UserAudioStats = apps.get_model("audio", "UserAudioStats")
+
+    stats = {
+        row["user"]: UserAudioStats(
+            user_id=row["user"],
+            file_count=row["file_count"],
+            total_views=row["total_views"] or 0,
+        )
+        for row in AudioFile.objects.filter(user__isnull=False)
+        .values("user")
+        .annotate(file_count=Count("id"), total_views=Sum("views"))
+        .order_by()
+    }
+    likes = (
+        Like.objects.filter(is_liked=True, audio_file__user__isnull=False)
+        .values("audio_file__user")
+        .annotate(total_likes=Count("id"))
+        .order_by()
+    )
+    for row in likes:
+        stats[row["audio_file__user"]].total_likes = row["total_likes"]
+    UserAudioStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("audio", "0004_like_user_liked_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserAudioStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="audio_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("file_count", models.PositiveIntegerField(default=0)),
+                ("total_bytes", models.PositiveBigIntegerField(default=0)),
+                ("total_views", models.PositiveBigIntegerField(default=0)),
+                ("total_likes", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="audiofile",
+            name="file_size",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="audiofile",
+            index=models.Index(
+                fields=["user", "uploaded_at"], name="audio_file_user_uploaded_idx"
+            ),
+        ),
+        migrations.RunPython(populate_user_audio_stats, migrations.RunPython.noop),
+    ]
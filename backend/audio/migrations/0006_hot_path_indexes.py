@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:48
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY nie może działać w transakcji; tabele nie są
+    # blokowane dla zapisów na czas budowania indeksu
+    atomic = False
+
+    dependencies = [
+        ("audio", "0005_user_audio_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="audiofile",
+            index=models.Index(
+                condition=models.Q(("is_public", True)),
+                fields=["-uploaded_at"],
+                include=("uuid", "updated_at", "views"),
+                name="audio_file_public_feed_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="like",
+            index=models.Index(
+                fields=["audio_file", "is_liked"], name="audio_like_file_vote_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0006_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobWatermark",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("processed_until", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TrendingScore",
+            fields=[
+                (
+                    "audio_file",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="trending",
+                        serialize=False,
+                        to="audio.audiofile",
+                    ),
+                ),
+                ("log_score", models.FloatField(null=True)),
+                ("views_seen", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        models.OrderBy(
+                            models.F("log_score"), descending=True, nulls_last=True
+                        ),
+                        name="audio_trending_score_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Liczniki dla istniejących powiązań; dalej utrzymywane przyrostowo
+# (przeliczenie od zera: `manage.py rebuild_tag_pairs`)
+POPULATE_TAG_PAIRS_SQL = """
+    INSERT INTO audio_tagpair (tag_id, related_id, count)
+    SELECT link.tag_id, other.tag_id, count(*)
+    FROM audio_audiofile_tags AS link
+    JOIN audio_audiofile_tags AS other ON other.audiofile_id = link.audiofile_id
+    GROUP BY link.tag_id, other.tag_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0008_similar_audio"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TagPair",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "related",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="audio.tag",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="audio.tag",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["tag", "-count"], name="audio_tag_pair_count_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("tag", "related"), name="audio_tag_pair_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(POPULATE_TAG_PAIRS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Tabela partycjonowana po dniu (UTC); partycje zakłada na bieżąco zapis
+# zdarzeń i `manage.py play_event_partitions`. Django nie tworzy takich tabel,
+# więc stan modelu i schemat bazy są opisane osobno.
+CREATE_PLAY_EVENTS_SQL = """
+    CREATE TABLE audio_playevent (
+        id bigint GENERATED BY DEFAULT AS IDENTITY,
+        audio_file_id bigint NOT NULL,
+        user_id bigint NULL,
+        session_id uuid NULL,
+        event_type varchar(10) NOT NULL,
+        position double precision NOT NULL,
+        occurred_at timestamp with time zone NOT NULL,
+        PRIMARY KEY (id, occurred_at)
+    ) PARTITION BY RANGE (occurred_at);
+    CREATE INDEX audio_play_event_file_idx
+        ON audio_playevent (audio_file_id, occurred_at);
+"""
+
+DROP_PLAY_EVENTS_SQL = "DROP TABLE audio_playevent"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0009_tag_pairs"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CREATE_PLAY_EVENTS_SQL, DROP_PLAY_EVENTS_SQL),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name="PlayEvent",
+                    fields=[
+                        ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                        ("session_id", models.UUIDField(null=True)),
+                        (
+                            "event_type",
+                            models.CharField(
+                                choices=[
+                                    ("start", "Start"),
+                                    ("progress", "Progress"),
+                                    ("complete", "Complete"),
+                                ],
+                                max_length=10,
+                            ),
+                        ),
+                        ("position", models.FloatField(default=0)),
+                        ("occurred_at", models.DateTimeField()),
+                        (
+                            "audio_file",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                db_index=False,
+                                on_delete=django.db.models.deletion.DO_NOTHING,
+                                related_name="+",
+                                to="audio.audiofile",
+                            ),
+                        ),
+                        (
+                            "user",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                db_index=False,
+                                null=True,
+                                on_delete=django.db.models.deletion.DO_NOTHING,
+                                related_name="+",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                    ],
+                    options={
+                        "indexes": [
+                            models.Index(
+                                fields=["audio_file", "occurred_at"],
+                                name="audio_play_event_file_idx",
+                            )
+                        ],
+                    },
+                ),
+            ],
+        ),
+    ]
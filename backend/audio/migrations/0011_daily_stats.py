@@ -0,0 +1,70 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remove_trending_watermark(apps, schema_editor):
+    # Trending jest teraz liczony przez update_rollups (znacznik "rollups")
+    JobWatermark = apps.get_model("audio", "JobWatermark")
+    JobWatermark.objects.filter(name="trending").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0010_play_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobwatermark",
+            name="processed_id",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="jobwatermark",
+            name="processed_until",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.CreateModel(
+            name="AudioDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("plays", models.PositiveIntegerField(default=0)),
+                ("completes", models.PositiveIntegerField(default=0)),
+                ("likes", models.PositiveIntegerField(default=0)),
+                ("dislikes", models.PositiveIntegerField(default=0)),
+                (
+                    "audio_file",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="audio.audiofile",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="audio_daily_stats_day_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("audio_file", "day"), name="audio_daily_stats_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(remove_trending_watermark, migrations.RunPython.noop),
+    ]
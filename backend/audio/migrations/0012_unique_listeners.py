@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0011_daily_stats"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="trendingscore",
+            name="views_seen",
+        ),
+        migrations.AddField(
+            model_name="audiodailystats",
+            name="listeners",
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name="playevent",
+            name="listener",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="playevent",
+            name="event_type",
+            field=models.CharField(
+                choices=[
+                    ("start", "Start"),
+                    ("progress", "Progress"),
+                    ("complete", "Complete"),
+                    ("view", "View"),
+                ],
+                max_length=10,
+            ),
+        ),
+    ]
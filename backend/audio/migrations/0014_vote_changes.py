@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audio", "0013_follow_timeline"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VoteChange",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("likes", models.SmallIntegerField(default=0)),
+                ("dislikes", models.SmallIntegerField(default=0)),
+                ("cast_at", models.DateTimeField()),
+                (
+                    "audio_file",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="audio.audiofile",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+FIELDS = ("audio_file", "user")
+
+
+def drop_fk_indexes(apps, schema_editor):
+    # Jednokolumnowe indeksy kluczy obcych (nazwy nadane przez Django)
+    Like = apps.get_model("audio", "Like")
+    for field_name in FIELDS:
+        column = Like._meta.get_field(field_name).column
+        for name in schema_editor._constraint_names(
+            Like, [column], index=True, unique=False, primary_key=False
+        ):
+            schema_editor.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(name)}"
+            )
+
+
+def create_fk_indexes(apps, schema_editor):
+    Like = apps.get_model("audio", "Like")
+    for field_name in FIELDS:
+        schema_editor.execute(
+            schema_editor._create_index_sql(
+                Like, fields=[Like._meta.get_field(field_name)], concurrently=True
+            )
+        )
+
+
+class Migration(migrations.Migration):
+    # Indeks (audio_file, is_liked) i unikalny (user, audio_file) pokrywają
+    # indeksy kluczy obcych, które tylko spowalniały zapis głosów; DROP INDEX
+    # CONCURRENTLY nie może działać w transakcji
+    atomic = False
+
+    dependencies = [
+        ("audio", "0014_vote_changes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_fk_indexes, create_fk_indexes),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="like",
+                    name="audio_file",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="likes",
+                        to="audio.audiofile",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="like",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="likes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,18 +1,28 @@
 # backend/audio/models.py
 import os  # Potrzebne do os.path.splitext
 import uuid
+from collections import Counter, defaultdict
 
 import boto3  # Import boto3 do interakcji z S3/MinIO
 from botocore.client import Config  # Dla konfiguracji boto3
 from django.conf import settings  # Import ustawień Django
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.files.base import (  # Do zapisu flagi (choć użyjemy pola boolean)
     ContentFile,
 )
-from django.db import models
-from django.db.models.signals import post_save  # Import dla sygnałów
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.db.models.signals import (  # Import dla sygnałów
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver  # Import dla dekoratora receiver
+from django.utils import timezone
 from storages.backends.s3boto3 import S3Boto3Storage
 
 # Zakładam, że value_object.py jest w głównym katalogu backendu lub jest dostępne w ścieżce Pythona
@@ -21,6 +31,15 @@ from storages.backends.s3boto3 import S3Boto3Storage
 # Na razie załóżmy, że jest dostępne jako:
 from value_object import ALLOWED_AUDIO_EXTENSIONS  # DOSTOSUJ IMPORT, JEŚLI TRZEBA
 
+from .cache import (
+    FEED_SCOPE,
+    TAG_LIST_SCOPE,
+    USER_NAMES_SCOPE,
+    bump_generations,
+    likes_scope,
+    tag_scope,
+)
+
 User = get_user_model()
 
 
@@ -41,6 +60,16 @@ def audio_file_upload_to(instance, filename):
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
 
+    class Meta:
+        indexes = [
+            # Indeks trigramowy dla wyszukiwania rozmytego i autouzupełniania
+            GinIndex(
+                name="audio_tag_name_trgm",
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -63,8 +92,10 @@ class AudioFile(models.Model):
     )
     is_public = models.BooleanField(default=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     tags = models.ManyToManyField(Tag, related_name="audio_files", blank=True)
     views = models.PositiveIntegerField(default=0)
+    file_size = models.PositiveBigIntegerField(default=0)  # w bajtach
 
     # --- NOWE POLE ---
     s3_metadata_set = models.BooleanField(
@@ -74,9 +105,40 @@ class AudioFile(models.Model):
 
     # -----------------
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                name="audio_file_title_trgm",
+                fields=["title"],
+                opclasses=["gin_trgm_ops"],
+            ),
+            # Lista "moje pliki" (paginacja kursorowa po dacie wysłania)
+            models.Index(
+                fields=["user", "uploaded_at"], name="audio_file_user_uploaded_idx"
+            ),
+            # Feed publicznych plików: częściowy (tylko is_public) i pokrywający
+            # kolumny zapytania o stronę (wersja i liczniki do cache reprezentacji)
+            models.Index(
+                fields=["-uploaded_at"],
+                include=["uuid", "updated_at", "views"],
+                condition=models.Q(is_public=True),
+                name="audio_file_public_feed_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.file and not self.file_size:
+            try:
+                self.file_size = self.file.size
+            except Exception as e:
+                print(
+                    f"AUDIO_MODEL_ERROR: Could not read size of {self.file.name}: {e}"
+                )
+        super().save(*args, **kwargs)
+
 
 # --- SYGNAŁ DO USTAWIANIA METADANYCH S3/MINIO ---
 @receiver(post_save, sender=AudioFile)
@@ -168,15 +230,700 @@ def set_s3_content_disposition_metadata(sender, instance, created, **kwargs):
 class Like(models.Model):
     # ... (reszta modelu Like bez zmian) ...
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="likes")
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="likes",
+        db_index=False,  # Pokryty przez unikalny (user, audio_file)
+    )
     audio_file = models.ForeignKey(
-        AudioFile, on_delete=models.CASCADE, related_name="likes"
+        AudioFile,
+        on_delete=models.CASCADE,
+        related_name="likes",
+        db_index=False,  # Pokryty przez indeks (audio_file, is_liked)
     )
     is_liked = models.BooleanField()
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ("user", "audio_file")
+        indexes = [
+            # Lista polubionych użytkownika, sortowana po dacie polubienia
+            models.Index(
+                fields=["user", "is_liked", "created_at"],
+                name="audio_like_user_liked_idx",
+            ),
+            # Liczniki polubień/niepolubień pliku (index-only scan)
+            models.Index(
+                fields=["audio_file", "is_liked"], name="audio_like_file_vote_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.audio_file.title} - {'Like' if self.is_liked else 'Dislike'}"
+
+
+class UserAudioStats(models.Model):
+    """
+    Per-user totals over the user's uploads (and followers), maintained
+    incrementally on upload, delete, view, vote and follow.
+    `rebuild_user_audio_stats` recomputes them from scratch.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="audio_stats"
+    )
+    file_count = models.PositiveIntegerField(default=0)
+    total_bytes = models.PositiveBigIntegerField(default=0)
+    total_views = models.PositiveBigIntegerField(default=0)
+    total_likes = models.PositiveBigIntegerField(default=0)
+    follower_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.file_count} files"
+
+
+def adjust_user_audio_stats(user_id, **deltas):
+    """Adds `deltas` to the user's stats row atomically (F() expressions)."""
+    if user_id is None:
+        return  # Anonimowy upload
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    if UserAudioStats.objects.filter(user_id=user_id).update(**updates):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        return  # Brak wiersza (np. usuwany użytkownik) - nie ma czego zmniejszać
+    UserAudioStats.objects.get_or_create(user_id=user_id)
+    UserAudioStats.objects.filter(user_id=user_id).update(**updates)
+
+
+class Follow(models.Model):
+    """A user following an uploader (home timeline, `audio.timeline`)."""
+
+    follower = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="following",
+        db_index=False,  # Pokryty przez unikalny (follower, followee)
+    )
+    followee = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="followers",
+        db_index=False,  # Pokryty przez indeks (followee, follower)
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["follower", "followee"], name="audio_follow_unique"
+            ),
+        ]
+        indexes = [
+            # Fan-out czyta obserwujących uploadera samym indeksem
+            models.Index(
+                fields=["followee", "follower"], name="audio_follow_followee_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.follower_id} -> {self.followee_id}"
+
+
+class TimelineEntry(models.Model):
+    """
+    A public upload pushed into one follower's home timeline on upload
+    (fan-out on write). Uploads of very popular uploaders are not pushed;
+    the timeline pulls them at read time instead.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,  # Pokryty przez unikalny (user, uploaded_at, audio_file)
+    )
+    audio_file = models.ForeignKey(
+        AudioFile, on_delete=models.CASCADE, related_name="+"
+    )
+    uploaded_at = models.DateTimeField()  # Kopia z pliku: sortowanie bez złączenia
+
+    class Meta:
+        constraints = [
+            # Odczyt strony (user, uploaded_at DESC, audio_file DESC) z kursorem
+            # i ON CONFLICT przy ponownym fan-oucie
+            models.UniqueConstraint(
+                fields=["user", "uploaded_at", "audio_file"],
+                name="audio_timeline_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.audio_file_id}"
+
+
+_FAN_OUT_SQL = f"""
+    INSERT INTO {TimelineEntry._meta.db_table} (user_id, audio_file_id, uploaded_at)
+    SELECT follower_id, %s, %s FROM {Follow._meta.db_table} WHERE followee_id = %s
+    ON CONFLICT DO NOTHING
+"""
+
+
+def follower_count(user_id):
+    return (
+        UserAudioStats.objects.filter(user_id=user_id)
+        .values_list("follower_count", flat=True)
+        .first()
+        or 0
+    )
+
+
+def is_pulled_uploader(user_id):
+    """Uploaders with more followers than the threshold are not fanned out."""
+    return follower_count(user_id) > settings.AUDIO_TIMELINE_PULL_THRESHOLD
+
+
+def fan_out_audio_file(audio_file_id, user_id, uploaded_at):
+    """
+    Pushes an upload into the timelines of all of the uploader's followers
+    with one INSERT ... SELECT. Returns the number of written entries.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_FAN_OUT_SQL, [audio_file_id, uploaded_at, user_id])
+        return cursor.rowcount
+
+
+class SimilarAudio(models.Model):
+    """
+    Precomputed neighbour of an audio file, rebuilt offline from the likes by
+    `audio.recommendations.build_similar_audio`.
+    """
+
+    audio_file = models.ForeignKey(
+        AudioFile,
+        on_delete=models.CASCADE,
+        related_name="similar_audio",
+        db_index=False,  # Pokryty przez indeks (audio_file, -score)
+    )
+    similar = models.ForeignKey(AudioFile, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            # Lista sąsiadów pliku, od najbardziej podobnego, jednym zapytaniem
+            models.Index(
+                fields=["audio_file", "-score"], name="audio_similar_file_score_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.audio_file_id} -> {self.similar_id}: {self.score:.3f}"
+
+
+class TagPair(models.Model):
+    """
+    Number of audio files tagged with both `tag` and `related`, stored in both
+    directions; the diagonal (`tag == related`) is the file count of the tag.
+    Maintained on tag link/unlink by `adjust_tag_pairs`, rebuilt from scratch
+    by `rebuild_tag_pairs`.
+    """
+
+    tag = models.ForeignKey(
+        Tag, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    related = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tag", "related"], name="audio_tag_pair_unique"
+            ),
+        ]
+        indexes = [
+            # Najczęściej współwystępujące tagi danego tagu
+            models.Index(fields=["tag", "-count"], name="audio_tag_pair_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tag_id} + {self.related_id}: {self.count}"
+
+
+_TAG_PAIR_TABLE = TagPair._meta.db_table
+
+_INCREMENT_TAG_PAIRS_SQL = f"""
+    INSERT INTO {_TAG_PAIR_TABLE} AS pair (tag_id, related_id, count)
+    SELECT * FROM unnest(%s::bigint[], %s::bigint[], %s::integer[])
+    ON CONFLICT (tag_id, related_id) DO UPDATE SET count = pair.count + EXCLUDED.count
+"""
+
+_DECREMENT_TAG_PAIRS_SQL = f"""
+    UPDATE {_TAG_PAIR_TABLE} AS pair SET count = pair.count - delta.count
+    FROM unnest(%s::bigint[], %s::bigint[], %s::integer[])
+        AS delta(tag_id, related_id, count)
+    WHERE pair.tag_id = delta.tag_id AND pair.related_id = delta.related_id
+"""
+
+
+def adjust_tag_pairs(changed_tags, sign):
+    """
+    Adds `sign` (1 or -1) to the counts of every tag pair on the files in
+    `changed_tags` ({audio_file_id: linked/unlinked tag ids, or None for all
+    of the file's tags}) that involves a changed tag. Must run after linking
+    and before unlinking, while the changed links exist.
+    """
+    current = defaultdict(set)
+    links = AudioFile.tags.through.objects.filter(
+        audiofile_id__in=list(changed_tags)
+    ).values_list("audiofile_id", "tag_id")
+    for audio_file_id, tag_id in links:
+        current[audio_file_id].add(tag_id)
+
+    deltas = Counter()
+    for audio_file_id, changed in changed_tags.items():
+        tags = current[audio_file_id]
+        changed = tags if changed is None else tags & set(changed)
+        for tag_id in changed:
+            for other_id in tags:
+                deltas[(tag_id, other_id)] += 1
+                if other_id not in changed:
+                    deltas[(other_id, tag_id)] += 1
+    if not deltas:
+        return
+
+    tag_ids, related_ids = zip(*deltas)
+    sql = _INCREMENT_TAG_PAIRS_SQL if sign > 0 else _DECREMENT_TAG_PAIRS_SQL
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [list(tag_ids), list(related_ids), list(deltas.values())])
+
+
+class PlayEvent(models.Model):
+    """
+    Append-only playback and view telemetry. The table is partitioned by day
+    (`occurred_at`, UTC) in the migration; rows are written only in batches
+    by `audio.play_events` (COPY) and never updated.
+    """
+
+    START = "start"
+    PROGRESS = "progress"
+    COMPLETE = "complete"
+    VIEW = "view"  # Zapisywane przez serwer przy wyświetleniu szczegółów pliku
+    EVENT_TYPES = [
+        (START, "Start"),
+        (PROGRESS, "Progress"),
+        (COMPLETE, "Complete"),
+        (VIEW, "View"),
+    ]
+
+    # Klucz główny w bazie to (id, occurred_at) - wymóg partycjonowania.
+    # Bez kluczy obcych: zdarzenia zostają po usunięciu pliku lub użytkownika.
+    id = models.BigAutoField(primary_key=True)
+    audio_file = models.ForeignKey(
+        AudioFile,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        related_name="+",
+    )
+    session_id = models.UUIDField(null=True)
+    listener = models.BigIntegerField(null=True)  # audio.hll.listener_hash
+    event_type = models.CharField(max_length=10, choices=EVENT_TYPES)
+    position = models.FloatField(default=0)  # w sekundach
+    occurred_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["audio_file", "occurred_at"], name="audio_play_event_file_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.audio_file_id} {self.event_type} @ {self.position:.1f}s"
+
+
+class VoteChange(models.Model):
+    """
+    A change of an existing vote (flip or withdrawal), queued for
+    `audio.rollups.update_rollups`, which counts new votes by their
+    `created_at` and consumes (deletes) these rows to correct what it has
+    already counted. New votes are not recorded here.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    audio_file = models.ForeignKey(
+        AudioFile,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    likes = models.SmallIntegerField(default=0)  # Zmiana liczby polubień
+    dislikes = models.SmallIntegerField(default=0)  # Zmiana liczby niepolubień
+    cast_at = models.DateTimeField()  # created_at głosu - dzień, którego dotyczy
+
+    def __str__(self):
+        return f"{self.audio_file_id} {self.likes:+d}/{self.dislikes:+d}"
+
+
+def record_vote_change(audio_file_id, was_liked, is_liked, cast_at):
+    """
+    Queues the change of a vote cast at `cast_at` from `was_liked` to
+    `is_liked` (None = withdrawn) for the rollups.
+    """
+    likes = int(is_liked is True) - int(was_liked is True)
+    dislikes = int(is_liked is False) - int(was_liked is False)
+    VoteChange.objects.create(
+        audio_file_id=audio_file_id, likes=likes, dislikes=dislikes, cast_at=cast_at
+    )
+
+
+class JobWatermark(models.Model):
+    """Point up to which a periodic job has processed its input events."""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    processed_until = models.DateTimeField(null=True)  # None = od początku
+    processed_id = models.PositiveBigIntegerField(default=0)  # Ostatnie id zdarzenia
+
+    def __str__(self):
+        return f"{self.name}: {self.processed_until}"
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed popularity of an audio file, kept in log space by
+    `audio.rollups.update_rollups` (see `audio.trending` for the formula).
+    """
+
+    audio_file = models.OneToOneField(
+        AudioFile, on_delete=models.CASCADE, primary_key=True, related_name="trending"
+    )
+    log_score = models.FloatField(null=True)  # None = brak zdarzeń
+
+    class Meta:
+        indexes = [
+            # Ranking trending czytany wprost z posortowanego indeksu
+            models.Index(
+                F("log_score").desc(nulls_last=True), name="audio_trending_score_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.audio_file_id}: {self.log_score}"
+
+
+class AudioDailyStats(models.Model):
+    """
+    Per-day counters of an audio file (UTC days), incremented from the
+    deltas read by `audio.rollups.update_rollups`. Analytics and windowed
+    rankings read these rows instead of aggregating votes and events.
+    """
+
+    audio_file = models.ForeignKey(
+        AudioFile,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+        db_index=False,  # Pokrywa go indeks unikalny (audio_file, day)
+    )
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    plays = models.PositiveIntegerField(default=0)
+    completes = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    dislikes = models.PositiveIntegerField(default=0)
+    # Szkic HyperLogLog unikalnych słuchaczy dnia (audio.hll, 2 KB)
+    listeners = models.BinaryField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["audio_file", "day"], name="audio_daily_stats_unique"
+            ),
+        ]
+        indexes = [
+            # Rankingi z ostatnich N dni (top-rated ?days=)
+            models.Index(fields=["day"], name="audio_daily_stats_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.audio_file_id} {self.day}"
+
+
+# --- UNIEWAŻNIANIE CACHE ODPOWIEDZI (liczniki generacji) ---
+def _bump_after_commit(scopes):
+    # Podbicie po commicie, żeby równoległe żądanie nie zapisało starych danych
+    # pod nową generacją
+    transaction.on_commit(lambda: bump_generations(scopes))
+
+
+def _tag_names(audio_file_id):
+    return list(
+        Tag.objects.filter(audio_files=audio_file_id).values_list("name", flat=True)
+    )
+
+
+def _deleted_with_audio_file(audio_file_id, origin):
+    # Czy usunięcie zaczęło się od tego pliku (instancja albo queryset plików)?
+    # Wtedy jego głosy są kasowane kaskadowo i pliku dotyczy jedna korekta
+    # w sygnałach AudioFile zamiast pracy na każdy głos
+    if isinstance(origin, AudioFile):
+        return origin.pk == audio_file_id
+    return isinstance(origin, models.QuerySet) and origin.model is AudioFile
+
+
+@receiver(post_save, sender=AudioFile)
+def invalidate_feeds_on_audio_save(sender, instance, created, update_fields, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"views"}:
+        return  # Licznik wyświetleń nie unieważnia list (ograniczone przez TTL)
+    scopes = [FEED_SCOPE]
+    if not created:
+        scopes += [tag_scope(name) for name in _tag_names(instance.pk)]
+    _bump_after_commit(scopes)
+
+
+@receiver(pre_delete, sender=AudioFile)
+def remember_tags_before_audio_delete(sender, instance, **kwargs):
+    # Po usunięciu powiązania z tagami już nie istnieją
+    instance._tag_names_before_delete = _tag_names(instance.pk)
+
+
+@receiver(post_delete, sender=AudioFile)
+def invalidate_feeds_on_audio_delete(sender, instance, **kwargs):
+    tag_names = getattr(instance, "_tag_names_before_delete", [])
+    # Obejmuje też głosy usunięte razem z plikiem
+    scopes = [FEED_SCOPE, TAG_LIST_SCOPE, likes_scope(instance.pk)]
+    _bump_after_commit(scopes + [tag_scope(name) for name in tag_names])
+
+
+@receiver(m2m_changed, sender=AudioFile.tags.through)
+def invalidate_feeds_on_tags_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "pre_clear":
+        if reverse:
+            instance._audio_file_ids_before_clear = list(
+                instance.audio_files.values_list("pk", flat=True)
+            )
+        else:
+            instance._tag_names_before_clear = _tag_names(instance.pk)
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:  # tag.audio_files.add(...) - instance to Tag
+        tag_names = [instance.name]
+        if action == "post_clear":
+            pk_set = getattr(instance, "_audio_file_ids_before_clear", [])
+        changed_audio_files = AudioFile.objects.filter(pk__in=pk_set or ())
+    elif action == "post_clear":
+        tag_names = getattr(instance, "_tag_names_before_clear", [])
+        changed_audio_files = AudioFile.objects.filter(pk=instance.pk)
+    else:
+        tag_names = Tag.objects.filter(pk__in=pk_set).values_list("name", flat=True)
+        changed_audio_files = AudioFile.objects.filter(pk=instance.pk)
+
+    # Tagi są częścią reprezentacji pliku, więc zmieniają też jego walidator
+    # (ETag) i klucz w cache reprezentacji
+    changed_audio_files.update(updated_at=timezone.now())
+    _bump_after_commit(
+        [FEED_SCOPE, TAG_LIST_SCOPE] + [tag_scope(name) for name in tag_names]
+    )
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_feeds_on_like_change(sender, instance, **kwargs):
+    if _deleted_with_audio_file(instance.audio_file_id, kwargs.get("origin")):
+        return  # Podbija invalidate_feeds_on_audio_delete
+    # Głos zmienia liczniki tylko w listach zawierających ten plik
+    scopes = [FEED_SCOPE, likes_scope(instance.audio_file_id)]
+    scopes += [tag_scope(name) for name in _tag_names(instance.audio_file_id)]
+    _bump_after_commit(scopes)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_name_before_save(sender, instance, update_fields, **kwargs):
+    if instance.pk is None or (
+        update_fields is not None and "name" not in update_fields
+    ):
+        return  # Np. aktualizacja last_login przy logowaniu
+    instance._name_before_save = (
+        User.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_audio_files_on_user_rename(sender, instance, created, **kwargs):
+    name_before_save = instance.__dict__.pop("_name_before_save", None)
+    if created or name_before_save in (None, instance.name):
+        return
+
+    # Nazwa uploadera jest częścią reprezentacji plików: nowa wersja (updated_at)
+    # zmienia ich klucze w cache reprezentacji i ETagi; generacja nazw zmienia
+    # ETagi list komentarzy
+    audio_files = AudioFile.objects.filter(user=instance)
+    tag_names = set(
+        Tag.objects.filter(audio_files__in=audio_files).values_list("name", flat=True)
+    )
+    audio_files.update(updated_at=timezone.now())
+    _bump_after_commit(
+        [FEED_SCOPE, USER_NAMES_SCOPE] + [tag_scope(name) for name in tag_names]
+    )
+
+
+# --- WSPÓŁWYSTĘPOWANIE TAGÓW (TagPair) ---
+@receiver(m2m_changed, sender=AudioFile.tags.through)
+def update_tag_pairs_on_tags_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    # Dodanie liczone po zapisie powiązań (pk_set to tylko nowe powiązania),
+    # usunięcie przed nim - pary liczone są z aktualnych tagów pliku
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+    if action == "pre_clear" and reverse:
+        audio_file_ids = instance.audio_files.values_list("pk", flat=True)
+        changed_tags = {
+            audio_file_id: {instance.pk} for audio_file_id in audio_file_ids
+        }
+    elif action == "pre_clear":
+        changed_tags = {instance.pk: None}
+    elif reverse:
+        changed_tags = {audio_file_id: {instance.pk} for audio_file_id in pk_set}
+    else:
+        changed_tags = {instance.pk: pk_set}
+    adjust_tag_pairs(changed_tags, 1 if action == "post_add" else -1)
+
+
+@receiver(pre_delete, sender=AudioFile)
+def remove_tag_pairs_before_audio_delete(sender, instance, **kwargs):
+    # Powiązania znikają kaskadowo, bez sygnału m2m_changed
+    adjust_tag_pairs({instance.pk: None}, -1)
+
+
+# --- OŚ CZASU OBSERWUJĄCYCH (fan-out przy zapisie) ---
+@receiver(post_save, sender=AudioFile)
+def fan_out_uploaded_audio_file(sender, instance, created, **kwargs):
+    if not created or not instance.is_public or instance.user_id is None:
+        return
+    if is_pulled_uploader(instance.user_id):
+        return  # Popularny uploader: obserwujący pobierają jego pliki przy odczycie
+    # Po commicie: obserwujący nie zobaczą pliku z wycofanego uploadu
+    transaction.on_commit(
+        lambda: fan_out_audio_file(instance.pk, instance.user_id, instance.uploaded_at)
+    )
+
+
+# --- STATYSTYKI UŻYTKOWNIKA (UserAudioStats) ---
+@receiver(post_save, sender=AudioFile)
+def count_uploaded_audio_file(sender, instance, created, **kwargs):
+    if created:
+        adjust_user_audio_stats(
+            instance.user_id, file_count=1, total_bytes=instance.file_size
+        )
+
+
+@receiver(pre_delete, sender=AudioFile)
+def remember_likes_before_audio_delete(sender, instance, origin, **kwargs):
+    # Głosy usuwane razem z plikiem pomijają uncount_like - liczymy je raz
+    if _deleted_with_audio_file(instance.pk, origin):
+        instance._likes_before_delete = Like.objects.filter(
+            audio_file=instance, is_liked=True
+        ).count()
+
+
+@receiver(post_delete, sender=AudioFile)
+def uncount_deleted_audio_file(sender, instance, **kwargs):
+    # Przy usuwaniu od strony użytkownika polubienia zmniejszają total_likes
+    # własnym sygnałem
+    adjust_user_audio_stats(
+        instance.user_id,
+        file_count=-1,
+        total_bytes=-instance.file_size,
+        total_views=-instance.views,
+        total_likes=-getattr(instance, "_likes_before_delete", 0),
+    )
+
+
+def _audio_file_owner(audio_file_id):
+    return (
+        AudioFile.objects.filter(pk=audio_file_id)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+
+
+@receiver(pre_save, sender=Like)
+def remember_vote_before_save(sender, instance, update_fields, **kwargs):
+    if instance._state.adding or (
+        update_fields is not None and "is_liked" not in update_fields
+    ):
+        return
+    instance._is_liked_before_save = (
+        Like.objects.filter(pk=instance.pk).values_list("is_liked", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance, created, **kwargs):
+    # Zmiany głosów przez API (votes.py) aktualizują statystyki i kolejkę
+    # VoteChange same; tu zapisy przez ORM, np. zmiana głosu w panelu admina
+    was_liked = instance.__dict__.pop("_is_liked_before_save", None)
+    if created:
+        likes_delta = 1 if instance.is_liked else 0
+    elif was_liked is not None and was_liked != instance.is_liked:
+        likes_delta = 1 if instance.is_liked else -1
+        record_vote_change(
+            instance.audio_file_id, was_liked, instance.is_liked, instance.created_at
+        )
+    else:
+        return
+    if likes_delta:
+        adjust_user_audio_stats(
+            _audio_file_owner(instance.audio_file_id), total_likes=likes_delta
+        )
+
+
+@receiver(post_delete, sender=Like)
+def record_deleted_vote(sender, instance, origin, **kwargs):
+    # Wycofania przez API (votes.py) zapisuje retract_vote; głosy usuniętego
+    # pliku nie mają już czego poprawiać
+    if _deleted_with_audio_file(instance.audio_file_id, origin):
+        return
+    record_vote_change(
+        instance.audio_file_id, instance.is_liked, None, instance.created_at
+    )
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like(sender, instance, origin, **kwargs):
+    if _deleted_with_audio_file(instance.audio_file_id, origin):
+        return  # Liczy remember_likes_before_audio_delete
+    if instance.is_liked:
+        adjust_user_audio_stats(
+            _audio_file_owner(instance.audio_file_id), total_likes=-1
+        )
+
+
+@receiver(post_save, sender=Follow)
+def count_follower(sender, instance, created, **kwargs):
+    if created:
+        adjust_user_audio_stats(instance.followee_id, follower_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follower(sender, instance, origin, **kwargs):
+    # Obejmuje też obserwacje usuwane kaskadowo z kontem obserwującego; przy
+    # usuwaniu konta obserwowanego jego statystyki i tak znikają
+    if isinstance(origin, User) and origin.pk == instance.followee_id:
+        return
+    adjust_user_audio_stats(instance.followee_id, follower_count=-1)
@@ -0,0 +1,15 @@
+# audio/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class LikedAudioCursorPagination(CursorPagination):
+    # Kursor po dacie polubienia (Like.created_at) - indeks
+    # (user_id, is_liked, created_at) obsługuje filtr i sortowanie
+    page_size = 20
+    ordering = "-liked_at"
+
+
+class UploadedAudioCursorPagination(CursorPagination):
+    # Indeks (user_id, uploaded_at) obsługuje filtr i sortowanie
+    page_size = 20
+    ordering = "-uploaded_at"
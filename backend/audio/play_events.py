@@ -0,0 +1,223 @@
+# audio/play_events.py
+"""
+Ingestion of playback events (start / progress / complete, sent by the
+client) and of detail views (recorded by the server).
+
+Requests only append validated events to an in-process buffer. A batch
+is written when the buffer reaches `AUDIO_PLAY_EVENT_BUFFER_SIZE` events or
+its oldest event is `AUDIO_PLAY_EVENT_FLUSH_SECONDS` old - checked on every
+`add()` and by a timer, so a quiet process does not hold events back - in
+a background thread, with a single COPY into the day-partitioned
+`audio_playevent` table; the request path never inserts rows. Whatever is
+left in the buffer is written at process exit.
+
+A batch creates the partitions of its days when they are missing (under an
+advisory lock, so workers do not race on the catalog) and a failed batch is
+retried once. `manage.py play_event_partitions --ahead <days>` should still
+run on a schedule (e.g. daily from cron), so that the partitions exist
+before the first events of a day arrive.
+"""
+import atexit
+import csv
+import io
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+from .models import PlayEvent
+
+_TABLE = PlayEvent._meta.db_table
+_COLUMNS = (
+    "audio_file_id",
+    "user_id",
+    "session_id",
+    "listener",
+    "event_type",
+    "position",
+    "occurred_at",
+)
+
+
+# Klucz blokady doradczej (pg_advisory_xact_lock) zakładania partycji
+PARTITION_LOCK_ID = 7_305_141_002
+
+
+def partition_name(day):
+    return f"{_TABLE}_p{day:%Y%m%d}"
+
+
+_known_partitions = set()
+
+
+def ensure_partitions(days):
+    """Creates the daily partitions for `days` (dates, UTC) if missing."""
+    missing = [day for day in days if day not in _known_partitions]
+    if not missing:
+        return
+    # Workery zapisujące po północy UTC zakładałyby tę samą partycję naraz;
+    # blokada trwa do końca transakcji, więc drugi widzi już gotową tabelę
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [PARTITION_LOCK_ID])
+        for day in missing:
+            start = datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(day)} "
+                f"PARTITION OF {_TABLE} FOR VALUES FROM (%s) TO (%s)",
+                [start, start + timedelta(days=1)],
+            )
+    # Dopiero po commicie: wycofana transakcja cofa też CREATE TABLE
+    transaction.on_commit(lambda: _known_partitions.update(missing))
+
+
+def drop_partitions_before(day):
+    """Drops the daily partitions older than `day`. Returns their names."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s",
+            [_TABLE],
+        )
+        names = sorted(
+            name for (name,) in cursor.fetchall() if name < partition_name(day)
+        )
+        for name in names:
+            cursor.execute(f"DROP TABLE {name}")
+    _known_partitions.clear()
+    return names
+
+
+def write_play_events(events):
+    """
+    Writes `events` (dicts with the `_COLUMNS` keys) with one COPY, creating
+    the partitions of their days first.
+    """
+    if not events:
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for event in events:
+        writer.writerow(
+            "" if event[column] is None else event[column] for column in _COLUMNS
+        )
+    buffer.seek(0)
+
+    with transaction.atomic():
+        ensure_partitions(
+            {
+                event["occurred_at"].astimezone(dt_timezone.utc).date()
+                for event in events
+            }
+        )
+        with connection.cursor() as cursor:
+            # Pusta wartość CSV bez cudzysłowów to NULL
+            cursor.cursor.copy_expert(
+                f"COPY {_TABLE} ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+
+class PlayEventBuffer:
+    """Thread-safe in-process buffer of events, flushed in batches."""
+
+    def __init__(self):
+        self._events = []
+        self._oldest = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._events)
+
+    def add(self, events):
+        with self._lock:
+            if not self._events:
+                self._oldest = time.monotonic()
+            self._events.extend(events)
+            due = (
+                len(self._events) >= settings.AUDIO_PLAY_EVENT_BUFFER_SIZE
+                or self._age() >= settings.AUDIO_PLAY_EVENT_FLUSH_SECONDS
+            )
+            batch = self._take() if due else None
+            if self._events:
+                self._schedule(settings.AUDIO_PLAY_EVENT_FLUSH_SECONDS - self._age())
+        if batch:
+            threading.Thread(
+                target=self._write_in_background, args=(batch,), daemon=True
+            ).start()
+
+    def flush(self):
+        """Writes the buffered events synchronously (exit, tests)."""
+        with self._lock:
+            batch = self._take()
+        write_play_events(batch)
+
+    def clear(self):
+        """Drops the buffered events (tests)."""
+        with self._lock:
+            self._take()
+
+    def _age(self):
+        return time.monotonic() - self._oldest
+
+    def _schedule(self, delay):
+        # Jeden timer naraz; bez nowych zdarzeń to on zapisuje bufor w terminie
+        if self._timer is None:
+            self._timer = threading.Timer(max(delay, 0), self._flush_when_due)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_when_due(self):
+        with self._lock:
+            self._timer = None
+            if not self._events:
+                return
+            remaining = settings.AUDIO_PLAY_EVENT_FLUSH_SECONDS - self._age()
+            if remaining > 0:
+                # Bufor opróżniono i zapełniono od nowa po uruchomieniu timera
+                self._schedule(remaining)
+                return
+            batch = self._take()
+        self._write_in_background(batch)
+
+    def _take(self):
+        batch, self._events = self._events, []
+        return batch
+
+    def _write_in_background(self, batch):
+        try:
+            try:
+                write_play_events(batch)
+                return
+            except Exception as e:
+                print(
+                    f"AUDIO_PLAY_EVENTS_WARNING: Could not write {len(batch)} events, "
+                    f"retrying: {e}"
+                )
+            # Nowe połączenie na wypadek zerwanego (np. restart bazy)
+            connections.close_all()
+            try:
+                write_play_events(batch)
+            except Exception as e:
+                print(
+                    f"AUDIO_PLAY_EVENTS_ERROR: Could not write {len(batch)} events: {e}"
+                )
+        finally:
+            connections.close_all()  # Połączenia tego wątku nie wrócą do puli
+
+
+play_event_buffer = PlayEventBuffer()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        play_event_buffer.flush()
+    except Exception as e:
+        print(f"AUDIO_PLAY_EVENTS_ERROR: Could not flush events at exit: {e}")
@@ -0,0 +1,171 @@
+# audio/recommendations.py
+"""
+Item-to-item recommendations ("more like this") from positive votes.
+
+`build_similar_audio` is an offline job (`manage.py build_similar_audio`).
+It loads the likes as a sparse user x audio matrix (two index arrays sorted
+by user and by audio file) and computes the co-occurrence of every pair of
+files that share a listener, chunk by chunk: a chunk is a range of files
+whose expanded (file, user, file) pairs fit into `max_pairs`, so memory
+stays bounded no matter how many likes there are. Each chunk yields the
+complete neighbour lists of its files, scored by cosine or Jaccard
+similarity and cut to the top `k`.
+
+The lists are stored in `SimilarAudio` and read by the similar endpoint
+with one indexed query; files without neighbours fall back to tag overlap.
+"""
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .cache import SIMILAR_SCOPE, bump_generations
+from .models import AudioFile, Like, SimilarAudio
+
+METRICS = ("cosine", "jaccard")
+
+
+def _expand(starts, lengths):
+    # Indeksy start..start+length-1 dla każdej pary (start, length), bez pętli
+    total = int(lengths.sum())
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.arange(total) - offsets + np.repeat(starts, lengths)
+
+
+def _chunks(cost, max_pairs):
+    # Zakresy plików o łącznym koszcie <= max_pairs (co najmniej jeden plik)
+    start, total = 0, 0
+    for index, item_cost in enumerate(cost):
+        if index > start and total + item_cost > max_pairs:
+            yield start, index
+            start, total = index, 0
+        total += item_cost
+    if start < len(cost):
+        yield start, len(cost)
+
+
+def similar_pairs(likes, k, metric="cosine", max_pairs=2_000_000):
+    """
+    Yields (audio_file_id, similar_id, score) for the top `k` neighbours of
+    every liked audio file. `likes` is an iterable of (user_id, audio_file_id)
+    pairs of positive votes.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    pairs = np.fromiter(chain.from_iterable(likes), dtype=np.int64).reshape(-1, 2)
+    if not len(pairs):
+        return
+
+    _, users = np.unique(pairs[:, 0], return_inverse=True)
+    audio_file_ids, items = np.unique(pairs[:, 1], return_inverse=True)
+    item_count = len(audio_file_ids)
+
+    # Macierz rzadka w dwóch układach: pliki użytkownika i użytkownicy pliku
+    by_user = np.argsort(users, kind="stable")
+    user_items = items[by_user]
+    user_degree = np.bincount(users)
+    user_starts = np.cumsum(user_degree) - user_degree
+
+    by_item = np.argsort(items, kind="stable")
+    item_likes, item_users = items[by_item], users[by_item]
+    item_degree = np.bincount(items, minlength=item_count)
+    item_bounds = np.r_[0, np.cumsum(item_degree)]
+
+    # Liczba par (plik, użytkownik, inny plik) generowanych dla każdego pliku
+    cost = np.bincount(items, weights=user_degree[users], minlength=item_count)
+
+    for first, last in _chunks(cost, max_pairs):
+        chunk = slice(item_bounds[first], item_bounds[last])
+        sources, listeners = item_likes[chunk], item_users[chunk]
+
+        lengths = user_degree[listeners]
+        neighbours = user_items[_expand(user_starts[listeners], lengths)]
+        sources = np.repeat(sources, lengths)
+        different = sources != neighbours
+        keys = (sources[different] - first) * item_count + neighbours[different]
+
+        keys, common = np.unique(keys, return_counts=True)
+        sources, neighbours = keys // item_count + first, keys % item_count
+        source_degree = item_degree[sources]
+        neighbour_degree = item_degree[neighbours]
+        if metric == "cosine":
+            scores = common / np.sqrt(source_degree * neighbour_degree)
+        else:
+            scores = common / (source_degree + neighbour_degree - common)
+
+        # Sortowanie po pliku, potem malejąco po wyniku; rank w obrębie pliku
+        order = np.lexsort((-scores, sources))
+        sources, neighbours, scores = sources[order], neighbours[order], scores[order]
+        group_starts = np.flatnonzero(np.r_[True, sources[1:] != sources[:-1]])
+        group_lengths = np.diff(np.r_[group_starts, len(sources)])
+        rank = np.arange(len(sources)) - np.repeat(group_starts, group_lengths)
+        top = rank < k
+
+        yield from zip(
+            audio_file_ids[sources[top]].tolist(),
+            audio_file_ids[neighbours[top]].tolist(),
+            scores[top].tolist(),
+        )
+
+
+def build_similar_audio(k=None, metric=None, max_pairs=None):
+    """
+    Replaces the neighbour lists in `SimilarAudio` with ones computed from
+    the current likes. Returns the number of stored rows.
+    """
+    k = k or settings.AUDIO_SIMILAR_NEIGHBORS
+    metric = metric or settings.AUDIO_SIMILAR_METRIC
+    max_pairs = max_pairs or settings.AUDIO_SIMILAR_MAX_PAIRS
+
+    likes = Like.objects.filter(is_liked=True).values_list("user_id", "audio_file_id")
+    stored = 0
+    with transaction.atomic():
+        # Czytelnicy widzą poprzednie listy aż do commitu
+        SimilarAudio.objects.all().delete()
+        batch = []
+        for audio_file_id, similar_id, score in similar_pairs(
+            likes.iterator(chunk_size=10000), k, metric, max_pairs
+        ):
+            batch.append(
+                SimilarAudio(
+                    audio_file_id=audio_file_id, similar_id=similar_id, score=score
+                )
+            )
+            if len(batch) >= 5000:
+                SimilarAudio.objects.bulk_create(batch)
+                stored += len(batch)
+                batch = []
+        SimilarAudio.objects.bulk_create(batch)
+        stored += len(batch)
+        transaction.on_commit(lambda: bump_generations([SIMILAR_SCOPE]))
+    return stored
+
+
+def similar_audio_ids(audio_file_id, limit):
+    """
+    Ids of public files similar to `audio_file_id`, best first, and the
+    source of the list: "likes" (stored neighbours) or "tags" (cold start).
+    """
+    neighbours = list(
+        SimilarAudio.objects.filter(
+            audio_file_id=audio_file_id, similar__is_public=True
+        )
+        .order_by("-score")
+        .values_list("similar_id", flat=True)[:limit]
+    )
+    if neighbours:
+        return neighbours, "likes"
+
+    # Zimny start (brak polubień): pliki z największą liczbą wspólnych tagów
+    file_tags = AudioFile.tags.through.objects.filter(audiofile_id=audio_file_id)
+    tag_ids = file_tags.values("tag_id")
+    by_tags = (
+        AudioFile.objects.filter(is_public=True, tags__in=tag_ids)
+        .exclude(id=audio_file_id)
+        .annotate(shared_tags=Count("tags"))
+        .order_by("-shared_tags", "-uploaded_at")
+        .values_list("id", flat=True)[:limit]
+    )
+    return list(by_tags), "tags"
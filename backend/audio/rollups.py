@@ -0,0 +1,315 @@
+# audio/rollups.py
+"""
+Daily rollups: per-file, per-day counters (`AudioDailyStats`, UTC days)
+maintained incrementally by a periodic job (`manage.py update_rollups`).
+
+Each run reads only what is new since the previous one:
+
+* votes created after the stored time watermark; the watermark stays a few
+  seconds behind "now", because the newest votes may belong to transactions
+  that have not committed yet,
+* playback and view events with an id above the stored id watermark, up to
+  the highest id that is already committed (`_committed_event_id`, a short
+  lock that waits for the running COPY batches). Their listeners are added
+  to the day's unique-listener sketch (`audio.hll`).
+
+The same deltas are added to the trending scores, so rollups and trending
+come from one read. A vote counts on the day it was cast. Flipping or
+withdrawing a vote queues a `VoteChange`; changes of votes that an earlier
+run has already counted correct that vote's day and its trending weight,
+the rest are dropped, because the vote is then read in its current state.
+Runs are serialized by an advisory lock and read votes and changes from one
+REPEATABLE READ snapshot, so no change is applied twice or missed.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import hll
+from .cache import TRENDING_SCOPE, bump_generations
+from .models import (
+    AudioDailyStats,
+    AudioFile,
+    JobWatermark,
+    Like,
+    PlayEvent,
+    VoteChange,
+)
+from .trending import add_to_trending_scores, add_trending_event, decay_rate
+
+WATERMARK_NAME = "rollups"
+# Klucz blokady doradczej (pg_advisory_lock) jednego joba naraz
+JOB_LOCK_ID = 7_305_141_001
+COUNTERS = ("views", "plays", "completes", "likes", "dislikes")
+_EVENT_COUNTERS = {
+    PlayEvent.VIEW: "views",
+    PlayEvent.START: "plays",
+    PlayEvent.COMPLETE: "completes",
+}
+_LISTENER_EVENTS = (PlayEvent.VIEW, PlayEvent.START)
+
+_UPSERT_DAILY_STATS_SQL = f"""
+    INSERT INTO {AudioDailyStats._meta.db_table} AS stats
+        (audio_file_id, day, {", ".join(COUNTERS)})
+    SELECT * FROM unnest(
+        %s::bigint[], %s::date[], {", ".join(["%s::integer[]"] * len(COUNTERS))}
+    )
+    ON CONFLICT (audio_file_id, day) DO UPDATE SET
+        {", ".join(f"{name} = stats.{name} + EXCLUDED.{name}" for name in COUNTERS)}
+"""
+
+# Poprawki zmienionych głosów (ujemne delty) trafiają w dzień, który już ma
+# wiersz, a INSERT z ujemną wartością złamałby ograniczenie CHECK
+_CORRECT_DAILY_STATS_SQL = f"""
+    UPDATE {AudioDailyStats._meta.db_table} AS stats
+    SET {", ".join(
+        f"{name} = GREATEST(stats.{name} + changed.{name}, 0)" for name in COUNTERS
+    )}
+    FROM unnest(
+        %s::bigint[], %s::date[], {", ".join(["%s::integer[]"] * len(COUNTERS))}
+    ) AS changed (audio_file_id, day, {", ".join(COUNTERS)})
+    WHERE stats.audio_file_id = changed.audio_file_id AND stats.day = changed.day
+"""
+
+_CONSUME_VOTE_CHANGES_SQL = f"""
+    DELETE FROM {VoteChange._meta.db_table}
+    RETURNING audio_file_id, likes, dislikes, cast_at
+"""
+
+_SELECT_SKETCHES_SQL = f"""
+    SELECT stats.audio_file_id, stats.day, stats.listeners
+    FROM {AudioDailyStats._meta.db_table} AS stats
+    JOIN unnest(%s::bigint[], %s::date[]) AS changed (audio_file_id, day)
+        USING (audio_file_id, day)
+"""
+
+_UPDATE_SKETCHES_SQL = f"""
+    UPDATE {AudioDailyStats._meta.db_table} AS stats
+    SET listeners = changed.listeners
+    FROM unnest(%s::bigint[], %s::date[], %s::bytea[])
+        AS changed (audio_file_id, day, listeners)
+    WHERE stats.audio_file_id = changed.audio_file_id AND stats.day = changed.day
+"""
+
+
+def _day(moment):
+    return moment.astimezone(dt_timezone.utc).date()
+
+
+def _execute_for_counts(sql, counts):
+    if not counts:
+        return
+    audio_file_ids, days = zip(*counts)
+    columns = [[row[name] for row in counts.values()] for name in COUNTERS]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [list(audio_file_ids), list(days), *columns])
+
+
+def _upsert_daily_stats(counts):
+    corrections = {key: row for key, row in counts.items() if min(row.values()) < 0}
+    _execute_for_counts(_CORRECT_DAILY_STATS_SQL, corrections)
+    _execute_for_counts(
+        _UPSERT_DAILY_STATS_SQL,
+        {key: row for key, row in counts.items() if key not in corrections},
+    )
+
+
+def _add_listeners(listeners):
+    # Szkice czyta i zapisuje tylko ten job (blokada znacznika), więc
+    # scalanie w Pythonie nie gubi równoległych zmian
+    if not listeners:
+        return
+    audio_file_ids, days = (list(column) for column in zip(*listeners))
+    with connection.cursor() as cursor:
+        cursor.execute(_SELECT_SKETCHES_SQL, [audio_file_ids, days])
+        stored = {
+            (audio_file_id, day): blob for audio_file_id, day, blob in cursor.fetchall()
+        }
+        sketches = [
+            hll.add_to_sketch(hll.merge([stored.get(key)]), hashes).tobytes()
+            for key, hashes in listeners.items()
+        ]
+        cursor.execute(_UPDATE_SKETCHES_SQL, [audio_file_ids, days, sketches])
+
+
+def _committed_event_id():
+    # Zapis COPY trzyma blokadę ROW EXCLUSIVE od pobrania id do commita, więc
+    # po uzyskaniu SHARE wszystkie zdarzenia o id <= max(id) są zatwierdzone.
+    # Blokada trwa tylko jedno zapytanie - agregacja już nie wstrzymuje zapisów
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {PlayEvent._meta.db_table} IN SHARE MODE")
+        return PlayEvent.objects.aggregate(last_id=Max("id"))["last_id"]
+
+
+@contextmanager
+def _job_lock():
+    # Blokada sesji, brana przed transakcją: drugi job czeka na koniec
+    # pierwszego, zamiast trafić na błąd serializacji REPEATABLE READ
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [JOB_LOCK_ID])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [JOB_LOCK_ID])
+
+
+def update_rollups(now=None):
+    """
+    Adds the votes, the vote changes and the playback and view events since
+    the previous run to the daily stats and the trending scores. The first
+    run also rolls up all past votes and events. Returns the number of
+    updated (file, day) rows.
+    """
+    now = now or timezone.now()
+    until = now - timedelta(seconds=settings.AUDIO_TRENDING_SETTLE_SECONDS)
+    rate = decay_rate()
+    like_weight = settings.AUDIO_TRENDING_LIKE_WEIGHT
+    counts = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    listeners = defaultdict(list)
+    increments = {}
+    removals = {}
+
+    with _job_lock():
+        last_id = _committed_event_id()
+        # W testach transakcja jest już otwarta i poziomu nie da się zmienić
+        repeatable_read = not connection.in_atomic_block
+        with transaction.atomic():
+            if repeatable_read:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            watermark, _ = JobWatermark.objects.select_for_update().get_or_create(
+                name=WATERMARK_NAME
+            )
+            counted_until = watermark.processed_until
+
+            # Równoległy job mógł już przesunąć znacznik za last_id - wtedy
+            # zakres jest pusty
+            new_events = PlayEvent.objects.filter(
+                id__gt=watermark.processed_id, id__lte=last_id or 0
+            )
+            weights = {
+                PlayEvent.VIEW: settings.AUDIO_TRENDING_VIEW_WEIGHT,
+                PlayEvent.START: settings.AUDIO_TRENDING_PLAY_WEIGHT,
+            }
+            for audio_file_id, event_type, listener, occurred_at in (
+                new_events.filter(event_type__in=list(_EVENT_COUNTERS))
+                .values_list("audio_file_id", "event_type", "listener", "occurred_at")
+                .iterator(chunk_size=10000)
+            ):
+                key = (audio_file_id, _day(occurred_at))
+                counts[key][_EVENT_COUNTERS[event_type]] += 1
+                if event_type in _LISTENER_EVENTS:
+                    if listener is not None:
+                        listeners[key].append(listener)
+                    add_trending_event(
+                        increments,
+                        audio_file_id,
+                        weights[event_type],
+                        occurred_at,
+                        rate,
+                    )
+
+            if counted_until is None or until > counted_until:
+                new_votes = Like.objects.filter(created_at__lte=until)
+                if counted_until is not None:
+                    new_votes = new_votes.filter(created_at__gt=counted_until)
+                for audio_file_id, is_liked, created_at in new_votes.values_list(
+                    "audio_file_id", "is_liked", "created_at"
+                ).iterator(chunk_size=10000):
+                    counts[(audio_file_id, _day(created_at))][
+                        "likes" if is_liked else "dislikes"
+                    ] += 1
+                    if is_liked:
+                        add_trending_event(
+                            increments, audio_file_id, like_weight, created_at, rate
+                        )
+                watermark.processed_until = until
+
+            # Zmiany głosów jeszcze nie policzonych są już w ich obecnym stanie
+            with connection.cursor() as cursor:
+                cursor.execute(_CONSUME_VOTE_CHANGES_SQL)
+                vote_changes = cursor.fetchall()
+            for audio_file_id, likes, dislikes, cast_at in vote_changes:
+                if counted_until is None or cast_at > counted_until:
+                    continue
+                row = counts[(audio_file_id, _day(cast_at))]
+                row["likes"] += likes
+                row["dislikes"] += dislikes
+                if likes:
+                    add_trending_event(
+                        increments if likes > 0 else removals,
+                        audio_file_id,
+                        like_weight,
+                        cast_at,
+                        rate,
+                    )
+
+            # Zdarzenia nie mają kluczy obcych: pomijamy pliki już usunięte
+            existing = set(
+                AudioFile.objects.filter(
+                    id__in={audio_file_id for audio_file_id, _ in counts}
+                ).values_list("id", flat=True)
+            )
+            counts = {key: row for key, row in counts.items() if key[0] in existing}
+            _upsert_daily_stats(counts)
+            _add_listeners(
+                {key: hashes for key, hashes in listeners.items() if key[0] in existing}
+            )
+            add_to_trending_scores(
+                {
+                    audio_file_id: increment
+                    for audio_file_id, increment in increments.items()
+                    if audio_file_id in existing
+                },
+                {
+                    audio_file_id: removal
+                    for audio_file_id, removal in removals.items()
+                    if audio_file_id in existing
+                },
+            )
+
+            watermark.processed_id = max(watermark.processed_id, last_id or 0)
+            watermark.save(update_fields=["processed_until", "processed_id"])
+            if counts:
+                transaction.on_commit(lambda: bump_generations([TRENDING_SCOPE]))
+    return len(counts)
+
+
+def daily_stats(audio_file_id, first_day, last_day):
+    """
+    Counters of `audio_file_id` for every day from `first_day` to `last_day`
+    (inclusive), oldest first, with days without activity as zeros, and the
+    totals of the range. Unique listeners are estimated per day and, for the
+    totals, from the union of the day sketches - not the sum of the days.
+    """
+    rows = {
+        row["day"]: row
+        for row in AudioDailyStats.objects.filter(
+            audio_file_id=audio_file_id, day__range=(first_day, last_day)
+        ).values("day", "listeners", *COUNTERS)
+    }
+    days = []
+    for offset in range((last_day - first_day).days + 1):
+        day = first_day + timedelta(days=offset)
+        row = rows.get(day) or {"day": day, "listeners": None}
+        days.append(
+            {
+                "day": day,
+                **{name: row.get(name, 0) for name in COUNTERS},
+                "listeners": hll.estimate(hll.merge([row["listeners"]])),
+            }
+        )
+
+    totals = {name: sum(day[name] for day in days) for name in COUNTERS}
+    totals["listeners"] = hll.estimate(
+        hll.merge(row["listeners"] for row in rows.values())
+    )
+    return days, totals
@@ -0,0 +1,154 @@
+# audio/search.py
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from .models import AudioFile, Tag
+
+
+@contextmanager
+def trigram_thresholds():
+    """
+    Lowers the pg_trgm thresholds for the current transaction only. The
+    `%` and `<%` operators read them from these settings, and only the
+    operators (not the similarity functions) can use the GIN indexes.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SET LOCAL pg_trgm.similarity_threshold = %s;"
+                "SET LOCAL pg_trgm.word_similarity_threshold = %s",
+                [
+                    settings.AUDIO_SEARCH_TAG_SIMILARITY_THRESHOLD,
+                    settings.AUDIO_SEARCH_TITLE_SIMILARITY_THRESHOLD,
+                ],
+            )
+        yield
+
+
+def search_audio_files(query, offset, limit):
+    """
+    Returns the ids of a page of public audio files whose title or tags are
+    similar to `query`, so misspelled titles and tag names still match.
+    Results are ordered by title similarity, newest first on ties.
+    """
+    matching_tag_ids = Tag.objects.filter(name__trigram_similar=query).values("id")
+    queryset = (
+        AudioFile.objects.filter(is_public=True)
+        .filter(Q(title__trigram_word_similar=query) | Q(tags__in=matching_tag_ids))
+        .annotate(similarity=TrigramWordSimilarity(query, "title"))
+        .distinct()
+        .order_by("-similarity", "-uploaded_at")
+        .values_list("id", "similarity", "uploaded_at")
+    )
+    end = offset + limit
+    with trigram_thresholds():
+        return [row[0] for row in queryset[offset:end]]
+
+
+class PopularTagPrefixCache:
+    """
+    Small in-process cache of the most used tags, refreshed periodically.
+    Tags are kept sorted by lowercase name, so a prefix lookup is a binary
+    search instead of a database round-trip.
+    """
+
+    def __init__(self, size, refresh_interval):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self._names = []  # posortowane nazwy (lowercase) do wyszukiwania binarnego
+        self._entries = []  # (nazwa, liczba plików) w tej samej kolejności
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _is_stale(self):
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_interval
+        )
+
+    def refresh(self):
+        popular = (
+            Tag.objects.annotate(audio_count=Count("audio_files"))
+            .filter(audio_count__gt=0)
+            .order_by("-audio_count", "name")
+            .values_list("name", "audio_count")[: self.size]
+        )
+        entries = sorted(popular, key=lambda entry: entry[0].lower())
+        self._names = [name.lower() for name, _ in entries]
+        self._entries = entries
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def match_prefix(self, prefix, limit):
+        """Returns up to `limit` cached tags starting with `prefix`, most used first."""
+        if self._is_stale():
+            # Tylko jeden wątek odświeża cache, pozostałe używają poprzedniej wersji
+            if self._lock.acquire(blocking=self._loaded_at is None):
+                try:
+                    if self._is_stale():
+                        self.refresh()
+                finally:
+                    self._lock.release()
+
+        names, entries = self._names, self._entries
+        prefix = prefix.lower()
+        matches = []
+        index = bisect_left(names, prefix)
+        while index < len(names) and names[index].startswith(prefix):
+            matches.append(entries[index])
+            index += 1
+        matches.sort(key=lambda entry: -entry[1])
+        return [name for name, _ in matches[:limit]]
+
+
+popular_tags = PopularTagPrefixCache(
+    size=settings.AUDIO_AUTOCOMPLETE_CACHE_SIZE,
+    refresh_interval=settings.AUDIO_AUTOCOMPLETE_CACHE_REFRESH_SECONDS,
+)
+
+
+def autocomplete(query, limit):
+    """
+    Returns up to `limit` suggestions for `query`. Popular tags matching the
+    prefix are served from the in-process cache; only when they do not fill
+    the list are similar tags and public titles looked up with pg_trgm.
+    """
+    suggestions = [
+        {"type": "tag", "value": name}
+        for name in popular_tags.match_prefix(query, limit)
+    ]
+    if len(suggestions) >= limit:
+        return suggestions
+
+    seen_tags = {suggestion["value"] for suggestion in suggestions}
+    with trigram_thresholds():
+        similar_tags = (
+            Tag.objects.filter(name__trigram_similar=query)
+            .exclude(name__in=seen_tags)
+            .annotate(similarity=TrigramSimilarity("name", query))
+            .order_by("-similarity", "name")
+            .values_list("name", flat=True)[: limit - len(suggestions)]
+        )
+        suggestions.extend({"type": "tag", "value": name} for name in similar_tags)
+        if len(suggestions) >= limit:
+            return suggestions
+
+        similar_titles = (
+            AudioFile.objects.filter(is_public=True, title__trigram_word_similar=query)
+            .annotate(similarity=TrigramWordSimilarity(query, "title"))
+            .order_by("-similarity", "-uploaded_at")
+            .values_list("title", flat=True)[: limit - len(suggestions)]
+        )
+        suggestions.extend(
+            {"type": "title", "value": title} for title in similar_titles
+        )
+    return suggestions
@@ -1,11 +1,13 @@
 # audio/serializers.py
 
+from datetime import timedelta
 from urllib.parse import urljoin
 
 from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import AudioFile, Like, Tag
+from .models import AudioFile, Like, PlayEvent, Tag
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -16,6 +18,9 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "audio_count"]
 
     def get_audio_count(self, obj):
+        audio_counts = self.context.get("audio_counts")
+        if audio_counts is not None:
+            return audio_counts.get(obj.pk, 0)
         return obj.audio_files.count()
 
 
@@ -68,7 +73,6 @@ class AudioFileSerializer(serializers.ModelSerializer):
         rep = super().to_representation(instance)
         rep["file"] = urljoin(settings.AUDIO_FILE_BASE_URL + "/", instance.file.name)
         rep["tags"] = [tag.name for tag in instance.tags.all()]
-        rep["uuid"] = str(instance.uuid)
         return rep
 
 
@@ -76,4 +80,23 @@ class LikeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Like
         fields = ["id", "audio_file", "is_liked", "created_at"]
-        read_only_fields = ["id", "created_at"]
\ No newline at end of file
+        read_only_fields = ["id", "created_at"]
+
+
+class PlayEventSerializer(serializers.Serializer):
+    # Wyświetlenia zapisuje serwer, klient ich nie zgłasza
+    type = serializers.ChoiceField(
+        choices=[PlayEvent.START, PlayEvent.PROGRESS, PlayEvent.COMPLETE]
+    )
+    position = serializers.FloatField(min_value=0, default=0)
+    occurred_at = serializers.DateTimeField(required=False)
+    session_id = serializers.UUIDField(required=False)
+
+    def validate_occurred_at(self, value):
+        # Paczki z klienta bywają opóźnione, ale nie za stare ani z przyszłości
+        now = timezone.now()
+        if value > now:
+            return now
+        if value < now - timedelta(hours=settings.AUDIO_PLAY_EVENT_MAX_AGE_HOURS):
+            raise serializers.ValidationError("Event is too old.")
+        return value
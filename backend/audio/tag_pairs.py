@@ -0,0 +1,119 @@
+# audio/tag_pairs.py
+"""
+Related tags from the tag co-occurrence table (`TagPair`).
+
+The counts are maintained on every tag link/unlink (see `adjust_tag_pairs`),
+so a suggestion is a read of one tag's row range instead of a self-join of
+the whole tag M2M table. Candidates are ranked by normalized PMI:
+
+    npmi(a, b) = log(p(a, b) / (p(a) * p(b))) / -log(p(a, b))
+
+with probabilities over all audio files. It is 1 for tags that always occur
+together, 0 for independent ones and below 0 for tags that avoid each other.
+"""
+import math
+from collections import Counter
+from itertools import combinations_with_replacement
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery
+
+from .models import AudioFile, TagPair
+
+
+def npmi(pair_count, tag_count, related_count, total):
+    if pair_count >= total:
+        return 1.0  # Oba tagi na każdym pliku
+    pmi = math.log(pair_count * total / (tag_count * related_count))
+    return pmi / -math.log(pair_count / total)
+
+
+def related_tags(tag, limit):
+    """
+    Up to `limit` tags most associated with `tag`, best first, as dicts with
+    the name, the number of shared files and the score. Only the
+    `AUDIO_RELATED_TAGS_CANDIDATES` most frequent co-occurring tags (read from
+    the (tag, -count) index) are scored.
+    """
+    tag_count = (
+        TagPair.objects.filter(tag=tag, related=tag)
+        .values_list("count", flat=True)
+        .first()
+    )
+    if not tag_count:
+        return []
+    total = AudioFile.objects.count()
+
+    related_count = TagPair.objects.filter(
+        tag=OuterRef("related"), related=OuterRef("related")
+    ).values("count")
+    candidates = (
+        TagPair.objects.filter(
+            tag=tag, count__gte=settings.AUDIO_RELATED_TAGS_MIN_COUNT
+        )
+        .exclude(related=tag)
+        .order_by("-count")
+        .values("count", name=F("related__name"), related_count=Subquery(related_count))
+    )[: settings.AUDIO_RELATED_TAGS_CANDIDATES]
+
+    results = [
+        {
+            "name": row["name"],
+            "count": row["count"],
+            "score": round(
+                npmi(row["count"], tag_count, row["related_count"], total), 4
+            ),
+        }
+        for row in candidates
+    ]
+    results.sort(key=lambda row: (-row["score"], -row["count"], row["name"]))
+    return results[:limit]
+
+
+def _file_tag_groups(links):
+    # Kolejne wiersze (audiofile_id, tag_id) posortowane po pliku -> tagi pliku
+    current_file, tags = None, []
+    for audio_file_id, tag_id in links:
+        if audio_file_id != current_file:
+            if tags:
+                yield tags
+            current_file, tags = audio_file_id, []
+        tags.append(tag_id)
+    if tags:
+        yield tags
+
+
+def rebuild_tag_pairs(chunk_size=10000):
+    """
+    Recomputes `TagPair` from the tag M2M table, streamed in chunks of
+    `chunk_size` rows (server-side cursor) in file order. Memory is bounded
+    by the number of distinct tag pairs, not by the number of links.
+    Returns the number of stored pairs.
+    """
+    links = (
+        AudioFile.tags.through.objects.order_by("audiofile_id", "tag_id")
+        .values_list("audiofile_id", "tag_id")
+        .iterator(chunk_size=chunk_size)
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Równoległe zmiany tagów czekają na koniec przebudowy (ich przyrosty
+        # trafią już do nowej tabeli), zamiast zginąć przy jej podmianie
+        cursor.execute(f"LOCK TABLE {TagPair._meta.db_table} IN EXCLUSIVE MODE")
+
+        counts = Counter()
+        for tags in _file_tag_groups(links):
+            for tag_id, other_id in combinations_with_replacement(tags, 2):
+                counts[(tag_id, other_id)] += 1
+                if tag_id != other_id:
+                    counts[(other_id, tag_id)] += 1
+
+        TagPair.objects.all().delete()
+        TagPair.objects.bulk_create(
+            [
+                TagPair(tag_id=tag_id, related_id=related_id, count=count)
+                for (tag_id, related_id), count in counts.items()
+            ],
+            batch_size=5000,
+        )
+    return len(counts)
@@ -1,13 +1,64 @@
+import threading
+import time
 import uuid
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
-from .models import AudioFile, Like, Tag
+from project.renderers import ORJSONRenderer
+
+from . import hll
+from .cache import (
+    FEED_SCOPE,
+    _local_locks,
+    get_generations,
+    get_or_refresh,
+    response_cache_lookup,
+    response_cache_stats,
+    tag_scope,
+)
+from .feed import feed_rows
+from .models import (
+    AudioDailyStats,
+    AudioFile,
+    Like,
+    PlayEvent,
+    Tag,
+    TagPair,
+    TimelineEntry,
+    TrendingScore,
+    UserAudioStats,
+    VoteChange,
+)
+from .play_events import (
+    PlayEventBuffer,
+    partition_name,
+    play_event_buffer,
+    write_play_events,
+)
+from .recommendations import build_similar_audio, similar_pairs
+from .rollups import update_rollups
+from .search import popular_tags
+from .serializers import AudioFileSerializer
+from .tag_pairs import rebuild_tag_pairs
+from .timeline import trim_timelines
+from .trending import current_score
 
 User = get_user_model()
 
@@ -88,8 +139,15 @@ class AudioAPITestCase(APITestCase):
         cls.audio_by_tag_url = reverse(
             "audio:audio-by-tag", kwargs={"tag_name": "rock"}
         )
+        cls.play_events_url = reverse(
+            "audio:audio-play-events", kwargs={"uuid": cls.public_audio.uuid}
+        )
 
     def setUp(self):
+        cache.clear()  # Cache (LocMem) nie jest wycofywany razem z transakcją testu
+        play_event_buffer.clear()  # Wyświetlenia z poprzednich testów
+        # Niezapisane zdarzenia nie trafią też do bazy z timera po teście
+        self.addCleanup(play_event_buffer.clear)
         self.client.force_authenticate(user=self.user_one)
         self.audio_file.seek(0)
         self.invalid_file.seek(0)
@@ -164,6 +222,61 @@ class AudioAPITestCase(APITestCase):
         response = self.client.post(like_url, data={"is_liked": True}, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_vote_returns_fresh_totals(self, mock_boto_client):
+        like_url = reverse(
+            "audio:audio-like", kwargs={"uuid": self.other_user_audio.uuid}
+        )
+        response = self.client.post(like_url, data={"is_liked": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["is_liked"], True)
+        self.assertEqual(response.data["audio_file"], self.other_user_audio.pk)
+        # Wcześniejsze niepolubienie user_one zamienione na polubienie
+        self.assertEqual((response.data["likes"], response.data["dislikes"]), (1, 0))
+
+        # Podwójne kliknięcie nie tworzy drugiego głosu
+        response = self.client.post(like_url, data={"is_liked": True}, format="json")
+        self.assertEqual((response.data["likes"], response.data["dislikes"]), (1, 0))
+        self.assertEqual(
+            Like.objects.filter(
+                user=self.user_one, audio_file=self.other_user_audio
+            ).count(),
+            1,
+        )
+
+        self.client.force_authenticate(user=self.user_two)
+        response = self.client.post(like_url, data={"is_liked": False}, format="json")
+        self.assertEqual((response.data["likes"], response.data["dislikes"]), (1, 1))
+
+    def test_retract_vote(self, mock_boto_client):
+        response = self.client.delete(self.like_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"likes": 1, "dislikes": 0})
+        self.assertFalse(
+            Like.objects.filter(user=self.user_one, audio_file=self.public_audio)
+        )
+
+        # Ponowne wycofanie nic nie zmienia
+        response = self.client.delete(self.like_url)
+        self.assertEqual(response.data, {"likes": 1, "dislikes": 0})
+
+        response = self.client.delete(
+            reverse("audio:audio-like", kwargs={"uuid": uuid.uuid4()})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_vote_invalidates_cached_lists(self, mock_boto_client):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.audio_by_tag_url)
+        self.assertEqual(response.data["results"][0]["likes_count"], 2)
+
+        self.client.force_authenticate(user=self.user_one)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.like_url)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.audio_by_tag_url)
+        self.assertEqual(response.data["results"][0]["likes_count"], 1)
+
     def test_get_likes_count(self, mock_boto_client):
         response = self.client.get(self.likes_count_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -172,7 +285,132 @@ class AudioAPITestCase(APITestCase):
     def test_get_user_liked_files(self, mock_boto_client):
         response = self.client.get(self.liked_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_liked_files_paginated_by_like_date(self, mock_boto_client):
+        liked_files = []
+        for index in range(25):
+            audio_file = AudioFile.objects.create(
+                user=self.user_two,
+                title=f"Liked Song {index}",
+                file=self.audio_file,
+                is_public=index != 3,
+            )
+            Like.objects.create(
+                user=self.user_one, audio_file=audio_file, is_liked=True
+            )
+            liked_files.append(audio_file)
+
+        titles = []
+        url = self.liked_url
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                titles += [item["title"] for item in response.data["results"]]
+                url = response.data["next"]
+        # Najnowsze polubienia najpierw, bez pliku, który stał się prywatny
+        expected = [
+            audio_file.title
+            for audio_file in reversed(liked_files)
+            if audio_file.is_public
+        ]
+        self.assertEqual(titles, expected + [self.public_audio.title])
+        # Na stronę: kursor, zapytanie o stronę, brakujące reprezentacje
+        self.assertEqual(len(queries), 2 * 3)
+
+    def test_my_files_paginated_with_stats_headers(self, mock_boto_client):
+        for index in range(21):
+            AudioFile.objects.create(
+                user=self.user_one, title=f"My Song {index}", file=self.audio_file
+            )
+        url = reverse("audio:user-uploaded-files")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertEqual(response.data["results"][0]["title"], "My Song 20")
+        self.assertEqual(response["X-Audio-File-Count"], "23")
+        self.assertEqual(
+            response["X-Audio-Total-Bytes"], str(23 * len(self.audio_file_content))
+        )
+        self.assertEqual(response["X-Audio-Total-Likes"], "2")
+
+        response = self.client.get(response.data["next"])
+        titles = [item["title"] for item in response.data["results"]]
+        self.assertEqual(titles, ["My Song 0", "Private Pop Song", "Public Rock Song"])
+
+    def test_user_audio_stats_follow_views_votes_and_deletes(self, mock_boto_client):
+        def stats():
+            return UserAudioStats.objects.values(
+                "file_count", "total_views", "total_likes"
+            ).get(user=self.user_one)
+
+        self.assertEqual(stats(), {"file_count": 2, "total_views": 0, "total_likes": 2})
+        self.client.get(self.detail_url)
+        self.client.force_authenticate(user=self.user_two)
+        self.client.post(self.like_url, data={"is_liked": False}, format="json")
+        self.assertEqual(stats(), {"file_count": 2, "total_views": 1, "total_likes": 1})
+        self.client.post(self.like_url, data={"is_liked": False}, format="json")
+        self.client.delete(self.like_url)
+        self.assertEqual(stats()["total_likes"], 1)
+
+        self.client.force_authenticate(user=self.user_one)
+        self.client.delete(self.delete_url)
+        self.assertEqual(stats(), {"file_count": 1, "total_views": 0, "total_likes": 0})
+
+        maintained = stats()
+        call_command("rebuild_user_audio_stats", stdout=StringIO())
+        self.assertEqual(stats(), maintained)
+
+    def test_orm_vote_flip_updates_stats(self, mock_boto_client):
+        def total_likes():
+            return UserAudioStats.objects.get(user=self.user_two).total_likes
+
+        # Np. zmiana głosu w panelu admina: niepolubienie user_one -> polubienie
+        like = Like.objects.get(user=self.user_one, audio_file=self.other_user_audio)
+        like.is_liked = True
+        like.save()
+        self.assertEqual(total_likes(), 1)
+        self.assertEqual(
+            list(VoteChange.objects.values_list("likes", "dislikes")), [(1, -1)]
+        )
+
+        response = self.client.delete(
+            reverse("audio:audio-like", kwargs={"uuid": self.other_user_audio.uuid})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(total_likes(), 0)
+
+    def test_audio_delete_does_no_per_vote_work(self, mock_boto_client):
+        voters = [
+            User.objects.create_user(
+                email=f"voter{index}-{uuid.uuid4()}@example.com",
+                name=f"voter{index}",
+                password="password",
+            )
+            for index in range(5)
+        ]
+        few_votes, many_votes = (
+            AudioFile.objects.create(
+                title=title, file=self.audio_file, user=self.user_one, is_public=True
+            )
+            for title in ("Few Votes", "Many Votes")
+        )
+        for audio_file, audio_voters in ((few_votes, voters[:1]), (many_votes, voters)):
+            for voter in audio_voters:
+                Like.objects.create(user=voter, audio_file=audio_file, is_liked=True)
+
+        # Stała liczba zapytań niezależnie od liczby głosów
+        with CaptureQueriesContext(connection) as few_queries:
+            few_votes.delete()
+        with CaptureQueriesContext(connection) as many_queries:
+            many_votes.delete()
+        self.assertEqual(len(many_queries), len(few_queries))
+        self.assertFalse(VoteChange.objects.exists())
+        self.assertEqual(
+            UserAudioStats.objects.get(user=self.user_one).total_likes,
+            Like.objects.filter(audio_file__user=self.user_one, is_liked=True).count(),
+        )
 
     def test_get_top_rated_files(self, mock_boto_client):
         response = self.client.get(self.top_rated_url)
@@ -301,3 +539,1063 @@ class AudioAPITestCase(APITestCase):
             user=self.user_one, title="Signal Copy Fail", file=self.audio_file
         )
         self.assertTrue(AudioFile.objects.filter(title="Signal Copy Fail").exists())
+
+    # --- Testy wyszukiwania rozmytego i autouzupełniania ---
+    def test_search_matches_misspelled_title(self, mock_boto_client):
+        response = self.client.get(reverse("audio:audio-search"), {"q": "Pubic Rok"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [item["title"] for item in response.data["results"]]
+        self.assertIn(self.public_audio.title, titles)
+        self.assertNotIn(self.private_audio.title, titles)
+        self.assertFalse(response.data["has_more"])
+
+    def test_search_matches_misspelled_tag(self, mock_boto_client):
+        response = self.client.get(reverse("audio:audio-search"), {"q": "rokc"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        uuids = [item["uuid"] for item in response.data["results"]]
+        self.assertEqual(uuids, [str(self.public_audio.uuid)])
+
+    def test_search_requires_query(self, mock_boto_client):
+        response = self.client.get(reverse("audio:audio-search"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_rejects_invalid_page(self, mock_boto_client):
+        for page in ("abc", "0", "-1"):
+            response = self.client.get(
+                reverse("audio:audio-search"), {"q": "rock", "page": page}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("page", response.data)
+
+    def test_autocomplete_serves_popular_tags_from_prefix_cache(self, mock_boto_client):
+        popular_tags.invalidate()
+        url = reverse("audio:audio-autocomplete")
+        self.client.get(url, {"q": "ro", "limit": 1})  # rozgrzanie cache
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"q": "ro", "limit": 1})
+        self.assertEqual(
+            response.data["suggestions"], [{"type": "tag", "value": "rock"}]
+        )
+
+    def test_autocomplete_falls_back_to_similar_titles(self, mock_boto_client):
+        popular_tags.invalidate()
+        response = self.client.get(
+            reverse("audio:audio-autocomplete"), {"q": "Othr User"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            {"type": "title", "value": self.other_user_audio.title},
+            response.data["suggestions"],
+        )
+
+    # --- Testy cache odpowiedzi list ---
+    def test_anonymous_feed_response_is_served_from_cache(self, mock_boto_client):
+        self.client.logout()
+        response_cache_stats.reset()
+        first = self.client.get(self.latest_url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.latest_url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(response_cache_stats.hit_ratio("latest"), 0.5)
+
+    def test_authenticated_feed_response_is_not_cached(self, mock_boto_client):
+        lookups = []
+
+        def on_lookup(sender, endpoint, hit, **kwargs):
+            lookups.append((endpoint, hit))
+
+        response_cache_lookup.connect(on_lookup)
+        self.addCleanup(response_cache_lookup.disconnect, on_lookup)
+        self.client.get(self.latest_url)
+        self.assertEqual(lookups, [])
+
+    def test_like_invalidates_only_affected_tag_feeds(self, mock_boto_client):
+        self.client.logout()
+        rock_url = self.audio_by_tag_url
+        self.client.get(rock_url)
+        pop_generation = get_generations([tag_scope("pop")])
+        rock_generation = get_generations([tag_scope("ROCK")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(
+                user=self.user_two, audio_file=self.other_user_audio, is_liked=True
+            )
+            like = Like.objects.get(user=self.user_one, audio_file=self.public_audio)
+            like.is_liked = False
+            like.save()
+            Like.objects.get(user=self.user_two, audio_file=self.public_audio).delete()
+
+        self.assertEqual(get_generations([tag_scope("pop")]), pop_generation)
+        self.assertNotEqual(get_generations([tag_scope("rock")]), rock_generation)
+        response = self.client.get(rock_url)
+        self.assertEqual(response.data["results"][0]["likes_count"], 0)
+
+    def test_upload_invalidates_latest_feed(self, mock_boto_client):
+        self.client.logout()
+        self.assertEqual(len(self.client.get(self.latest_url).data["results"]), 2)
+        feed_generation = get_generations([FEED_SCOPE])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AudioFile.objects.create(
+                user=self.user_two, title="Fresh Upload", file=self.audio_file
+            )
+
+        self.assertNotEqual(get_generations([FEED_SCOPE]), feed_generation)
+        response = self.client.get(self.latest_url)
+        self.assertEqual(response.data["results"][0]["title"], "Fresh Upload")
+
+    def test_visibility_change_and_delete_invalidate_feeds(self, mock_boto_client):
+        self.client.logout()
+        self.assertEqual(len(self.client.get(self.audio_by_tag_url).data["results"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.public_audio.is_public = False
+            self.public_audio.save()
+        self.assertEqual(len(self.client.get(self.audio_by_tag_url).data["results"]), 0)
+
+        tags_before = self.client.get(self.tags_url).data
+        with self.captureOnCommitCallbacks(execute=True):
+            self.public_audio.delete()
+        tags_after = self.client.get(self.tags_url).data
+        self.assertNotEqual(tags_before, tags_after)
+
+    # --- Testy ETag / warunkowego GET ---
+    def test_detail_conditional_get_returns_304_without_counting_view(
+        self, mock_boto_client
+    ):
+        first = self.client.get(self.detail_url)
+        etag = first["ETag"]
+        views_after_first = first.data["views"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.public_audio.refresh_from_db()
+        self.assertEqual(self.public_audio.views, views_after_first)
+
+    def test_detail_etag_changes_after_vote(self, mock_boto_client):
+        etag = self.client.get(self.detail_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.filter(user=self.user_two).delete()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_likes_count_conditional_get(self, mock_boto_client):
+        etag = self.client.get(self.likes_count_url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.likes_count_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(
+                user=self.user_one, audio_file=self.private_audio, is_liked=True
+            )
+        # Głos na inny plik nie zmienia walidatora
+        response = self.client.get(self.likes_count_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.get(user=self.user_two, audio_file=self.public_audio).delete()
+        response = self.client.get(self.likes_count_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["likes"], 1)
+
+    # --- Testy renderera JSON ---
+    def test_orjson_renderer_matches_drf_json_renderer(self, mock_boto_client):
+        data = AudioFileSerializer(AudioFile.objects.order_by("id"), many=True).data
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render({"uuid": self.public_audio.uuid}),
+            f'{{"uuid":"{self.public_audio.uuid}"}}'.encode(),
+        )
+
+    def test_orjson_renderer_formats_values_like_drf(self, mock_boto_client):
+        moment = datetime(2026, 10, 19, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        data = {
+            "utc": moment,
+            "whole_seconds": moment.replace(microsecond=0),
+            "offset": moment.astimezone(dt_timezone(timedelta(hours=2))),
+            "naive": moment.replace(tzinfo=None),
+            "date": moment.date(),
+            "time": moment.time(),
+            "duration": timedelta(minutes=3, seconds=30),
+            "amount": Decimal("1.50"),
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_api_parses_and_renders_json_with_orjson(self, mock_boto_client):
+        response = self.client.post(
+            reverse("audio:audio-like", kwargs={"uuid": self.other_user_audio.uuid}),
+            data=b'{"is_liked": true}',
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json()["is_liked"], True)
+
+    # --- Testy lekkiej ścieżki odczytu list ---
+    def test_feed_rows_match_audio_file_serializer(self, mock_boto_client):
+        anonymous_audio = AudioFile.objects.create(
+            title="Anonymous Song", file=self.audio_file, is_public=True
+        )
+        anonymous_audio.tags.add(self.tag_pop, self.tag_rock)
+        queryset = AudioFile.objects.order_by("id")
+
+        expected = JSONRenderer().render(AudioFileSerializer(queryset, many=True).data)
+        # Zimny cache reprezentacji: strona + jedno zapytanie o brakujące wpisy
+        with self.assertNumQueries(2):
+            rows = feed_rows(queryset)
+        self.assertEqual(JSONRenderer().render(rows), expected)
+        with self.assertNumQueries(1):
+            rows = feed_rows(queryset)
+        self.assertEqual(JSONRenderer().render(rows), expected)
+
+    def test_list_endpoints_run_constant_number_of_queries(self, mock_boto_client):
+        for index in range(5):
+            audio_file = AudioFile.objects.create(
+                user=self.user_two,
+                title=f"Extra Song {index}",
+                file=self.audio_file,
+                is_public=True,
+            )
+            audio_file.tags.add(self.tag_rock)
+        # COUNT(*) + strona + brakujące reprezentacje, niezależnie od liczby plików
+        with self.assertNumQueries(3):
+            response = self.client.get(self.latest_url)
+        self.assertEqual(len(response.data["results"]), 7)
+        with self.assertNumQueries(2):  # Reprezentacje już w cache
+            self.client.get(self.audio_by_tag_url)
+
+    def test_compact_view_returns_only_compact_fields(self, mock_boto_client):
+        feed_rows(AudioFile.objects.all())  # Rozgrzanie cache reprezentacji
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.latest_url, {"view": "compact"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for item in response.data["results"]:
+            self.assertEqual(list(item), ["uuid", "title", "file", "uploader"])
+        # Pominięte pola nie generują podzapytań o głosy ani tagi
+        page_query = queries.captured_queries[-1]["sql"]
+        self.assertNotIn("audio_like", page_query)
+        self.assertNotIn("audio_audiofile_tags", page_query)
+
+    def test_fields_param_selects_fields_on_list_views(self, mock_boto_client):
+        self.client.force_authenticate(user=self.user_one)
+        for url in (
+            self.latest_url,
+            self.top_rated_url,
+            self.audio_by_tag_url,
+            self.liked_url,
+            reverse("audio:user-uploaded-files"),
+        ):
+            response = self.client.get(url, {"fields": "views,uuid,likes_count"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            results = response.data
+            if isinstance(results, dict):
+                results = results["results"]
+            self.assertTrue(results, url)
+            for item in results:
+                self.assertEqual(list(item), ["uuid", "likes_count", "views"])
+
+    # --- Testy reakcji zalogowanego użytkownika (my_reaction) ---
+    def test_list_includes_my_reaction_for_authenticated_user(self, mock_boto_client):
+        self.client.force_authenticate(user=self.user_one)
+        response = self.client.get(self.latest_url)
+        reactions = {
+            item["uuid"]: item["my_reaction"] for item in response.data["results"]
+        }
+        self.assertEqual(
+            reactions,
+            {
+                str(self.public_audio.uuid): True,
+                str(self.other_user_audio.uuid): False,
+            },
+        )
+
+        self.client.force_authenticate(user=self.user_two)
+        response = self.client.get(self.top_rated_url)
+        reactions = {item["uuid"]: item["my_reaction"] for item in response.data}
+        self.assertEqual(reactions[str(self.other_user_audio.uuid)], None)
+
+    def test_anonymous_list_skips_my_reaction(self, mock_boto_client):
+        self.client.force_authenticate(user=None)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.latest_url)
+        for item in response.data["results"]:
+            self.assertNotIn("my_reaction", item)
+        self.assertFalse(
+            any(
+                '"audio_like"."user_id"' in query["sql"]
+                for query in queries.captured_queries
+            )
+        )
+
+        # Nieważny token nie blokuje publicznej listy
+        self.client.cookies["access_token"] = "invalid"
+        response = self.client.get(self.top_rated_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("my_reaction", response.data[0])
+
+    def test_my_reaction_keeps_query_count_constant(self, mock_boto_client):
+        self.client.force_authenticate(user=self.user_two)
+        self.client.get(self.latest_url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.latest_url)
+        queries_for_two_files = len(queries)
+
+        for index in range(5):
+            audio_file = AudioFile.objects.create(
+                user=self.user_one,
+                title=f"Reaction Song {index}",
+                file=self.audio_file,
+                is_public=True,
+            )
+            Like.objects.create(
+                user=self.user_two, audio_file=audio_file, is_liked=index % 2 == 0
+            )
+        feed_rows(AudioFile.objects.all())  # Rozgrzanie cache reprezentacji
+
+        with self.assertNumQueries(queries_for_two_files):
+            response = self.client.get(self.latest_url)
+        self.assertEqual(len(response.data["results"]), 7)
+        self.assertEqual(
+            [item["my_reaction"] for item in response.data["results"][:5]],
+            [True, False, True, False, True],
+        )
+
+    # --- Testy endpointów zbiorczych (batch) ---
+    def test_likes_count_batch(self, mock_boto_client):
+        self.client.force_authenticate(user=None)
+        missing_uuid = str(uuid.uuid4())
+        uuids = [
+            str(self.public_audio.uuid),
+            str(self.other_user_audio.uuid),
+            str(self.private_audio.uuid).upper(),  # Błąd pod postacią kanoniczną
+            missing_uuid,
+            "not-a-uuid",
+        ]
+        # Jedno zapytanie o pliki i jedno o głosy
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("audio:audio-likes-count-batch"), {"uuids": ",".join(uuids)}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            {
+                str(self.public_audio.uuid): {"likes": 2, "dislikes": 0},
+                str(self.other_user_audio.uuid): {"likes": 0, "dislikes": 1},
+            },
+        )
+        self.assertEqual(
+            response.data["errors"],
+            {
+                "not-a-uuid": "Invalid UUID.",
+                str(self.private_audio.uuid): "Audio file is private.",
+                missing_uuid: "Audio file not found.",
+            },
+        )
+
+    def test_detail_batch(self, mock_boto_client):
+        url = reverse("audio:audio-detail-batch")
+        uuids = [str(self.private_audio.uuid), str(self.other_user_audio.uuid)]
+        response = self.client.get(url, {"uuids": uuids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Właściciel widzi swój prywatny plik; kolejność jak w żądaniu
+        self.assertEqual(list(response.data["results"]), uuids)
+        self.assertEqual(
+            response.data["results"][uuids[0]]["title"], self.private_audio.title
+        )
+        self.assertEqual(response.data["errors"], {})
+        self.private_audio.refresh_from_db()
+        self.assertEqual(self.private_audio.views, 0)  # Bez liczenia wyświetleń
+
+        self.client.force_authenticate(user=self.user_two)
+        response = self.client.get(url, {"uuids": uuids, "view": "compact"})
+        self.assertEqual(list(response.data["results"]), uuids[1:])
+        self.assertEqual(
+            list(response.data["results"][uuids[1]]),
+            ["uuid", "title", "file", "uploader"],
+        )
+        self.assertIn(uuids[0], response.data["errors"])
+
+    def test_batch_rejects_missing_or_too_many_uuids(self, mock_boto_client):
+        url = reverse("audio:audio-likes-count-batch")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(AUDIO_BATCH_MAX_UUIDS=2):
+            response = self.client.get(
+                url, {"uuids": ",".join(str(uuid.uuid4()) for _ in range(3))}
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("uuids", response.data)
+
+    # --- Testy cache reprezentacji ---
+    def test_representation_cache_merges_fresh_counters(self, mock_boto_client):
+        queryset = AudioFile.objects.filter(pk=self.other_user_audio.pk)
+        feed_rows(queryset)
+        Like.objects.create(
+            user=self.user_two, audio_file=self.other_user_audio, is_liked=True
+        )
+        AudioFile.objects.filter(pk=self.other_user_audio.pk).update(views=42)
+
+        with self.assertNumQueries(1):
+            (row,) = feed_rows(queryset)
+        self.assertEqual(row["likes_count"], 1)
+        self.assertEqual(row["dislikes_count"], 1)
+        self.assertEqual(row["views"], 42)
+
+    def test_representation_cache_follows_file_changes(self, mock_boto_client):
+        queryset = AudioFile.objects.filter(pk=self.public_audio.pk)
+        feed_rows(queryset)
+
+        self.public_audio.title = "Renamed Rock Song"
+        self.public_audio.save()
+        (row,) = feed_rows(queryset)
+        self.assertEqual(row["title"], "Renamed Rock Song")
+
+        self.public_audio.tags.add(self.tag_pop)
+        (row,) = feed_rows(queryset)
+        self.assertEqual(row["tags"], ["rock", "pop"])
+
+        self.tag_pop.audio_files.clear()
+        (row,) = feed_rows(queryset)
+        self.assertEqual(row["tags"], ["rock"])
+
+    def test_representation_cache_follows_user_rename(self, mock_boto_client):
+        queryset = AudioFile.objects.filter(pk=self.public_audio.pk)
+        feed_rows(queryset)
+
+        self.user_one.last_login = None
+        self.user_one.save(update_fields=["last_login"])
+        with self.assertNumQueries(1):
+            feed_rows(queryset)  # Bez zmiany nazwy wpis jest nadal aktualny
+
+        self.user_one.name = "Renamed User"
+        self.user_one.save()
+        (row,) = feed_rows(queryset)
+        self.assertEqual(row["uploader"], "Renamed User")
+
+    def test_invalid_field_selection_is_rejected(self, mock_boto_client):
+        response = self.client.get(self.latest_url, {"fields": "title,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+        response = self.client.get(self.latest_url, {"view": "tiny"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            self.latest_url, {"view": "compact", "fields": "title"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # --- Testy dziennych statystyk i trending ---
+    def _record_trending_events(self):
+        # Pierwsze uruchomienie dwa dni temu, potem: dwa polubienia sprzed doby
+        # (public_audio) oraz polubienie i dwa wyświetlenia "teraz" (other)
+        now = timezone.now()
+        update_rollups(now=now - timedelta(days=2))
+        Like.objects.filter(audio_file=self.public_audio).update(
+            created_at=now - timedelta(days=1)
+        )
+        Like.objects.filter(audio_file=self.other_user_audio).update(
+            is_liked=True, created_at=now
+        )
+        write_play_events(
+            [
+                self._play_event(self.other_user_audio, PlayEvent.VIEW, now),
+                self._play_event(self.other_user_audio, PlayEvent.VIEW, now),
+            ]
+        )
+        return now
+
+    def _play_event(self, audio_file, event_type, occurred_at, listener=None):
+        return {
+            "audio_file_id": audio_file.pk,
+            "user_id": None,
+            "session_id": None,
+            "listener": listener,
+            "event_type": event_type,
+            "position": 0,
+            "occurred_at": occurred_at,
+        }
+
+    @override_settings(AUDIO_TRENDING_SETTLE_SECONDS=0)
+    def test_rollups_count_new_votes_and_views_per_day(self, mock_boto_client):
+        now = self._record_trending_events()
+        self.assertEqual(update_rollups(now=now), 2)
+
+        self.assertEqual(
+            list(
+                AudioDailyStats.objects.order_by("day").values_list(
+                    "audio_file", "day", "views", "likes", "dislikes"
+                )
+            ),
+            [
+                (self.public_audio.pk, (now - timedelta(days=1)).date(), 0, 2, 0),
+                (self.other_user_audio.pk, now.date(), 2, 1, 0),
+            ],
+        )
+        scores = dict(TrendingScore.objects.values_list("audio_file", "log_score"))
+        # Waga polubienia 3, wyświetlenia 1, okres półtrwania 24 h
+        self.assertAlmostEqual(current_score(scores[self.public_audio.pk], now), 3.0)
+        self.assertAlmostEqual(
+            current_score(scores[self.other_user_audio.pk], now), 5.0
+        )
+        self.assertAlmostEqual(
+            current_score(scores[self.other_user_audio.pk], now + timedelta(hours=24)),
+            2.5,
+        )
+
+    @override_settings(AUDIO_TRENDING_SETTLE_SECONDS=0)
+    def test_rollups_read_only_new_events(self, mock_boto_client):
+        now = self._record_trending_events()
+        update_rollups(now=now)
+        before = dict(TrendingScore.objects.values_list("audio_file", "log_score"))
+
+        later = now + timedelta(hours=1)
+        self.assertEqual(update_rollups(now=later), 0)
+        after = dict(TrendingScore.objects.values_list("audio_file", "log_score"))
+        self.assertEqual(after, before)
+
+        write_play_events(
+            [
+                self._play_event(self.public_audio, PlayEvent.START, later),
+                self._play_event(self.public_audio, PlayEvent.PROGRESS, later),
+                self._play_event(self.public_audio, PlayEvent.COMPLETE, later),
+            ]
+        )
+        self.assertEqual(update_rollups(now=later), 1)
+        self.assertEqual(update_rollups(now=later), 0)  # Ten sam znacznik id
+        stats = AudioDailyStats.objects.get(
+            audio_file=self.public_audio, day=later.date()
+        )
+        self.assertEqual((stats.plays, stats.completes), (1, 1))
+        score = TrendingScore.objects.get(audio_file=self.public_audio)
+        # Waga odtworzenia 2
+        self.assertAlmostEqual(
+            current_score(score.log_score, later),
+            current_score(before[self.public_audio.pk], later) + 2.0,
+        )
+
+    @override_settings(AUDIO_TRENDING_SETTLE_SECONDS=0)
+    def test_rollups_apply_changed_votes_to_their_day(self, mock_boto_client):
+        now = self._record_trending_events()
+        update_rollups(now=now)
+
+        # Oba polubienia public_audio (sprzed doby) są już policzone:
+        # user_one zmienia je na niepolubienie, user_two wycofuje
+        response = self.client.post(
+            self.like_url, data={"is_liked": False}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.user_two)
+        response = self.client.delete(self.like_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        later = now + timedelta(hours=1)
+        self.assertEqual(update_rollups(now=later), 1)
+        stats = AudioDailyStats.objects.get(
+            audio_file=self.public_audio, day=(now - timedelta(days=1)).date()
+        )
+        self.assertEqual((stats.likes, stats.dislikes), (0, 1))
+        score = TrendingScore.objects.get(audio_file=self.public_audio)
+        self.assertAlmostEqual(current_score(score.log_score, later), 0.0)
+        self.assertFalse(VoteChange.objects.exists())
+
+    @override_settings(AUDIO_TRENDING_SETTLE_SECONDS=0)
+    def test_trending_endpoint_orders_public_files_by_score(self, mock_boto_client):
+        now = self._record_trending_events()
+        Like.objects.create(
+            user=self.user_two, audio_file=self.private_audio, is_liked=True
+        )
+        Like.objects.filter(audio_file=self.private_audio).update(created_at=now)
+        update_rollups(now=now)
+
+        response = self.client.get(reverse("audio:audio-trending"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["title"] for item in response.data["results"]],
+            ["Other User's Song", "Public Rock Song"],
+        )
+        self.assertFalse(response.data["has_more"])
+
+    def test_trending_endpoint_rejects_invalid_page(self, mock_boto_client):
+        for page in ("abc", "0"):
+            response = self.client.get(reverse("audio:audio-trending"), {"page": page})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("page", response.data)
+
+    def test_detail_views_are_rolled_up_as_unique_listeners(self, mock_boto_client):
+        url = reverse("audio:audio-detail", kwargs={"uuid": self.public_audio.uuid})
+        for _ in range(3):  # Odświeżenia tego samego użytkownika
+            self.client.get(url)
+        self.client.force_authenticate(user=self.user_two)
+        self.client.get(url)
+        self.client.force_authenticate(user=None)
+        for user_agent in ("agent-a", "agent-a", "agent-b"):
+            self.client.get(url, HTTP_USER_AGENT=user_agent)
+        play_event_buffer.flush()
+        update_rollups()
+
+        self.client.force_authenticate(user=self.user_one)
+        analytics_url = reverse(
+            "audio:audio-analytics", kwargs={"uuid": self.public_audio.uuid}
+        )
+        response = self.client.get(analytics_url)
+        today = response.data["days"][-1]
+        self.assertEqual((today["views"], today["listeners"]), (7, 4))
+        self.assertEqual(response.data["totals"]["listeners"], 4)
+
+    def test_analytics_returns_owner_daily_stats(self, mock_boto_client):
+        today = timezone.now().date()
+        AudioDailyStats.objects.create(
+            audio_file=self.public_audio, day=today, views=5, plays=3, likes=1
+        )
+        AudioDailyStats.objects.create(
+            audio_file=self.public_audio, day=today - timedelta(days=2), plays=2
+        )
+        url = reverse("audio:audio-analytics", kwargs={"uuid": self.public_audio.uuid})
+
+        response = self.client.get(
+            url, {"from": str(today - timedelta(days=2)), "to": str(today)}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(day["plays"], day["views"]) for day in response.data["days"]],
+            [(2, 0), (0, 0), (3, 5)],  # Dni bez aktywności jako zera
+        )
+        self.assertEqual(response.data["totals"]["plays"], 5)
+        self.assertEqual(len(self.client.get(url).data["days"]), 30)
+
+        response = self.client.get(url, {"from": str(today), "to": "2020-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=self.user_two)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_top_rated_window_reads_daily_stats(self, mock_boto_client):
+        today = timezone.now().date()
+        AudioDailyStats.objects.create(
+            audio_file=self.public_audio, day=today, likes=1, dislikes=1
+        )
+        AudioDailyStats.objects.create(
+            audio_file=self.other_user_audio, day=today, likes=2
+        )
+        AudioDailyStats.objects.create(
+            audio_file=self.public_audio, day=today - timedelta(days=10), likes=9
+        )
+
+        response = self.client.get(self.top_rated_url, {"days": 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["title"] for item in response.data],
+            ["Other User's Song", "Public Rock Song"],
+        )
+        response = self.client.get(self.top_rated_url, {"days": 30})
+        self.assertEqual(
+            [item["title"] for item in response.data],
+            ["Public Rock Song", "Other User's Song"],
+        )
+
+    # --- Testy podobnych plików ---
+    def test_similar_returns_files_liked_by_same_listeners(self, mock_boto_client):
+        Like.objects.filter(
+            user=self.user_one, audio_file=self.other_user_audio
+        ).update(is_liked=True)
+        Like.objects.create(
+            user=self.user_one, audio_file=self.private_audio, is_liked=True
+        )
+        self.assertEqual(build_similar_audio(), 6)
+
+        url = reverse("audio:audio-similar", kwargs={"uuid": self.public_audio.uuid})
+        with self.assertNumQueries(4):  # plik, sąsiedzi, strona, cache reprezentacji
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["source"], "likes")
+        # Prywatny sąsiad jest pomijany
+        self.assertEqual(
+            [item["title"] for item in response.data["results"]],
+            ["Other User's Song"],
+        )
+
+    def test_similar_falls_back_to_tag_overlap(self, mock_boto_client):
+        cold = AudioFile.objects.create(
+            user=self.user_two, title="Cold Rock Song", file=self.audio_file
+        )
+        cold.tags.add(self.tag_rock, self.tag_pop)
+
+        url = reverse("audio:audio-similar", kwargs={"uuid": cold.uuid})
+        response = self.client.get(url)
+        self.assertEqual(response.data["source"], "tags")
+        self.assertEqual(
+            [item["title"] for item in response.data["results"]],
+            ["Public Rock Song"],
+        )
+
+    def test_similar_of_private_file_is_hidden_from_others(self, mock_boto_client):
+        url = reverse("audio:audio-similar", kwargs={"uuid": self.private_audio.uuid})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.user_two)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    # --- Testy współwystępowania tagów ---
+    def _tag_pair_counts(self):
+        return {
+            (pair.tag_id, pair.related_id): pair.count
+            for pair in TagPair.objects.filter(count__gt=0)
+        }
+
+    def test_tag_pairs_follow_link_and_unlink(self, mock_boto_client):
+        tag_jazz = Tag.objects.create(name="jazz")
+        self.other_user_audio.tags.add(self.tag_rock, self.tag_pop, tag_jazz)
+        self.assertEqual(
+            TagPair.objects.get(tag=self.tag_rock, related=self.tag_pop).count, 1
+        )
+        self.assertEqual(
+            TagPair.objects.get(tag=self.tag_rock, related=self.tag_rock).count, 2
+        )
+
+        self.other_user_audio.tags.add(self.tag_rock)  # Już powiązany - bez zmian
+        self.other_user_audio.tags.remove(self.tag_pop, self.tag_pop)
+        tag_jazz.audio_files.add(self.public_audio)
+        self.tag_pop.audio_files.clear()
+        self.public_audio.tags.clear()
+        self.other_user_audio.tags.set([tag_jazz, self.tag_pop])
+        maintained = self._tag_pair_counts()
+
+        rebuild_tag_pairs(chunk_size=2)
+        self.assertEqual(maintained, self._tag_pair_counts())
+        self.assertEqual(
+            maintained[(tag_jazz.pk, self.tag_pop.pk)],
+            maintained[(self.tag_pop.pk, tag_jazz.pk)],
+        )
+
+        self.other_user_audio.delete()
+        self.assertNotIn((tag_jazz.pk, self.tag_pop.pk), self._tag_pair_counts())
+
+    def test_related_tags_ranked_by_npmi(self, mock_boto_client):
+        tag_jazz = Tag.objects.create(name="jazz")
+        for title, tags in (
+            ("A", [self.tag_rock, tag_jazz]),
+            ("B", [self.tag_rock, tag_jazz]),
+            ("C", [self.tag_rock, self.tag_pop]),
+        ):
+            AudioFile.objects.create(
+                user=self.user_one, title=title, file=self.audio_file
+            ).tags.add(*tags)
+
+        url = reverse("audio:related-tags", kwargs={"tag_name": "ROCK"})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tag"], "rock")
+        # Rzadsza para rock + pop (1 wspólny plik) odpada przez minimalną liczbę
+        self.assertEqual(
+            response.data["related"], [{"name": "jazz", "count": 2, "score": 0.3691}]
+        )
+
+        with self.settings(AUDIO_RELATED_TAGS_MIN_COUNT=1):
+            response = self.client.get(url, {"limit": 5})
+        self.assertEqual(
+            [row["name"] for row in response.data["related"]], ["jazz", "pop"]
+        )
+        self.assertLess(response.data["related"][1]["score"], 0)
+
+        url = reverse("audio:related-tags", kwargs={"tag_name": "missing"})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    # --- Testy zdarzeń odtwarzania ---
+    @override_settings(AUDIO_PLAY_EVENT_BUFFER_SIZE=1000)
+    def test_play_events_are_buffered_and_written_in_one_copy(self, mock_boto_client):
+        url = self.play_events_url
+        session_id = uuid.uuid4()
+        batch = [
+            {"type": "start", "session_id": str(session_id)},
+            {"type": "progress", "position": 30.5, "session_id": str(session_id)},
+            {"type": "complete", "position": 61, "session_id": str(session_id)},
+        ]
+        with self.assertNumQueries(1):  # Tylko sprawdzenie pliku - bez INSERT
+            response = self.client.post(url, batch, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {"accepted": 3})
+
+        self.client.force_authenticate(user=None)
+        response = self.client.post(url, {"events": [{"type": "start"}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(len(play_event_buffer), 4)
+        self.assertFalse(PlayEvent.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            play_event_buffer.flush()
+        self.assertFalse(
+            [query for query in queries if "INSERT" in query["sql"].upper()]
+        )
+        events = PlayEvent.objects.order_by("id")
+        self.assertEqual(
+            [(event.event_type, event.position) for event in events],
+            [("start", 0), ("progress", 30.5), ("complete", 61), ("start", 0)],
+        )
+        self.assertEqual(events[0].user_id, self.user_one.pk)
+        self.assertEqual(events[0].session_id, session_id)
+        self.assertIsNone(events[3].user_id)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT tableoid::regclass::text FROM audio_playevent"
+            )
+            self.assertEqual(
+                cursor.fetchall(), [(partition_name(timezone.now().date()),)]
+            )
+
+    def test_full_play_event_buffer_is_written_in_background(self, mock_boto_client):
+        url = self.play_events_url
+        with (
+            self.settings(AUDIO_PLAY_EVENT_BUFFER_SIZE=2),
+            patch.object(PlayEventBuffer, "_write_in_background") as write,
+        ):
+            self.client.post(url, {"type": "start"}, format="json")
+            write.assert_not_called()
+            self.client.post(url, {"type": "complete"}, format="json")
+        (batch,) = write.call_args.args
+        self.assertEqual(
+            [event["event_type"] for event in batch], ["start", "complete"]
+        )
+        self.assertEqual(len(play_event_buffer), 0)
+
+    def test_invalid_play_events_are_rejected(self, mock_boto_client):
+        url = self.play_events_url
+        too_old = timezone.now() - timedelta(days=2)
+        for payload in (
+            {"type": "pause"},
+            {"type": "progress", "position": -1},
+            {"type": "start", "occurred_at": too_old.isoformat()},
+            {"events": []},
+        ):
+            response = self.client.post(url, payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        private_url = reverse(
+            "audio:audio-play-events", kwargs={"uuid": self.private_audio.uuid}
+        )
+        self.client.force_authenticate(user=self.user_two)
+        response = self.client.post(private_url, {"type": "start"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(len(play_event_buffer), 0)
+
+    # --- Testy obserwowania i osi czasu ---
+    def _timeline_titles(self, url=None):
+        response = self.client.get(url or reverse("audio:home-timeline"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["title"] for item in response.data["results"]], response
+
+    @override_settings(AUDIO_TIMELINE_PAGE_SIZE=1)
+    def test_follow_fans_out_uploads_into_timeline(self, mock_boto_client):
+        follow_url = reverse("audio:follow-user", kwargs={"user_id": self.user_two.pk})
+        response = self.client.post(follow_url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["followers"], 1)
+        self.assertEqual(self.client.post(follow_url).status_code, status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AudioFile.objects.create(
+                user=self.user_two, title="New Upload", file=self.audio_file
+            )
+            AudioFile.objects.create(
+                user=self.user_two,
+                title="Private Upload",
+                file=self.audio_file,
+                is_public=False,
+            )
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user_one).count(), 2)
+
+        # Kursor prowadzi przez kolejne strony, od najnowszego pliku
+        titles, response = self._timeline_titles()
+        self.assertEqual(titles, ["New Upload"])
+        # Strona osi czasu, wiersze feedu i reprezentacje spoza cache
+        with self.assertNumQueries(3):
+            titles, response = self._timeline_titles(response.data["next"])
+        self.assertEqual(titles, ["Other User's Song"])
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.post(
+            reverse("audio:follow-user", kwargs={"user_id": self.user_one.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("audio:home-timeline"), {"cursor": "x"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(AUDIO_TIMELINE_PULL_THRESHOLD=0)
+    def test_timeline_pulls_uploads_of_popular_uploaders(self, mock_boto_client):
+        self.client.post(
+            reverse("audio:follow-user", kwargs={"user_id": self.user_two.pk})
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            AudioFile.objects.create(
+                user=self.user_two, title="New Upload", file=self.audio_file
+            )
+        # Popularny uploader nie jest rozsyłany, a oś czasu i tak go zawiera
+        self.assertFalse(TimelineEntry.objects.exists())
+        titles, _ = self._timeline_titles()
+        self.assertEqual(titles, ["New Upload", "Other User's Song"])
+
+    def test_unfollow_and_trim_bound_the_timeline(self, mock_boto_client):
+        follow_url = reverse("audio:follow-user", kwargs={"user_id": self.user_two.pk})
+        self.client.post(follow_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            AudioFile.objects.create(
+                user=self.user_two, title="New Upload", file=self.audio_file
+            )
+        self.assertEqual(trim_timelines(keep=1), 1)
+        titles, _ = self._timeline_titles()
+        self.assertEqual(titles, ["New Upload"])
+
+        response = self.client.delete(follow_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._timeline_titles()[0], [])
+        self.assertEqual(
+            UserAudioStats.objects.get(user=self.user_two).follower_count, 0
+        )
+
+    def test_deleted_follower_is_uncounted(self, mock_boto_client):
+        self.client.post(
+            reverse("audio:follow-user", kwargs={"user_id": self.user_two.pk})
+        )
+        self.assertEqual(
+            UserAudioStats.objects.get(user=self.user_two).follower_count, 1
+        )
+        self.user_one.delete()
+        self.assertEqual(
+            UserAudioStats.objects.get(user=self.user_two).follower_count, 0
+        )
+
+
+class ListenerSketchTestCase(SimpleTestCase):
+    def sketch(self, hashes):
+        return hll.add_to_sketch(hll.empty_sketch(), hashes)
+
+    def test_estimate_is_close_and_ignores_duplicates(self):
+        hashes = np.random.default_rng(0).integers(
+            np.iinfo(np.int64).min, np.iinfo(np.int64).max, 100000, dtype=np.int64
+        )
+        self.assertEqual(hll.estimate(self.sketch(hashes[:10])), 10)
+        estimate = hll.estimate(self.sketch(np.concatenate([hashes, hashes])))
+        self.assertAlmostEqual(estimate / 100000, 1, delta=0.05)
+
+        # Suma zakresu to maksimum rejestrów szkiców dni, bez liczenia dwa razy
+        days = [self.sketch(hashes[:60000]), self.sketch(hashes[40000:])]
+        union = hll.merge(sketch.tobytes() for sketch in days)
+        self.assertEqual(len(union.tobytes()), hll.REGISTERS)
+        self.assertEqual(hll.estimate(union), estimate)
+
+
+class SimilarPairsTestCase(SimpleTestCase):
+    # Użytkownik 1 lubi 10, 20, 30; użytkownik 2: 10, 20; użytkownik 3: 20, 40
+    likes = [(1, 10), (1, 20), (1, 30), (2, 10), (2, 20), (3, 20), (3, 40)]
+
+    def neighbours(self, **kwargs):
+        result = {}
+        for audio_file_id, similar_id, score in similar_pairs(self.likes, **kwargs):
+            result.setdefault(audio_file_id, []).append((similar_id, round(score, 3)))
+        return result
+
+    def test_cosine_similarity_top_k(self):
+        neighbours = self.neighbours(k=2)
+        self.assertEqual(neighbours[10], [(20, 0.816), (30, 0.707)])
+        self.assertEqual(neighbours[40], [(20, 0.577)])
+        self.assertEqual(len(neighbours[20]), 2)
+
+    def test_jaccard_similarity(self):
+        neighbours = self.neighbours(k=1, metric="jaccard")
+        self.assertEqual(neighbours[10], [(20, 0.667)])
+        self.assertEqual(neighbours[30], [(10, 0.5)])
+
+    def test_chunking_does_not_change_result(self):
+        self.assertEqual(self.neighbours(k=3, max_pairs=1), self.neighbours(k=3))
+
+
+class AggregateCacheTestCase(SimpleTestCase):
+    """Testy pomocnika stale-while-revalidate (get_or_refresh)."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_simultaneous_misses_trigger_single_recomputation(self):
+        calls = []
+        barrier = threading.Barrier(100)
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return [3, 1, 2]
+
+        def request():
+            barrier.wait()
+            results.append(get_or_refresh("test:aggregate", compute, timeout=30))
+
+        threads = [threading.Thread(target=request) for _ in range(100)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[3, 1, 2]] * 100)
+        self.assertEqual(_local_locks, {})  # Blokady kluczy nie zostają w pamięci
+
+    def test_stale_value_is_served_while_refreshing_in_background(self):
+        cache.set("test:aggregate", ("stale", time.time() - 1), 60)
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.wait(5)  # Odświeżenie trwa - żądania dostają starą wartość
+            return "fresh"
+
+        self.assertEqual(get_or_refresh("test:aggregate", compute, 30), "stale")
+        self.assertEqual(get_or_refresh("test:aggregate", compute, 30), "stale")
+        refreshed.set()
+
+        deadline = time.monotonic() + 5
+        while cache.get("test:aggregate")[0] != "fresh":
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(get_or_refresh("test:aggregate", compute, 30), "fresh")
+
+
+class PlayEventBufferTestCase(SimpleTestCase):
+    """Testy zapisu bufora zdarzeń w tle (timer, ponowienie)."""
+
+    @override_settings(
+        AUDIO_PLAY_EVENT_BUFFER_SIZE=100, AUDIO_PLAY_EVENT_FLUSH_SECONDS=0.1
+    )
+    def test_quiet_buffer_is_flushed_by_timer(self):
+        written = threading.Event()
+        batches = []
+
+        def write(batch):
+            batches.append(batch)
+            written.set()
+
+        buffer = PlayEventBuffer()
+        with patch("audio.play_events.write_play_events", side_effect=write):
+            buffer.add([{"event_type": "start"}, {"event_type": "complete"}])
+            self.assertEqual(len(buffer), 2)
+            # Żadnego kolejnego add(): zapis wyzwala timer po terminie
+            self.assertTrue(written.wait(5))
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(len(batches[0]), 2)
+
+    def test_failed_batch_is_retried_once(self):
+        buffer = PlayEventBuffer()
+        batch = [{"event_type": "start"}]
+        with patch(
+            "audio.play_events.write_play_events",
+            side_effect=[OperationalError("partition race"), None],
+        ) as write:
+            buffer._write_in_background(batch)
+        self.assertEqual(write.call_count, 2)
+
+        with patch(
+            "audio.play_events.write_play_events",
+            side_effect=OperationalError("database down"),
+        ) as write:
+            buffer._write_in_background(batch)  # Druga porażka: tylko log
+        self.assertEqual(write.call_count, 2)
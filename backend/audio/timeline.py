@@ -0,0 +1,153 @@
+# audio/timeline.py
+"""
+Home timeline: public uploads of the users one follows, newest first.
+
+Uploads are pushed into a per-follower table on write (`TimelineEntry`, see
+`fan_out_audio_file`), so reading a page is a range scan of one index. For
+uploaders with more than `AUDIO_TIMELINE_PULL_THRESHOLD` followers the push
+would write a row per follower on every upload; their files are pulled at
+read time instead, from the (user_id, uploaded_at) index of the audio files.
+Both sources are merged in one UNION query ordered by (uploaded_at, id),
+which is also the cursor. `trim_timelines` keeps the table bounded.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+from .models import AudioFile, Follow, TimelineEntry, is_pulled_uploader
+
+_TRIM_SQL = f"""
+    DELETE FROM {TimelineEntry._meta.db_table} AS entry
+    USING (
+        SELECT id, row_number() OVER (
+            PARTITION BY user_id ORDER BY uploaded_at DESC, audio_file_id DESC
+        ) AS position
+        FROM {TimelineEntry._meta.db_table}
+    ) AS ranked
+    WHERE entry.id = ranked.id AND ranked.position > %s
+"""
+
+
+def encode_cursor(uploaded_at, audio_file_id):
+    value = f"{uploaded_at.isoformat()}|{audio_file_id}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        uploaded_at, audio_file_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(uploaded_at), int(audio_file_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise NotFound("Invalid cursor")
+
+
+def _before(cursor, id_field):
+    # (uploaded_at, id) < kursor; warunek "<=" na dacie to zakres w indeksie
+    uploaded_at, audio_file_id = cursor
+    return Q(uploaded_at__lte=uploaded_at) & (
+        Q(uploaded_at__lt=uploaded_at) | Q(**{f"{id_field}__lt": audio_file_id})
+    )
+
+
+def timeline_page(user, cursor=None, page_size=None):
+    """
+    Ids of the next page of `user`'s timeline (after `cursor`, an encoded
+    position or None for the first page) and the cursor of the page after
+    it, or None at the end.
+    """
+    page_size = page_size or settings.AUDIO_TIMELINE_PAGE_SIZE
+    pushed = TimelineEntry.objects.filter(user=user, audio_file__is_public=True)
+    popular_followees = Follow.objects.filter(
+        follower=user,
+        followee__audio_stats__follower_count__gt=(
+            settings.AUDIO_TIMELINE_PULL_THRESHOLD
+        ),
+    ).values("followee")
+    pulled = AudioFile.objects.filter(is_public=True, user__in=popular_followees)
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        pushed = pushed.filter(_before(position, "audio_file_id"))
+        pulled = pulled.filter(_before(position, "id"))
+
+    # Każda strona UNION ma własny LIMIT, więc obie czytają tylko początek
+    # indeksu; UNION (bez ALL) usuwa pliki obecne w obu źródłach
+    rows = list(
+        pushed.order_by("-uploaded_at", "-audio_file_id")
+        .values_list("audio_file_id", "uploaded_at")[: page_size + 1]
+        .union(
+            pulled.order_by("-uploaded_at", "-id").values_list("id", "uploaded_at")[
+                : page_size + 1
+            ]
+        )
+        .order_by("-uploaded_at", "-audio_file_id")[: page_size + 1]
+    )
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        audio_file_id, uploaded_at = rows[-1]
+        next_cursor = encode_cursor(uploaded_at, audio_file_id)
+    return [audio_file_id for audio_file_id, _ in rows], next_cursor
+
+
+def follow(user, followee_id):
+    """
+    Makes `user` follow `followee_id`; the followee's recent public uploads
+    are copied into the timeline unless they are pulled at read time.
+    Returns False if the user already followed them.
+    """
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(
+            follower=user, followee_id=followee_id
+        )
+        if not created:
+            return False
+        if not is_pulled_uploader(followee_id):
+            recent = AudioFile.objects.filter(
+                user_id=followee_id, is_public=True
+            ).order_by("-uploaded_at")[: settings.AUDIO_TIMELINE_BACKFILL]
+            TimelineEntry.objects.bulk_create(
+                [
+                    TimelineEntry(
+                        user=user,
+                        audio_file_id=audio_file_id,
+                        uploaded_at=uploaded_at,
+                    )
+                    for audio_file_id, uploaded_at in recent.values_list(
+                        "id", "uploaded_at"
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+    return True
+
+
+def unfollow(user, followee_id):
+    """Stops following and drops the followee's files from the timeline."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            follower=user, followee_id=followee_id
+        ).delete()
+        if not deleted:
+            return False
+        TimelineEntry.objects.filter(
+            user=user, audio_file__user_id=followee_id
+        ).delete()
+    return True
+
+
+def trim_timelines(keep=None):
+    """
+    Deletes the entries beyond the newest `keep` of every user's timeline.
+    Returns the number of deleted entries.
+    """
+    keep = keep or settings.AUDIO_TIMELINE_MAX_ENTRIES
+    with connection.cursor() as cursor:
+        cursor.execute(_TRIM_SQL, [keep])
+        return cursor.rowcount
@@ -0,0 +1,103 @@
+# audio/trending.py
+"""
+Trending score: recent likes, plays and views with exponential time decay.
+
+Scores are stored in log space relative to a fixed epoch:
+
+    log_score = log(sum(weight * exp(rate * (event_time - EPOCH))))
+
+so an event only adds to the score of its own file (log-add-exp) and nothing
+has to be decayed as time passes: all scores decay by the same factor, which
+does not change the ranking. The current value of a score is
+`exp(log_score - rate * (now - EPOCH))`.
+
+The increments come from the deltas read by the daily rollup job
+(`audio.rollups.update_rollups`, `manage.py update_rollups`): new likes,
+plays and views, each weighted by its own time. A withdrawn or flipped
+like is subtracted again with the weight and time it was added with.
+"""
+import math
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TrendingScore
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_rate():
+    """Decay constant per second, from the configured half-life."""
+    return math.log(2) / (settings.AUDIO_TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def _since_epoch(moment):
+    return (moment - EPOCH).total_seconds()
+
+
+def _log_add(a, b):
+    # log(exp(a) + exp(b)) bez przepełnienia; None = brak zdarzeń
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _log_sub(a, b):
+    # log(exp(a) - exp(b)); None, gdy odejmowane zdarzenia to cały wynik
+    if b is None:
+        return a
+    if a is None or b >= a:
+        return None
+    return a + math.log1p(-math.exp(b - a))
+
+
+def current_score(log_score, now=None):
+    """Value of a stored `log_score` at `now` (0 for files without events)."""
+    if log_score is None:
+        return 0.0
+    now = now or timezone.now()
+    return math.exp(log_score - decay_rate() * _since_epoch(now))
+
+
+def _event_log_weight(weight, moment, rate):
+    return math.log(weight) + rate * _since_epoch(moment)
+
+
+def add_trending_event(increments, audio_file_id, weight, moment, rate):
+    """Accumulates an event of `weight` at `moment` into `increments`."""
+    increments[audio_file_id] = _log_add(
+        increments.get(audio_file_id), _event_log_weight(weight, moment, rate)
+    )
+
+
+def add_to_trending_scores(increments, removals=None):
+    """
+    Log-adds `increments` ({audio_file_id: log weight of the new events}) to
+    the stored scores, creating the missing rows, and subtracts `removals`
+    (the same form, for events taken back). Runs inside the caller's
+    transaction.
+    """
+    removals = removals or {}
+    scores = TrendingScore.objects.select_for_update().in_bulk(
+        list(set(increments) | set(removals))
+    )
+    updated_scores = list(scores.values())
+    created_scores = []
+    for audio_file_id, increment in increments.items():
+        score = scores.get(audio_file_id)
+        if score is None:
+            score = scores[audio_file_id] = TrendingScore(audio_file_id=audio_file_id)
+            created_scores.append(score)
+        score.log_score = _log_add(score.log_score, increment)
+    for audio_file_id, removal in removals.items():
+        if audio_file_id in scores:
+            score = scores[audio_file_id]
+            score.log_score = _log_sub(score.log_score, removal)
+
+    TrendingScore.objects.bulk_create(created_scores, batch_size=1000)
+    TrendingScore.objects.bulk_update(updated_scores, ["log_score"], batch_size=1000)
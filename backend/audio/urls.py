@@ -2,14 +2,25 @@ from django.urls import path
 
 from .views import (
     AddLikeView,
+    AudioAutocompleteView,
+    AudioFileAnalyticsView,
     AudioFileDeleteView,
+    AudioFileDetailBatchView,
     AudioFileDetailByUUIDView,
+    AudioFileLikesCountBatchView,
     AudioFileLikesCountView,
     AudioFilesByTagView,
+    AudioFileSearchView,
     AudioFileUploadView,
+    FollowUserView,
+    HomeTimelineView,
     LatestAudioFilesView,
+    PlayEventsView,
+    RelatedTagsView,
+    SimilarAudioFilesView,
     TagListView,
     TopRatedAudioFilesView,
+    TrendingAudioFilesView,
     UserLikedAudioFilesView,
     UserUploadedAudioFilesView,
 )
@@ -19,17 +30,48 @@ app_name = "audio"
 urlpatterns = [
     path("upload/", AudioFileUploadView.as_view(), name="audio-upload"),
     path("latest/", LatestAudioFilesView.as_view(), name="audio-latest"),
+    path("search/", AudioFileSearchView.as_view(), name="audio-search"),
+    path("autocomplete/", AudioAutocompleteView.as_view(), name="audio-autocomplete"),
+    path("batch/", AudioFileDetailBatchView.as_view(), name="audio-detail-batch"),
+    path(
+        "likes-count/",
+        AudioFileLikesCountBatchView.as_view(),
+        name="audio-likes-count-batch",
+    ),
     path("<uuid:uuid>/like/", AddLikeView.as_view(), name="audio-like"),
     path(
         "<uuid:uuid>/likes-count/",
         AudioFileLikesCountView.as_view(),
         name="audio-likes-count",
     ),
+    path(
+        "<uuid:uuid>/analytics/",
+        AudioFileAnalyticsView.as_view(),
+        name="audio-analytics",
+    ),
+    path(
+        "<uuid:uuid>/play-events/",
+        PlayEventsView.as_view(),
+        name="audio-play-events",
+    ),
+    path(
+        "<uuid:uuid>/similar/",
+        SimilarAudioFilesView.as_view(),
+        name="audio-similar",
+    ),
     path("<uuid:uuid>/", AudioFileDetailByUUIDView.as_view(), name="audio-detail"),
     path("<uuid:uuid>/delete/", AudioFileDeleteView.as_view(), name="audio-delete"),
     path("liked/", UserLikedAudioFilesView.as_view(), name="user-liked-audio"),
     path("my-files/", UserUploadedAudioFilesView.as_view(), name="user-uploaded-files"),
+    path("timeline/", HomeTimelineView.as_view(), name="home-timeline"),
+    path("users/<int:user_id>/follow/", FollowUserView.as_view(), name="follow-user"),
     path("tags/", TagListView.as_view(), name="tag-list"),
     path("tags/<str:tag_name>/", AudioFilesByTagView.as_view(), name="audio-by-tag"),
+    path(
+        "tags/<str:tag_name>/related/",
+        RelatedTagsView.as_view(),
+        name="related-tags",
+    ),
     path("top-rated/", TopRatedAudioFilesView.as_view(), name="audio-top-rated"),
+    path("trending/", TrendingAudioFilesView.as_view(), name="audio-trending"),
 ]
@@ -1,8 +1,19 @@
-from django.db.models import Count, ExpressionWrapper, F, FloatField, Q
-from rest_framework import generics, permissions
+import hashlib
+import uuid as uuid_module
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
+from rest_framework import generics, permissions, status
 from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -11,8 +22,88 @@ from accounts.authentication import JWTAuthentication
 from accounts.authentication import OptionalJWTAuthentication
 
 
-from .models import AudioFile, Like, Tag
-from .serializers import AudioFileSerializer, LikeSerializer, TagSerializer
+from .cache import (
+    FEED_SCOPE,
+    SIMILAR_SCOPE,
+    TAG_LIST_SCOPE,
+    TRENDING_SCOPE,
+    cached_response,
+    get_generations,
+    get_or_refresh,
+    likes_scope,
+    tag_scope,
+)
+from .feed import feed_rows, feed_rows_in_order, requested_fields
+from .hll import listener_hash
+from .models import (
+    AudioDailyStats,
+    AudioFile,
+    Like,
+    PlayEvent,
+    Tag,
+    UserAudioStats,
+    adjust_user_audio_stats,
+    follower_count,
+)
+from .pagination import LikedAudioCursorPagination, UploadedAudioCursorPagination
+from .play_events import play_event_buffer
+from .recommendations import similar_audio_ids
+from .rollups import daily_stats
+from .search import autocomplete, search_audio_files
+from .serializers import (
+    AudioFileSerializer,
+    LikeSerializer,
+    PlayEventSerializer,
+    TagSerializer,
+)
+from .tag_pairs import related_tags
+from .timeline import follow, timeline_page, unfollow
+from .votes import cast_vote, retract_vote
+
+User = get_user_model()
+
+USER_AUDIO_STATS_HEADERS = {
+    "X-Audio-File-Count": "file_count",
+    "X-Audio-Total-Bytes": "total_bytes",
+    "X-Audio-Total-Views": "total_views",
+    "X-Audio-Total-Likes": "total_likes",
+}
+
+
+def audio_file_etag(audio_file_id, updated_at, views):
+    """
+    Validator of the detail representation, computed without serializing it:
+    row version (updated_at), the views counter and the votes generation.
+    """
+    (likes_generation,) = get_generations([likes_scope(audio_file_id)])
+    version = f"{audio_file_id}:{updated_at.timestamp()}:{views}:{likes_generation}"
+    return '"%s"' % hashlib.md5(version.encode()).hexdigest()
+
+
+def likes_count_etag(request, uuid):
+    audio_file_id = (
+        AudioFile.objects.filter(uuid=uuid).values_list("id", flat=True).first()
+    )
+    if audio_file_id is None:
+        return None  # Brak walidatora - widok zwróci 404
+    (likes_generation,) = get_generations([likes_scope(audio_file_id)])
+    return f"likes-{audio_file_id}-{likes_generation}"
+
+
+def visible_audio_file(request, uuid):
+    """
+    Id, visibility and owner of the file with `uuid`, if the requester may
+    see it (public, or their own); 404 otherwise.
+    """
+    audio_file = (
+        AudioFile.objects.filter(uuid=uuid).values("id", "is_public", "user_id").first()
+    )
+    if audio_file is None or not (
+        audio_file["is_public"] or audio_file["user_id"] == request.user.pk
+    ):
+        raise NotFound("Audio file not found.")
+    return audio_file
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class AudioFileUploadView(generics.CreateAPIView):
@@ -30,10 +121,13 @@ class AudioFileUploadView(generics.CreateAPIView):
 
 class LatestAudioFilesView(APIView):
     permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
 
+    @cached_response("latest", scopes=lambda request: [FEED_SCOPE])
     def get(self, request):
         page = int(request.query_params.get("page", 1))
         tags_to_filter = request.query_params.getlist("tags") 
+        fields = requested_fields(request.query_params)
 
         page_size = 10
         offset = (page - 1) * page_size
@@ -48,14 +142,14 @@ class LatestAudioFilesView(APIView):
         queryset = queryset.order_by("-uploaded_at")
         
         total_count = queryset.count()
-        results = list(queryset[offset: offset + page_size])
-        
-        serializer = AudioFileSerializer(results, many=True, context={'request': request})
+        results = feed_rows(
+            queryset[offset: offset + page_size], fields, user=request.user
+        )
 
         has_more = total_count > offset + page_size
         return Response(
             {
-                "results": serializer.data,
+                "results": results,
                 "has_more": has_more,
             }
         )
@@ -75,22 +169,26 @@ class LatestAudioFilesView(APIView):
 class UserUploadedAudioFilesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [JWTAuthentication]
-    serializer_class = AudioFileSerializer
+    pagination_class = UploadedAudioCursorPagination
 
     def get_queryset(self):
-        return AudioFile.objects.filter(user=self.request.user).order_by("-uploaded_at")
-
-class UserUploadedAudioFilesView(generics.ListAPIView):
-    
-    permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
-    serializer_class = AudioFileSerializer
+        return AudioFile.objects.filter(user=self.request.user).values(
+            "id", "uploaded_at"
+        )
 
-    def get_queryset(self):
-    
-        return AudioFile.objects.filter(user=self.request.user).order_by(
-            "-uploaded_at"
+    def list(self, request, *args, **kwargs):
+        fields = requested_fields(request.query_params)
+        page = self.paginate_queryset(self.get_queryset())
+        results = feed_rows_in_order(
+            [row["id"] for row in page], fields=fields, user=request.user
         )
+        response = self.get_paginated_response(results)
+
+        # Agregaty z utrzymywanego wiersza statystyk zamiast COUNT/SUM po plikach
+        stats = UserAudioStats.objects.filter(user=request.user).first()
+        for header, field in USER_AUDIO_STATS_HEADERS.items():
+            response[header] = str(getattr(stats, field) if stats else 0)
+        return response
 
 
 class AudioFileDetailByUUIDView(generics.RetrieveAPIView):
@@ -107,8 +205,46 @@ class AudioFileDetailByUUIDView(generics.RetrieveAPIView):
         obj = super().get_object()
         obj.views = getattr(obj, "views", 0) + 1
         obj.save(update_fields=["views"])
+        adjust_user_audio_stats(obj.user_id, total_views=1)
+        # Zdarzenie ze słuchaczem: dzienne wyświetlenia i unikalni słuchacze
+        play_event_buffer.add(
+            [
+                {
+                    "audio_file_id": obj.pk,
+                    "user_id": self.request.user.pk,
+                    "session_id": None,
+                    "listener": listener_hash(self.request),
+                    "event_type": PlayEvent.VIEW,
+                    "position": 0,
+                    "occurred_at": timezone.now(),
+                }
+            ]
+        )
         return obj
 
+    def retrieve(self, request, *args, **kwargs):
+        # Walidator liczony z jednego lekkiego zapytania, przed get_object(),
+        # więc odpytywanie bez zmian (304) nie serializuje i nie nabija wyświetleń
+        state = (
+            AudioFile.objects.filter(uuid=kwargs[self.lookup_field])
+            .values_list("id", "updated_at", "views")
+            .first()
+        )
+        if state is not None:
+            etag = audio_file_etag(*state)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified["ETag"] = etag
+                return not_modified
+
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        response["ETag"] = audio_file_etag(
+            instance.pk, instance.updated_at, instance.views
+        )
+        return response
+
 
 class AudioFileDeleteView(generics.DestroyAPIView):
     serializer_class = AudioFileSerializer
@@ -125,39 +261,105 @@ class AddLikeView(APIView):
     authentication_classes = [JWTAuthentication]
 
     def post(self, request, uuid):
-        try:
-            audio_file = AudioFile.objects.get(uuid=uuid)
-        except AudioFile.DoesNotExist:
-            raise NotFound("Audio file not found.")
-
         is_liked = request.data.get("is_liked")
         if is_liked is None:
             raise ValidationError({"is_liked": "This field is required."})
         if not isinstance(is_liked, bool):
             raise ValidationError({"is_liked": "This field must be a boolean."})
 
-        like, _ = Like.objects.update_or_create(
-            user=request.user,
-            audio_file=audio_file,
-            defaults={"is_liked": is_liked},
-        )
+        vote = cast_vote(request.user, uuid, is_liked)
+        if vote is None:
+            raise NotFound("Audio file not found.")
+        like, totals = vote
 
         serializer = LikeSerializer(like)
-        return Response(serializer.data)
+        return Response({**serializer.data, **totals})
+
+    def delete(self, request, uuid):
+        # Wycofanie głosu; liczniki w odpowiedzi jak w POST
+        totals = retract_vote(request.user, uuid)
+        if totals is None:
+            raise NotFound("Audio file not found.")
+        return Response(totals)
+
+
+class PlayEventsView(APIView):
+    """
+    Accepts playback events for one file: a single event or a client-side
+    batch (a list, or `{"events": [...]}`). Events are only buffered here;
+    they reach the database in batches (see `audio.play_events`).
+    """
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
+
+    def post(self, request, uuid):
+        events = request.data
+        if isinstance(events, dict) and "events" in events:
+            events = events["events"]
+        many = isinstance(events, list)
+        if many and not 0 < len(events) <= settings.AUDIO_PLAY_EVENT_MAX_BATCH:
+            raise ValidationError(
+                {
+                    "events": f"Send between 1 and "
+                    f"{settings.AUDIO_PLAY_EVENT_MAX_BATCH} events."
+                }
+            )
+        serializer = PlayEventSerializer(data=events, many=many)
+        serializer.is_valid(raise_exception=True)
+
+        audio_file = visible_audio_file(request, uuid)
+
+        now = timezone.now()
+        user_id = request.user.pk if request.user.is_authenticated else None
+        listener = listener_hash(request)
+        rows = [
+            {
+                "audio_file_id": audio_file["id"],
+                "user_id": user_id,
+                "session_id": event.get("session_id"),
+                "listener": listener,
+                "event_type": event["type"],
+                "position": event["position"],
+                "occurred_at": event.get("occurred_at", now),
+            }
+            for event in (
+                serializer.validated_data if many else [serializer.validated_data]
+            )
+        ]
+        play_event_buffer.add(rows)
+        return Response({"accepted": len(rows)}, status=status.HTTP_202_ACCEPTED)
 
 
 class UserLikedAudioFilesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [JWTAuthentication]
-    serializer_class = AudioFileSerializer
+    pagination_class = LikedAudioCursorPagination
 
     def get_queryset(self):
-        liked_audio_ids = Like.objects.filter(
-            user=self.request.user, is_liked=True
-        ).values_list("audio_file_id", flat=True)
-        return AudioFile.objects.filter(id__in=liked_audio_ids)
+        user = self.request.user
+        # Jeden JOIN przez Like (warunki w jednym filter()), najnowsze polubienia
+        # najpierw; pliki, które stały się prywatne, są pomijane
+        return (
+            AudioFile.objects.filter(
+                Q(is_public=True) | Q(user=user),
+                likes__user=user,
+                likes__is_liked=True,
+            )
+            .annotate(liked_at=F("likes__created_at"))
+            .values("id", "liked_at")
+        )
+
+    def list(self, request, *args, **kwargs):
+        fields = requested_fields(request.query_params)
+        page = self.paginate_queryset(self.get_queryset())
+        results = feed_rows_in_order(
+            [row["id"] for row in page], fields=fields, user=request.user
+        )
+        return self.get_paginated_response(results)
 
 
+@method_decorator(condition(etag_func=likes_count_etag), name="get")
 class AudioFileLikesCountView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -176,32 +378,279 @@ class AudioFileLikesCountView(APIView):
         })
 
 
-class TopRatedAudioFilesView(APIView):
+def batch_audio_files(request):
+    """
+    Parses the `uuids` query param (comma separated, repeatable) of a batch
+    endpoint and loads the files in one query. Returns the files visible to
+    the requester ({uuid: id}) and per-item errors ({uuid: message}).
+    """
+    requested = [
+        value.strip()
+        for param in request.query_params.getlist("uuids")
+        for value in param.split(",")
+        if value.strip()
+    ]
+    if not requested:
+        raise ValidationError({"uuids": "This query parameter is required."})
+    if len(requested) > settings.AUDIO_BATCH_MAX_UUIDS:
+        raise ValidationError(
+            {"uuids": f"At most {settings.AUDIO_BATCH_MAX_UUIDS} UUIDs are allowed."}
+        )
+
+    # Poprawne UUID w postaci kanonicznej (kolejność żądania, bez duplikatów);
+    # tylko niepoprawne wartości trafiają do errors w surowej postaci
+    errors = {}
+    uuids = {}
+    for value in dict.fromkeys(requested):
+        try:
+            uuids[str(uuid_module.UUID(value))] = None
+        except ValueError:
+            errors[value] = "Invalid UUID."
+
+    rows = AudioFile.objects.filter(uuid__in=list(uuids)).values_list(
+        "uuid", "id", "is_public", "user_id"
+    )
+    found = {}
+    for audio_uuid, audio_file_id, is_public, user_id in rows:
+        if is_public or user_id == request.user.pk:
+            found[str(audio_uuid)] = audio_file_id
+        else:
+            errors[str(audio_uuid)] = "Audio file is private."
+    for audio_uuid in uuids:
+        if audio_uuid not in found and audio_uuid not in errors:
+            errors[audio_uuid] = "Audio file not found."
+    # Wyniki w kolejności żądania
+    return {uuid: found[uuid] for uuid in uuids if uuid in found}, errors
+
+
+class AudioFileLikesCountBatchView(APIView):
+    """Vote totals for up to AUDIO_BATCH_MAX_UUIDS files in one response."""
+
     permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
 
     def get(self, request):
-        search_query = request.query_params.get("search", "")
-        queryset = AudioFile.objects.filter(is_public=True)
+        found, errors = batch_audio_files(request)
+        totals = (
+            Like.objects.filter(audio_file_id__in=found.values())
+            .values("audio_file_id")
+            .annotate(
+                likes=Count("id", filter=Q(is_liked=True)),
+                dislikes=Count("id", filter=Q(is_liked=False)),
+            )
+            .order_by()
+        )
+        totals = {row["audio_file_id"]: row for row in totals}
 
-        if search_query:
-            queryset = queryset.filter(title__icontains=search_query)
+        results = {}
+        for audio_uuid, audio_file_id in found.items():
+            row = totals.get(audio_file_id, {"likes": 0, "dislikes": 0})
+            results[audio_uuid] = {"likes": row["likes"], "dislikes": row["dislikes"]}
+        return Response({"results": results, "errors": errors})
 
-        queryset = (
-            queryset.annotate(
-                likes_count=Count("likes", filter=Q(likes__is_liked=True)),
-                dislikes_count=Count("likes", filter=Q(likes__is_liked=False)),
-            )
-            .annotate(
-                like_ratio=ExpressionWrapper(
-                    (1.0 * F("likes_count")) / (F("dislikes_count") + 1.0),
-                    output_field=FloatField(),
+
+class AudioFileDetailBatchView(APIView):
+    """
+    Details of up to AUDIO_BATCH_MAX_UUIDS files in one response, built by
+    the list read path (supports `fields=` / `view=compact`). Unlike the
+    detail endpoint it does not count views.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
+
+    def get(self, request):
+        fields = requested_fields(request.query_params)
+        found, errors = batch_audio_files(request)
+        audio_uuids = {audio_file_id: uuid for uuid, audio_file_id in found.items()}
+        # "id" potrzebne do przypisania wierszy, usuwane jeśli nie wybrano go w fields
+        rows = feed_rows_in_order(
+            list(found.values()),
+            fields=fields if "id" in fields else fields + ("id",),
+            user=request.user,
+        )
+        results = {}
+        for row in rows:
+            audio_file_id = row["id"] if "id" in fields else row.pop("id")
+            results[audio_uuids[audio_file_id]] = row
+        return Response({"results": results, "errors": errors})
+
+
+class SimilarAudioFilesView(APIView):
+    """
+    "More like this": public files liked by the same listeners (neighbour
+    lists built by `manage.py build_similar_audio`), or sharing the most tags
+    when the file has no neighbours yet.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
+
+    @cached_response(
+        "similar", scopes=lambda request, uuid: [FEED_SCOPE, SIMILAR_SCOPE]
+    )
+    def get(self, request, uuid):
+        fields = requested_fields(request.query_params)
+        audio_file = visible_audio_file(request, uuid)
+
+        ids, source = similar_audio_ids(
+            audio_file["id"], settings.AUDIO_SIMILAR_NEIGHBORS
+        )
+        results = feed_rows_in_order(
+            ids, AudioFile.objects.filter(is_public=True), fields, user=request.user
+        )
+        return Response({"results": results, "source": source})
+
+
+def _like_ratio(likes, dislikes):
+    return ExpressionWrapper(
+        (1.0 * F(likes)) / (F(dislikes) + 1.0), output_field=FloatField()
+    )
+
+
+def recent_top_rated_ranking(days, search_query=""):
+    """
+    Ids of public audio files liked in the last `days` days, ordered by the
+    like ratio of the votes cast in that window (summed daily stats).
+    """
+    first_day = timezone.now().date() - timedelta(days=days - 1)
+    queryset = AudioDailyStats.objects.filter(
+        day__gte=first_day, audio_file__is_public=True
+    )
+
+    if search_query:
+        queryset = queryset.filter(audio_file__title__icontains=search_query)
+
+    queryset = (
+        queryset.values("audio_file_id")
+        .annotate(likes_count=Sum("likes"), dislikes_count=Sum("dislikes"))
+        .filter(likes_count__gt=0)
+        .annotate(like_ratio=_like_ratio("likes_count", "dislikes_count"))
+        .order_by("-like_ratio", "-audio_file__uploaded_at")
+    )
+    return list(queryset.values_list("audio_file_id", flat=True))
+
+
+def top_rated_ranking(search_query=""):
+    """Ids of public audio files ordered by like ratio (the heavy aggregate)."""
+    queryset = AudioFile.objects.filter(is_public=True)
+
+    if search_query:
+        queryset = queryset.filter(title__icontains=search_query)
+
+    queryset = (
+        queryset.annotate(
+            likes_count=Count("likes", filter=Q(likes__is_liked=True)),
+            dislikes_count=Count("likes", filter=Q(likes__is_liked=False)),
+        )
+        .annotate(like_ratio=_like_ratio("likes_count", "dislikes_count"))
+        .order_by("-like_ratio", "-uploaded_at")
+    )
+    return list(queryset.values_list("id", flat=True))
+
+
+def tag_audio_counts():
+    return dict(
+        Tag.objects.annotate(audio_count=Count("audio_files")).values_list(
+            "id", "audio_count"
+        )
+    )
+
+
+class TopRatedAudioFilesView(APIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
+
+    @cached_response(
+        "top-rated",
+        scopes=lambda request: (
+            [FEED_SCOPE, TRENDING_SCOPE]
+            if "days" in request.query_params
+            else [FEED_SCOPE]
+        ),
+    )
+    def get(self, request):
+        search_query = request.query_params.get("search", "")
+        fields = requested_fields(request.query_params)
+        days = request.query_params.get("days")
+
+        if days is not None:
+            # Okno ostatnich N dni czytane z dziennych statystyk
+            try:
+                days = int(days)
+            except ValueError:
+                raise ValidationError({"days": "This field must be an integer."})
+            days = max(1, min(days, settings.AUDIO_ANALYTICS_MAX_DAYS))
+            if search_query:
+                ranking = recent_top_rated_ranking(days, search_query)
+            else:
+                feed_generation, stats_generation = get_generations(
+                    [FEED_SCOPE, TRENDING_SCOPE]
                 )
+                ranking = get_or_refresh(
+                    f"audio:aggregate:top-rated:{days}:"
+                    f"{feed_generation}:{stats_generation}",
+                    lambda: recent_top_rated_ranking(days),
+                    settings.AUDIO_AGGREGATE_CACHE_TIMEOUT,
+                )
+        elif search_query:
+            ranking = top_rated_ranking(search_query)
+        else:
+            # Generacja w kluczu: po zmianie danych liczymy od nowa (jeden worker),
+            # a po samym wygaśnięciu TTL serwujemy poprzedni ranking
+            (feed_generation,) = get_generations([FEED_SCOPE])
+            ranking = get_or_refresh(
+                f"audio:aggregate:top-rated:{feed_generation}",
+                top_rated_ranking,
+                settings.AUDIO_AGGREGATE_CACHE_TIMEOUT,
+            )
+
+        return Response(
+            feed_rows_in_order(
+                ranking,
+                AudioFile.objects.filter(is_public=True),
+                fields,
+                user=request.user,
             )
-            .order_by("-like_ratio", "-uploaded_at")
         )
 
-        serializer = AudioFileSerializer(queryset, many=True)
-        return Response(serializer.data)
+
+class TrendingAudioFilesView(APIView):
+    """
+    Public audio files ordered by their time-decayed trending score, read from
+    the score index maintained by `manage.py update_rollups`.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
+
+    @cached_response("trending", scopes=lambda request: [FEED_SCOPE, TRENDING_SCOPE])
+    def get(self, request):
+        try:
+            page = int(request.query_params.get("page", 1))
+        except ValueError:
+            raise ValidationError({"page": "This field must be an integer."})
+        if page < 1:
+            raise ValidationError({"page": "Ensure this value is at least 1."})
+        fields = requested_fields(request.query_params)
+
+        page_size = 10
+        offset = (page - 1) * page_size
+
+        queryset = AudioFile.objects.filter(
+            is_public=True, trending__log_score__isnull=False
+        ).order_by(F("trending__log_score").desc(nulls_last=True), "-uploaded_at")
+
+        # Jeden wiersz więcej zamiast count() po całym rankingu
+        results = feed_rows(
+            queryset[offset : offset + page_size + 1], fields, user=request.user
+        )
+        return Response(
+            {
+                "results": results[:page_size],
+                "has_more": len(results) > page_size,
+            }
+        )
 
 
 class TagListView(generics.ListAPIView):
@@ -209,13 +658,157 @@ class TagListView(generics.ListAPIView):
     serializer_class = TagSerializer
     permission_classes = [permissions.AllowAny]
 
+    @cached_response("tag-list", scopes=lambda request: [TAG_LIST_SCOPE])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        (tag_list_generation,) = get_generations([TAG_LIST_SCOPE])
+        context["audio_counts"] = get_or_refresh(
+            f"audio:aggregate:tag-counts:{tag_list_generation}",
+            tag_audio_counts,
+            settings.AUDIO_AGGREGATE_CACHE_TIMEOUT,
+        )
+        return context
+
+
+class FollowUserView(APIView):
+    """Follow (POST) or unfollow (DELETE) an uploader."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request, user_id):
+        if user_id == request.user.pk:
+            raise ValidationError({"user": "You cannot follow yourself."})
+        if not User.objects.filter(pk=user_id).exists():
+            raise NotFound("User not found.")
+        created = follow(request.user, user_id)
+        return Response(
+            {"following": True, "followers": follower_count(user_id)},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def delete(self, request, user_id):
+        unfollow(request.user, user_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class HomeTimelineView(APIView):
+    """
+    Public uploads of the followed users, newest first, with cursor
+    pagination (`?cursor=` from the previous page's `next`).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        fields = requested_fields(request.query_params)
+        ids, next_cursor = timeline_page(
+            request.user, request.query_params.get("cursor")
+        )
+        results = feed_rows_in_order(
+            ids, AudioFile.objects.filter(is_public=True), fields, user=request.user
+        )
+        next_url = None
+        if next_cursor is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", next_cursor
+            )
+        return Response({"next": next_url, "results": results})
+
+
+def _query_date(query_params, name, default):
+    value = query_params.get(name)
+    if value is None:
+        return default
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({name: "Enter a date in the YYYY-MM-DD format."})
+    return day
+
+
+class AudioFileAnalyticsView(APIView):
+    """
+    Daily views, unique listeners, plays, completed plays and votes of one
+    of the requester's own files (`?from=&to=`, UTC days), read from the
+    daily stats maintained by `manage.py update_rollups`.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, uuid):
+        audio_file = (
+            AudioFile.objects.filter(uuid=uuid, user=request.user)
+            .values("id")
+            .first()
+        )
+        if audio_file is None:
+            raise NotFound("Audio file not found.")
+
+        last_day = _query_date(request.query_params, "to", timezone.now().date())
+        default_first_day = last_day - timedelta(
+            days=settings.AUDIO_ANALYTICS_DEFAULT_DAYS - 1
+        )
+        first_day = _query_date(request.query_params, "from", default_first_day)
+        if first_day > last_day:
+            raise ValidationError({"from": "Must not be later than 'to'."})
+        if (last_day - first_day).days >= settings.AUDIO_ANALYTICS_MAX_DAYS:
+            raise ValidationError(
+                {
+                    "from": "The range is limited to "
+                    f"{settings.AUDIO_ANALYTICS_MAX_DAYS} days."
+                }
+            )
+
+        days, totals = daily_stats(audio_file["id"], first_day, last_day)
+        return Response(
+            {"from": first_day, "to": last_day, "days": days, "totals": totals}
+        )
+
+
+class RelatedTagsView(APIView):
+    """Tags most often used together with the given tag (NPMI ranking)."""
+
+    permission_classes = [permissions.AllowAny]
+
+    @cached_response(
+        "related-tags", scopes=lambda request, tag_name: [TAG_LIST_SCOPE]
+    )
+    def get(self, request, tag_name):
+        try:
+            limit = int(
+                request.query_params.get(
+                    "limit", settings.AUDIO_RELATED_TAGS_DEFAULT_LIMIT
+                )
+            )
+        except ValueError:
+            raise ValidationError({"limit": "This field must be an integer."})
+        limit = max(1, min(limit, settings.AUDIO_RELATED_TAGS_MAX_LIMIT))
+
+        tag = Tag.objects.filter(name__iexact=tag_name).first()
+        if tag is None:
+            raise NotFound("Tag not found.")
+        return Response({"tag": tag.name, "related": related_tags(tag, limit)})
+
 
 class AudioFilesByTagView(APIView): # Changed from ListAPIView to APIView
 
     permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
 
+    @cached_response(
+        "by-tag", scopes=lambda request, tag_name: [tag_scope(tag_name)]
+    )
     def get(self, request, tag_name):
         page = int(request.query_params.get("page", 1))
+        fields = requested_fields(request.query_params)
         page_size = 10
         offset = (page - 1) * page_size
 
@@ -224,17 +817,69 @@ class AudioFilesByTagView(APIView): # Changed from ListAPIView to APIView
         ).order_by("-uploaded_at")
 
         total_count = queryset.count()
-        results = list(queryset[offset : offset + page_size])
-
-        # Pass request to serializer context to build full URLs for files
-        serializer = AudioFileSerializer(results, many=True, context={'request': request})
+        results = feed_rows(
+            queryset[offset : offset + page_size], fields, user=request.user
+        )
 
         has_more = total_count > offset + page_size
 
         return Response(
             {
-                "results": serializer.data,
+                "results": results,
+                "has_more": has_more,
+            }
+        )
+
+
+class AudioFileSearchView(APIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [OptionalJWTAuthentication]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This query parameter is required."})
+
+        try:
+            page = int(request.query_params.get("page", 1))
+        except ValueError:
+            raise ValidationError({"page": "This field must be an integer."})
+        if page < 1:
+            raise ValidationError({"page": "Ensure this value is at least 1."})
+        fields = requested_fields(request.query_params)
+        page_size = 10
+        offset = (page - 1) * page_size
+
+        # Pobieramy jeden element więcej, żeby ustalić has_more bez COUNT(*)
+        results = search_audio_files(query, offset, page_size + 1)
+        has_more = len(results) > page_size
+
+        return Response(
+            {
+                "results": feed_rows_in_order(
+                    results[:page_size], fields=fields, user=request.user
+                ),
                 "has_more": has_more,
             }
         )
 
+
+class AudioAutocompleteView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"suggestions": []})
+
+        try:
+            limit = int(
+                request.query_params.get(
+                    "limit", settings.AUDIO_AUTOCOMPLETE_DEFAULT_LIMIT
+                )
+            )
+        except ValueError:
+            raise ValidationError({"limit": "This field must be an integer."})
+        limit = max(1, min(limit, settings.AUDIO_AUTOCOMPLETE_MAX_LIMIT))
+
+        return Response({"suggestions": autocomplete(query, limit)})
@@ -0,0 +1,122 @@
+# audio/votes.py
+from django.db import connection, transaction
+
+from .cache import FEED_SCOPE, bump_generations, likes_scope, tag_scope
+from .models import (
+    AudioFile,
+    Like,
+    Tag,
+    adjust_user_audio_stats,
+    record_vote_change,
+)
+
+_AUDIO_TABLE = AudioFile._meta.db_table
+_LIKE_TABLE = Like._meta.db_table
+_AUDIO_TAGS_TABLE = AudioFile.tags.through._meta.db_table
+_TAG_TABLE = Tag._meta.db_table
+
+# Jedno polecenie zamiast get + update_or_create: brak wyścigu przy podwójnym
+# kliknięciu, konflikt na unique (user, audio_file) zamienia INSERT w UPDATE.
+# Wiersz wraca tylko gdy głos powstał lub się zmienił (xmax = 0 dla INSERT).
+_UPSERT_VOTE_SQL = f"""
+    INSERT INTO {_LIKE_TABLE} AS vote
+        (id, user_id, audio_file_id, is_liked, created_at)
+    SELECT gen_random_uuid(), %s, audio.id, %s, now()
+    FROM {_AUDIO_TABLE} AS audio
+    WHERE audio.uuid = %s
+    ON CONFLICT (user_id, audio_file_id) DO UPDATE SET is_liked = EXCLUDED.is_liked
+    WHERE vote.is_liked IS DISTINCT FROM EXCLUDED.is_liked
+    RETURNING id, audio_file_id, is_liked, created_at, (xmax = 0) AS inserted
+"""
+
+_DELETE_VOTE_SQL = f"""
+    DELETE FROM {_LIKE_TABLE} AS vote
+    USING {_AUDIO_TABLE} AS audio
+    WHERE vote.audio_file_id = audio.id AND audio.uuid = %s AND vote.user_id = %s
+    RETURNING vote.audio_file_id, vote.is_liked, vote.created_at
+"""
+
+# Liczniki po zmianie (to samo połączenie i transakcja, więc widzą nowy głos)
+# oraz nazwy tagów i właściciel potrzebni do unieważnienia cache i statystyk
+_TOTALS_SQL = f"""
+    SELECT
+        count(*) FILTER (WHERE is_liked),
+        count(*) FILTER (WHERE NOT is_liked),
+        ARRAY(
+            SELECT tag.name
+            FROM {_AUDIO_TAGS_TABLE} AS link
+            JOIN {_TAG_TABLE} AS tag ON tag.id = link.tag_id
+            WHERE link.audiofile_id = %s
+        ),
+        (SELECT user_id FROM {_AUDIO_TABLE} WHERE id = %s)
+    FROM {_LIKE_TABLE}
+    WHERE audio_file_id = %s
+"""
+
+
+def _totals(cursor, audio_file_id, likes_delta=None):
+    cursor.execute(_TOTALS_SQL, [audio_file_id] * 3)
+    likes, dislikes, tag_names, owner_id = cursor.fetchone()
+    if likes_delta is not None:
+        # Surowy SQL omija sygnały modelu Like, więc statystyki właściciela
+        # i generacje cache aktualizujemy sami
+        adjust_user_audio_stats(owner_id, total_likes=likes_delta)
+        scopes = [FEED_SCOPE, likes_scope(audio_file_id)]
+        scopes += [tag_scope(name) for name in tag_names]
+        transaction.on_commit(lambda: bump_generations(scopes))
+    return {"likes": likes, "dislikes": dislikes}
+
+
+def cast_vote(user, audio_uuid, is_liked):
+    """
+    Creates or changes the user's vote on the audio file with `audio_uuid`.
+    Returns the vote (an unsaved `Like` built from the RETURNING row) and the
+    fresh totals, or `None` when the file does not exist.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_UPSERT_VOTE_SQL, [user.pk, is_liked, audio_uuid])
+        row = cursor.fetchone()
+        if row is None:
+            # Taki sam głos już istniał (albo pliku nie ma) - nic się nie zmieniło
+            like = Like.objects.filter(user=user, audio_file__uuid=audio_uuid).first()
+            if like is None:
+                return None
+            return like, _totals(cursor, like.audio_file_id)
+
+        like_id, audio_file_id, is_liked, created_at, inserted = row
+        like = Like(
+            id=like_id,
+            user=user,
+            audio_file_id=audio_file_id,
+            is_liked=is_liked,
+            created_at=created_at,
+        )
+        if inserted:
+            likes_delta = 1 if is_liked else 0
+        else:
+            likes_delta = 1 if is_liked else -1
+            record_vote_change(audio_file_id, not is_liked, is_liked, created_at)
+        return like, _totals(cursor, audio_file_id, likes_delta)
+
+
+def retract_vote(user, audio_uuid):
+    """
+    Removes the user's vote, if any. Returns the fresh totals, or `None` when
+    the file does not exist.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_DELETE_VOTE_SQL, [audio_uuid, user.pk])
+        row = cursor.fetchone()
+        if row is None:
+            # Brak głosu - nic się nie zmieniło, ale plik musi istnieć
+            audio_file_id = (
+                AudioFile.objects.filter(uuid=audio_uuid)
+                .values_list("id", flat=True)
+                .first()
+            )
+            if audio_file_id is None:
+                return None
+            return _totals(cursor, audio_file_id)
+        audio_file_id, was_liked, created_at = row
+        record_vote_change(audio_file_id, was_liked, None, created_at)
+        return _totals(cursor, audio_file_id, -1 if was_liked else 0)
@@ -8,3 +8,4 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ("user", "audio_file_id", "content", "created_at")
     search_fields = ("user__email", "content")
     list_filter = ("created_at",)
+    list_select_related = ("user",)
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:48
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY nie może działać w transakcji; tabele nie są
+    # blokowane dla zapisów na czas budowania indeksu
+    atomic = False
+
+    dependencies = [
+        ("comments", "0002_comment_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="comment",
+            index=models.Index(
+                fields=["audio_file_id", "-created_at"],
+                name="comment_audio_created_idx",
+            ),
+        ),
+    ]
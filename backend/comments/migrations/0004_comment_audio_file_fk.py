@@ -0,0 +1,92 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+BATCH_SIZE = 1000
+
+FK_NAME = "comments_comment_audio_file_id_fk_audio_audiofile_uuid"
+
+
+def delete_orphaned_comments(apps, schema_editor):
+    # Komentarze usuniętych plików (dawniej nic ich nie kasowało) złamałyby
+    # klucz obcy; usuwamy je partiami, każda partia to osobna transakcja
+    AudioFile = apps.get_model("audio", "AudioFile")
+    Comment = apps.get_model("comments", "Comment")
+    orphaned = Comment.objects.filter(
+        ~Exists(AudioFile.objects.filter(uuid=OuterRef("audio_file_id")))
+    )
+    deleted = 0
+    while True:
+        batch = list(orphaned.values_list("pk", flat=True)[:BATCH_SIZE])
+        if not batch:
+            break
+        deleted += Comment.objects.filter(pk__in=batch).delete()[0]
+    if deleted:
+        print(f"\n  Deleted {deleted} comments of deleted audio files.")
+
+
+class Migration(migrations.Migration):
+    # Kolumna audio_file_id już przechowuje uuid pliku, więc zamiana na klucz
+    # obcy nie przepisuje wierszy: ograniczenie NOT VALID sprawdza od razu nowe
+    # zapisy, a VALIDATE (po usunięciu osieroconych komentarzy) nie blokuje
+    # zapisów; indeksy są budowane CONCURRENTLY, poza transakcją
+    atomic = False
+
+    dependencies = [
+        ("audio", "0013_follow_timeline"),
+        ("comments", "0003_hot_path_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    f"ALTER TABLE comments_comment ADD CONSTRAINT {FK_NAME} "
+                    "FOREIGN KEY (audio_file_id) REFERENCES audio_audiofile (uuid) "
+                    "DEFERRABLE INITIALLY DEFERRED NOT VALID",
+                    reverse_sql=f"ALTER TABLE comments_comment DROP CONSTRAINT {FK_NAME}",
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveField(
+                    model_name="comment",
+                    name="audio_file_id",
+                ),
+                migrations.AddField(
+                    model_name="comment",
+                    name="audio_file",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="comments",
+                        to="audio.audiofile",
+                        to_field="uuid",
+                    ),
+                ),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name="comment",
+            index=models.Index(
+                fields=["audio_file", "parent_comment", "-created_at"],
+                name="comment_audio_thread_idx",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="comment",
+            name="comment_audio_created_idx",
+        ),
+        migrations.RunPython(delete_orphaned_comments, migrations.RunPython.noop),
+        migrations.RunSQL(
+            f"ALTER TABLE comments_comment VALIDATE CONSTRAINT {FK_NAME}",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
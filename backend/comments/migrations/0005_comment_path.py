@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def segment(alias):
+    # Odpowiednik comments.models.path_segment (mikrosekundy od epoki w hex
+    # i początek id), zamrożony na potrzeby migracji
+    return (
+        f"lpad(to_hex((extract(epoch FROM {alias}.created_at) * 1000000)::bigint), "
+        f"13, '0') || left(replace({alias}.id::text, '-', ''), 8)"
+    )
+
+
+# Ścieżki istniejących komentarzy jednym rekurencyjnym zapytaniem: od
+# komentarzy głównych w dół, poziom po poziomie
+COMPUTE_PATHS_SQL = f"""
+    WITH RECURSIVE tree (id, path) AS (
+        SELECT comment.id, {segment("comment")}
+        FROM comments_comment AS comment
+        WHERE comment.parent_comment_id IS NULL
+      UNION ALL
+        SELECT child.id, tree.path || {segment("child")}
+        FROM comments_comment AS child
+        JOIN tree ON child.parent_comment_id = tree.id
+    )
+    UPDATE comments_comment AS comment
+    SET path = tree.path
+    FROM tree
+    WHERE comment.id = tree.id
+"""
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY nie może działać w transakcji
+    atomic = False
+
+    dependencies = [
+        ("comments", "0004_comment_audio_file_fk"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.TextField(db_collation="C", default="", editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(COMPUTE_PATHS_SQL, reverse_sql=migrations.RunSQL.noop),
+        AddIndexConcurrently(
+            model_name="comment",
+            index=models.Index(fields=["path"], name="comment_path_idx"),
+        ),
+    ]
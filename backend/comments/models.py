@@ -1,7 +1,21 @@
 import uuid
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+# Segment ścieżki: 13 cyfr hex mikrosekund od epoki + 8 cyfr hex id, więc
+# kolejność ścieżek (kolacja "C") to kolejność wątku: rodzic przed
+# odpowiedziami, rodzeństwo od najstarszego
+PATH_SEGMENT_LENGTH = 21
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def path_segment(moment, comment_id):
+    microseconds = (moment - _EPOCH) // timedelta(microseconds=1)
+    return f"{microseconds:013x}{comment_id.hex[:8]}"
 
 
 class Comment(models.Model):
@@ -9,18 +23,50 @@ class Comment(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments"
     )
-    audio_file_id = models.UUIDField()
+    # Kolumna audio_file_id przechowuje uuid pliku (nie jego id), jak przed
+    # zamianą na klucz obcy; indeks zapewnia comment_audio_thread_idx
+    audio_file = models.ForeignKey(
+        "audio.AudioFile",
+        to_field="uuid",
+        on_delete=models.CASCADE,
+        related_name="comments",
+        db_index=False,
+    )
     parent_comment = models.ForeignKey(
         "self", on_delete=models.CASCADE, related_name="replies", null=True, blank=True
     )
+    # Ścieżka zmaterializowana: segmenty wszystkich przodków i komentarza;
+    # poddrzewo to zakres ścieżek z tym samym prefiksem (comment_path_idx)
+    path = models.TextField(db_collation="C", editable=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Komentarze (lub odpowiedzi) pliku audio od najnowszego
+            models.Index(
+                fields=["audio_file", "parent_comment", "-created_at"],
+                name="comment_audio_thread_idx",
+            ),
+            models.Index(fields=["path"], name="comment_path_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user.email} on audio {self.audio_file_id}"
 
+    def save(self, *args, **kwargs):
+        # Ścieżka powstaje raz, przy wstawieniu; komentarzy się nie przenosi
+        if self._state.adding and not self.path:
+            parent_path = self.parent_comment.path if self.parent_comment_id else ""
+            self.path = parent_path + path_segment(timezone.now(), self.id)
+        super().save(*args, **kwargs)
+
     def is_reply(self):
         return self.parent_comment is not None
+
+    @property
+    def depth(self):
+        """0 for a top-level comment, 1 for a reply, and so on."""
+        return len(self.path) // PATH_SEGMENT_LENGTH - 1
@@ -0,0 +1,24 @@
+# comments/pagination.py
+from rest_framework.pagination import CursorPagination
+
+# Odpowiedzi w kolejności dodania - podgląd i dalsze strony to jedna sekwencja
+REPLY_ORDERING = ("created_at", "id")
+
+
+class CommentCursorPagination(CursorPagination):
+    # Najnowsze komentarze najpierw; id rozstrzyga remisy created_at, więc
+    # kolejność (a z nią przesunięcie w kursorze) jest stała. Indeks
+    # (audio_file_id, parent_comment_id, created_at) obsługuje filtr i sortowanie
+    page_size = 20
+    ordering = ("-created_at", "-id")
+
+
+class ReplyCursorPagination(CursorPagination):
+    page_size = 20
+    ordering = REPLY_ORDERING
+
+
+class ThreadCursorPagination(CursorPagination):
+    # Kolejność wątku to kolejność ścieżek (indeks comment_path_idx)
+    page_size = 50
+    ordering = "path"
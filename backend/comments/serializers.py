@@ -12,6 +12,7 @@ class UserCommentSerializer(serializers.ModelSerializer):
 
 class ReplySerializer(serializers.ModelSerializer):
     user = UserCommentSerializer(read_only=True)
+    audio_file_id = serializers.UUIDField(read_only=True)
 
     class Meta:
         model = Comment
@@ -32,9 +33,24 @@ class ReplySerializer(serializers.ModelSerializer):
         ]
 
 
+class ThreadReplySerializer(ReplySerializer):
+    # Głębokość względem korzenia pobieranego wątku (1 = odpowiedź)
+    depth = serializers.SerializerMethodField()
+
+    class Meta(ReplySerializer.Meta):
+        fields = ReplySerializer.Meta.fields + ["depth"]
+
+    def get_depth(self, obj):
+        return obj.depth - self.context["root_depth"]
+
+
 class CommentSerializer(serializers.ModelSerializer):
     user = UserCommentSerializer(read_only=True)
-    replies = ReplySerializer(many=True, read_only=True)
+    audio_file_id = serializers.UUIDField(read_only=True)
+    # Podgląd pierwszych odpowiedzi i ich liczba (with_replies); dalsze
+    # odpowiedzi zwraca endpoint odpowiedzi komentarza
+    replies = ReplySerializer(many=True, read_only=True, source="preview_replies")
+    reply_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Comment
@@ -46,6 +62,7 @@ class CommentSerializer(serializers.ModelSerializer):
             "content",
             "created_at",
             "replies",
+            "reply_count",
         ]
         read_only_fields = [
             "id",
@@ -59,4 +76,8 @@ class CommentSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data["user"] = self.context["request"].user
         validated_data["audio_file_id"] = self.context["audio_uuid"]
-        return super().create(validated_data)
+        comment = super().create(validated_data)
+        # Nowy komentarz nie ma odpowiedzi
+        comment.preview_replies = []
+        comment.reply_count = 0
+        return comment
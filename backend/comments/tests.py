@@ -1,3 +1,252 @@
-from django.test import TestCase
+import uuid
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from audio.models import AudioFile
+
+from .models import Comment
+from .pagination import ThreadCursorPagination
+
+User = get_user_model()
+
+
+@patch("storages.backends.s3.S3Storage._save", lambda self, name, content: name)
+@patch("audio.models.boto3.client")
+class CommentAPITestCase(APITestCase):
+    """
+    Zestaw testów dla endpointów API aplikacji 'comments'.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="commenter@example.com", password="testpassword123", name="Commenter"
+        )
+        cls.audio_file = AudioFile.objects.create(
+            user=cls.user,
+            title="Commented Song",
+            file=SimpleUploadedFile(
+                "track.mp3", b"fake audio content", content_type="audio/mpeg"
+            ),
+        )
+        cls.comment = Comment.objects.create(
+            user=cls.user, audio_file_id=cls.audio_file.uuid, content="First!"
+        )
+        cls.list_url = reverse(
+            "comment-list-create", kwargs={"audio_uuid": cls.audio_file.uuid}
+        )
+
+    # --- Testy ETag / warunkowego GET ---
+    def test_comment_list_conditional_get(self, mock_boto_client):
+        etag = self.client.get(self.list_url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.comment.content = "Edited"
+        self.comment.save()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["content"], "Edited")
+
+    def test_comment_list_etag_changes_after_delete(self, mock_boto_client):
+        Comment.objects.create(
+            user=self.user, audio_file_id=self.audio_file.uuid, content="Second"
+        )
+        etag = self.client.get(self.list_url)["ETag"]
+        self.comment.delete()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_comment_list_etag_changes_after_author_rename(self, mock_boto_client):
+        etag = self.client.get(self.list_url)["ETag"]
+        self.user.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["user"]["name"], "Renamed")
+
+    # --- Testy ładowania wątków (stała liczba zapytań) ---
+    def _create_thread(self, replies):
+        users = [
+            User.objects.create_user(
+                email=f"replier{index}-{uuid.uuid4()}@example.com",
+                password="x",
+                name=f"R{index}",
+            )
+            for index in range(replies)
+        ]
+        parent = Comment.objects.create(
+            user=users[0], audio_file=self.audio_file, content="Thread"
+        )
+        for index, user in enumerate(users):
+            Comment.objects.create(
+                user=user,
+                audio_file=self.audio_file,
+                parent_comment=parent,
+                content=f"Reply {index}",
+            )
+        return parent
+
+    @override_settings(COMMENT_REPLY_PREVIEW=2)
+    def test_comment_list_loads_threads_in_constant_queries(self, mock_boto_client):
+        for _ in range(3):
+            self._create_thread(replies=3)
+
+        # ETag, istnienie pliku, komentarze z autorami, odpowiedzi z autorami
+        with self.assertNumQueries(4):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 4)
+        thread = response.data["results"][0]
+        self.assertEqual(
+            [reply["content"] for reply in thread["replies"]], ["Reply 0", "Reply 1"]
+        )
+        self.assertEqual(thread["replies"][0]["user"]["name"], "R0")
+        self.assertEqual(thread["reply_count"], 3)
+
+        parent = Comment.objects.get(pk=thread["id"])
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("reply-list-create", kwargs={"comment_uuid": parent.pk})
+            )
+        self.assertEqual(len(response.data["results"]), 3)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(
+            reverse("comment-detail", kwargs={"pk": self.comment.pk}),
+            {"content": "Edited"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["replies"], [])
+
+    # --- Testy paginacji kursorowej ---
+    def _walk_pages(self, url):
+        contents = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            contents += [item["content"] for item in response.data["results"]]
+            url = response.data["next"]
+        return contents
+
+    def test_comment_list_pages_through_equal_timestamps(self, mock_boto_client):
+        Comment.objects.bulk_create(
+            [
+                Comment(user=self.user, audio_file=self.audio_file, content=f"C{index}")
+                for index in range(25)
+            ]
+        )
+        # Ten sam created_at: kolejność na granicy stron ustala id
+        Comment.objects.update(created_at=self.comment.created_at)
+
+        contents = self._walk_pages(self.list_url)
+        self.assertEqual(len(contents), 26)
+        self.assertEqual(len(set(contents)), 26)
+
+    def test_replies_are_paginated_after_the_preview(self, mock_boto_client):
+        parent = self._create_thread(replies=23)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data["results"][0]["reply_count"], 23)
+        self.assertEqual(
+            [reply["content"] for reply in response.data["results"][0]["replies"]],
+            ["Reply 0", "Reply 1", "Reply 2"],
+        )
+
+        contents = self._walk_pages(
+            reverse("reply-list-create", kwargs={"comment_uuid": parent.pk})
+        )
+        self.assertEqual(contents, [f"Reply {index}" for index in range(23)])
+
+    # --- Testy wątków dowolnej głębokości (ścieżka zmaterializowana) ---
+    def _reply(self, parent, content):
+        return Comment.objects.create(
+            user=self.user,
+            audio_file=self.audio_file,
+            parent_comment=parent,
+            content=content,
+        )
+
+    def test_thread_returns_subtree_in_thread_order(self, mock_boto_client):
+        first = self._reply(self.comment, "A")
+        nested = self._reply(first, "A.1")
+        self._reply(nested, "A.1.1")
+        self._reply(self.comment, "B")
+        other = Comment.objects.create(
+            user=self.user, audio_file=self.audio_file, content="Other thread"
+        )
+        self._reply(other, "Other reply")
+        self.assertEqual(nested.depth, 2)
+
+        url = reverse("comment-thread", kwargs={"comment_uuid": self.comment.pk})
+        with self.assertNumQueries(2):  # korzeń, strona poddrzewa
+            response = self.client.get(url)
+        self.assertEqual(
+            [(item["content"], item["depth"]) for item in response.data["results"]],
+            [("A", 1), ("A.1", 2), ("A.1.1", 3), ("B", 1)],
+        )
+
+        response = self.client.get(
+            reverse("comment-thread", kwargs={"comment_uuid": first.pk})
+        )
+        self.assertEqual(
+            [(item["content"], item["depth"]) for item in response.data["results"]],
+            [("A.1", 1), ("A.1.1", 2)],
+        )
+
+        with patch.object(ThreadCursorPagination, "page_size", 1):
+            self.assertEqual(self._walk_pages(url), ["A", "A.1", "A.1.1", "B"])
+
+    @override_settings(COMMENT_MAX_DEPTH=2)
+    def test_reply_depth_is_limited(self, mock_boto_client):
+        self.client.force_authenticate(user=self.user)
+        reply = self._reply(self.comment, "Reply")
+        response = self.client.post(
+            reverse("reply-list-create", kwargs={"comment_uuid": reply.pk}),
+            {"content": "Too deep"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            reverse("reply-list-create", kwargs={"comment_uuid": self.comment.pk}),
+            {"content": "Fine"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = Comment.objects.get(pk=response.data["id"])
+        self.assertTrue(created.path.startswith(self.comment.path))
+        self.assertEqual(created.depth, 1)
+
+    # --- Testy klucza obcego do pliku audio ---
+    def test_deleting_audio_file_deletes_its_comments(self, mock_boto_client):
+        reply = Comment.objects.create(
+            user=self.user,
+            audio_file=self.audio_file,
+            parent_comment=self.comment,
+            content="Reply",
+        )
+        self.assertEqual(reply.audio_file_id, self.audio_file.uuid)
+        self.assertEqual(self.audio_file.comments.count(), 2)
+
+        self.audio_file.delete()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_comment_on_unknown_audio_file_is_rejected(self, mock_boto_client):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse("comment-list-create", kwargs={"audio_uuid": uuid.uuid4()}),
+            {"content": "Hello?"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Comment.objects.count(), 1)
+
+        response = self.client.post(self.list_url, {"content": "Hello!"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["audio_file_id"], str(self.audio_file.uuid))
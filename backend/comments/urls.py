@@ -3,6 +3,7 @@ from django.urls import path
 from .views import (
     CommentListCreateView,
     CommentRetrieveUpdateDeleteView,
+    CommentThreadView,
     ReplyListCreateView,
 )
 
@@ -20,4 +21,9 @@ urlpatterns = [
         ReplyListCreateView.as_view(),
         name="reply-list-create",
     ),
+    path(
+        "<uuid:comment_uuid>/thread/",
+        CommentThreadView.as_view(),
+        name="comment-thread",
+    ),
 ]
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.db.models import Count, Max, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import generics, permissions, serializers
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import (
@@ -7,30 +12,89 @@ from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
 )
 
+from audio.cache import USER_NAMES_SCOPE, get_generations
 from audio.models import AudioFile
 
 from .models import Comment
-from .serializers import CommentSerializer, ReplySerializer
+from .pagination import (
+    REPLY_ORDERING,
+    CommentCursorPagination,
+    ReplyCursorPagination,
+    ThreadCursorPagination,
+)
+from .serializers import CommentSerializer, ReplySerializer, ThreadReplySerializer
+
+
+def comment_list_etag(request, audio_uuid):
+    # Edycja zmienia max(updated_at), usunięcie zmienia liczbę komentarzy,
+    # zmiana nazwy autora podbija generację nazw użytkowników
+    state = Comment.objects.filter(audio_file_id=audio_uuid).aggregate(
+        last_updated=Max("updated_at"), count=Count("id")
+    )
+    if not state["count"]:
+        return None
+    (names_generation,) = get_generations([USER_NAMES_SCOPE])
+    return (
+        f"comments-{state['count']}-{state['last_updated'].timestamp()}"
+        f"-{names_generation}"
+    )
+
+
+def with_replies(queryset):
+    """
+    Comments of `queryset` with their authors, `reply_count` and, in
+    `preview_replies`, the first COMMENT_REPLY_PREVIEW replies with authors -
+    two queries in total.
+    """
+    # Podzapytanie liczone tylko dla wierszy strony (indeks parent_comment_id)
+    reply_count = (
+        Comment.objects.filter(parent_comment=OuterRef("pk"))
+        .order_by()
+        .values("parent_comment")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    # Wycinek w Prefetch wymaga to_attr (Django filtruje go okienkowo)
+    replies = Comment.objects.select_related("user").order_by(*REPLY_ORDERING)
+    return (
+        queryset.select_related("user")
+        .annotate(reply_count=Coalesce(Subquery(reply_count), 0))
+        .prefetch_related(
+            Prefetch(
+                "replies",
+                queryset=replies[: settings.COMMENT_REPLY_PREVIEW],
+                to_attr="preview_replies",
+            )
+        )
+    )
 
 
+@method_decorator(condition(etag_func=comment_list_etag), name="get")
 class CommentListCreateView(generics.ListCreateAPIView):
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
 
     def get_permissions(self):
         if self.request.method == "GET":
             return [AllowAny()]
         return [IsAuthenticated()]
 
-    def get_queryset(self):
-        audio_uuid = self.kwargs["audio_uuid"]
-        try:
-            audio_file = AudioFile.objects.get(uuid=audio_uuid)
-        except AudioFile.DoesNotExist:
+    def check_audio_file(self):
+        if not AudioFile.objects.filter(uuid=self.kwargs["audio_uuid"]).exists():
             raise serializers.ValidationError("Audio file not found.")
 
-        return Comment.objects.filter(
-            audio_file_id=audio_uuid, parent_comment=None
-        ).order_by("-created_at")
+    def get_queryset(self):
+        self.check_audio_file()
+        return with_replies(
+            Comment.objects.filter(
+                audio_file_id=self.kwargs["audio_uuid"], parent_comment=None
+            )
+        )
+
+    def perform_create(self, serializer):
+        # Klucz obcy jest sprawdzany dopiero przy commicie - wcześniej 400
+        self.check_audio_file()
+        serializer.save()
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -41,13 +105,19 @@ class CommentListCreateView(generics.ListCreateAPIView):
 class ReplyListCreateView(generics.ListCreateAPIView):
     serializer_class = ReplySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = ReplyCursorPagination
 
     def get_queryset(self):
         parent_comment = get_object_or_404(Comment, id=self.kwargs["comment_uuid"])
-        return Comment.objects.filter(parent_comment=parent_comment)
+        return Comment.objects.filter(parent_comment=parent_comment).select_related(
+            "user"
+        )
 
     def perform_create(self, serializer):
         parent_comment = get_object_or_404(Comment, id=self.kwargs["comment_uuid"])
+        # Każdy poziom wydłuża ścieżkę (i klucz indeksu comment_path_idx)
+        if parent_comment.depth + 1 >= settings.COMMENT_MAX_DEPTH:
+            raise serializers.ValidationError("Maximum reply depth reached.")
         serializer.save(
             user=self.request.user,
             parent_comment=parent_comment,
@@ -55,12 +125,37 @@ class ReplyListCreateView(generics.ListCreateAPIView):
         )
 
 
+class CommentThreadView(generics.ListAPIView):
+    """
+    The whole subtree of a comment (replies at any depth), in thread order -
+    every comment followed by its replies - with cursor pagination.
+    """
+
+    serializer_class = ThreadReplySerializer
+    permission_classes = [AllowAny]
+    pagination_class = ThreadCursorPagination
+
+    def get_queryset(self):
+        self.root = get_object_or_404(Comment, id=self.kwargs["comment_uuid"])
+        # Potomkowie to ścieżki z prefiksem ścieżki korzenia: jeden zakres indeksu
+        return Comment.objects.filter(
+            audio_file_id=self.root.audio_file_id,
+            path__startswith=self.root.path,
+            path__gt=self.root.path,
+        ).select_related("user")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["root_depth"] = self.root.depth
+        return context
+
+
 class CommentRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Comment.objects.all()
+        return with_replies(Comment.objects.all())
 
     def perform_update(self, serializer):
         comment = self.get_object()
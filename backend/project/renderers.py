@@ -0,0 +1,58 @@
+# project/renderers.py
+import datetime
+import decimal
+
+import orjson
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+
+def orjson_default(obj):
+    """
+    Fallback for the types orjson does not serialize natively, mirroring
+    DRF's JSONEncoder. UUIDs, datetimes, dates and times are handled by
+    orjson itself, in the same ISO 8601 format (UTC as "Z", see
+    `ORJSONRenderer.render`).
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, QuerySet):
+        return tuple(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "__iter__"):
+        return tuple(item for item in obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Renders API responses with orjson. The output is the same compact,
+    UTF-8 JSON as DRF's JSONRenderer, produced several times faster.
+    """
+
+    media_type = "application/json"
+    format = "json"
+    charset = None  # JSON zawsze jest w UTF-8 (RFC 8259)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        # DRF zapisuje UTC jako "Z" zamiast "+00:00"
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        # Przeglądarkowe API i klienci z `Accept: application/json; indent=4`
+        if accepted_media_type and "indent" in accepted_media_type:
+            option |= orjson.OPT_INDENT_2
+        elif renderer_context and renderer_context.get("indent"):
+            option |= orjson.OPT_INDENT_2
+
+        return orjson.dumps(data, default=orjson_default, option=option)
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "storages",
@@ -123,6 +124,16 @@ AUTH_PASSWORD_VALIDATORS = [
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": ("accounts.authentication.JWTAuthentication",),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
+    # orjson zamiast modułu json z biblioteki standardowej
+    "DEFAULT_RENDERER_CLASSES": (
+        "project.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "project.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 
@@ -154,6 +165,13 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ORIGIN_ALLOW_ALL = True  # Twoje istniejące ustawienie
 CORS_ALLOW_CREDENTIALS = True  # Twoje istniejące ustawienie
+# Nagłówki ze statystykami użytkownika (lista /api/audio/my-files/) czytelne dla frontendu
+CORS_EXPOSE_HEADERS = [
+    "X-Audio-File-Count",
+    "X-Audio-Total-Bytes",
+    "X-Audio-Total-Views",
+    "X-Audio-Total-Likes",
+]
 
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
@@ -220,6 +238,129 @@ AUDIO_FILE_BASE_URL = config(
     "AUDIO_FILE_BASE_URL", default=f"{AWS_S3_CUSTOM_DOMAIN}/"
 )  # Twoje istniejące ustawienie
 
+# Wyszukiwanie rozmyte (pg_trgm) i autouzupełnianie
+AUDIO_SEARCH_TITLE_SIMILARITY_THRESHOLD = config(
+    "AUDIO_SEARCH_TITLE_SIMILARITY_THRESHOLD", default=0.4, cast=float
+)  # word_similarity() dla tytułów
+AUDIO_SEARCH_TAG_SIMILARITY_THRESHOLD = config(
+    "AUDIO_SEARCH_TAG_SIMILARITY_THRESHOLD", default=0.2, cast=float
+)  # similarity() dla krótkich nazw tagów
+AUDIO_AUTOCOMPLETE_DEFAULT_LIMIT = config(
+    "AUDIO_AUTOCOMPLETE_DEFAULT_LIMIT", default=8, cast=int
+)
+AUDIO_AUTOCOMPLETE_MAX_LIMIT = config(
+    "AUDIO_AUTOCOMPLETE_MAX_LIMIT", default=20, cast=int
+)
+AUDIO_AUTOCOMPLETE_CACHE_SIZE = config(
+    "AUDIO_AUTOCOMPLETE_CACHE_SIZE", default=500, cast=int
+)  # Liczba najpopularniejszych tagów trzymanych w pamięci procesu
+AUDIO_AUTOCOMPLETE_CACHE_REFRESH_SECONDS = config(
+    "AUDIO_AUTOCOMPLETE_CACHE_REFRESH_SECONDS", default=300, cast=int
+)
+
+# Cache anonimowych odpowiedzi list (unieważniany licznikami generacji).
+# TTL ogranicza jedynie nieaktualność licznika wyświetleń, który nie podbija generacji.
+AUDIO_RESPONSE_CACHE_TIMEOUT = config(
+    "AUDIO_RESPONSE_CACHE_TIMEOUT", default=60, cast=int
+)
+
+# Ciężkie agregaty (ranking top-rated, liczniki tagów): stale-while-revalidate
+AUDIO_AGGREGATE_CACHE_TIMEOUT = config(
+    "AUDIO_AGGREGATE_CACHE_TIMEOUT", default=30, cast=int
+)  # Po tym czasie wartość jest nieświeża i odświeżana w tle
+AUDIO_AGGREGATE_STALE_TIMEOUT = config(
+    "AUDIO_AGGREGATE_STALE_TIMEOUT", default=300, cast=int
+)  # Jak długo po wygaśnięciu wolno jeszcze serwować starą wartość
+AUDIO_AGGREGATE_LOCK_TIMEOUT = config(
+    "AUDIO_AGGREGATE_LOCK_TIMEOUT", default=10, cast=int
+)  # TTL blokady przeliczania
+
+# Cache reprezentacji pojedynczych plików audio (klucz: uuid + updated_at)
+AUDIO_REPRESENTATION_CACHE_TIMEOUT = config(
+    "AUDIO_REPRESENTATION_CACHE_TIMEOUT", default=3600, cast=int
+)
+
+# Maksymalna liczba UUID w jednym żądaniu endpointów zbiorczych (batch)
+AUDIO_BATCH_MAX_UUIDS = config("AUDIO_BATCH_MAX_UUIDS", default=50, cast=int)
+
+# Trending: polubienia i wyświetlenia z wykładniczym zanikiem w czasie
+AUDIO_TRENDING_HALF_LIFE_HOURS = config(
+    "AUDIO_TRENDING_HALF_LIFE_HOURS", default=24, cast=float
+)  # Po tym czasie waga zdarzenia spada o połowę
+AUDIO_TRENDING_LIKE_WEIGHT = config("AUDIO_TRENDING_LIKE_WEIGHT", default=3, cast=float)
+AUDIO_TRENDING_VIEW_WEIGHT = config("AUDIO_TRENDING_VIEW_WEIGHT", default=1, cast=float)
+AUDIO_TRENDING_PLAY_WEIGHT = config("AUDIO_TRENDING_PLAY_WEIGHT", default=2, cast=float)
+AUDIO_TRENDING_SETTLE_SECONDS = config(
+    "AUDIO_TRENDING_SETTLE_SECONDS", default=30, cast=int
+)  # Margines na niezatwierdzone transakcje przy czytaniu nowych głosów
+
+# Dzienne statystyki plików (rollupy liczone przez update_rollups)
+AUDIO_ANALYTICS_DEFAULT_DAYS = config(
+    "AUDIO_ANALYTICS_DEFAULT_DAYS", default=30, cast=int
+)  # Zakres statystyk, gdy żądanie go nie podaje
+AUDIO_ANALYTICS_MAX_DAYS = config(
+    "AUDIO_ANALYTICS_MAX_DAYS", default=366, cast=int
+)  # Najdłuższy zakres jednego żądania (też top-rated ?days=)
+
+# Podobne pliki ("więcej takich"), liczone offline z polubień
+AUDIO_SIMILAR_NEIGHBORS = config(
+    "AUDIO_SIMILAR_NEIGHBORS", default=10, cast=int
+)  # Liczba sąsiadów zapisywanych i zwracanych dla pliku
+AUDIO_SIMILAR_METRIC = config(
+    "AUDIO_SIMILAR_METRIC", default="cosine"
+)  # "cosine" albo "jaccard"
+AUDIO_SIMILAR_MAX_PAIRS = config(
+    "AUDIO_SIMILAR_MAX_PAIRS", default=2000000, cast=int
+)  # Limit par przetwarzanych naraz (ogranicza pamięć joba)
+
+# Powiązane tagi (tabela współwystępowania TagPair, ranking NPMI)
+AUDIO_RELATED_TAGS_DEFAULT_LIMIT = config(
+    "AUDIO_RELATED_TAGS_DEFAULT_LIMIT", default=10, cast=int
+)
+AUDIO_RELATED_TAGS_MAX_LIMIT = config(
+    "AUDIO_RELATED_TAGS_MAX_LIMIT", default=50, cast=int
+)
+AUDIO_RELATED_TAGS_MIN_COUNT = config(
+    "AUDIO_RELATED_TAGS_MIN_COUNT", default=2, cast=int
+)  # Minimalna liczba wspólnych plików (PMI zawyża pary rzadkich tagów)
+AUDIO_RELATED_TAGS_CANDIDATES = config(
+    "AUDIO_RELATED_TAGS_CANDIDATES", default=200, cast=int
+)  # Ile najczęstszych par tagu jest ocenianych
+
+# Oś czasu obserwowanych uploaderów (fan-out przy zapisie, pull dla popularnych)
+AUDIO_TIMELINE_PULL_THRESHOLD = config(
+    "AUDIO_TIMELINE_PULL_THRESHOLD", default=10000, cast=int
+)  # Powyżej tylu obserwujących upload nie jest rozsyłany, tylko pobierany
+AUDIO_TIMELINE_MAX_ENTRIES = config(
+    "AUDIO_TIMELINE_MAX_ENTRIES", default=1000, cast=int
+)  # Wpisy osi czasu na użytkownika zostawiane przez trim_timelines
+AUDIO_TIMELINE_BACKFILL = config(
+    "AUDIO_TIMELINE_BACKFILL", default=20, cast=int
+)  # Ostatnie pliki dopisywane do osi czasu przy obserwowaniu
+AUDIO_TIMELINE_PAGE_SIZE = config("AUDIO_TIMELINE_PAGE_SIZE", default=20, cast=int)
+
+# Zdarzenia odtwarzania: bufor w pamięci procesu, zapis paczkami (COPY)
+AUDIO_PLAY_EVENT_BUFFER_SIZE = config(
+    "AUDIO_PLAY_EVENT_BUFFER_SIZE", default=500, cast=int
+)  # Zapis, gdy w buforze jest tyle zdarzeń...
+AUDIO_PLAY_EVENT_FLUSH_SECONDS = config(
+    "AUDIO_PLAY_EVENT_FLUSH_SECONDS", default=5, cast=int
+)  # ...albo najstarsze czeka tyle sekund
+AUDIO_PLAY_EVENT_MAX_BATCH = config(
+    "AUDIO_PLAY_EVENT_MAX_BATCH", default=100, cast=int
+)  # Maksymalna liczba zdarzeń w jednym żądaniu
+AUDIO_PLAY_EVENT_MAX_AGE_HOURS = config(
+    "AUDIO_PLAY_EVENT_MAX_AGE_HOURS", default=24, cast=int
+)  # Starsze zdarzenia z paczek klienta są odrzucane
+
+# Komentarze: podgląd odpowiedzi w liście komentarzy pliku
+COMMENT_REPLY_PREVIEW = config(
+    "COMMENT_REPLY_PREVIEW", default=3, cast=int
+)  # Pierwsze odpowiedzi dołączane do komentarza (reszta: endpoint odpowiedzi)
+COMMENT_MAX_DEPTH = config(
+    "COMMENT_MAX_DEPTH", default=50, cast=int
+)  # Najgłębszy poziom odpowiedzi (długość ścieżki w indeksie jest ograniczona)
+
 # DODAJ PONIŻSZE NOWE SEKCJE NA KOŃCU PLIKU settings.py
 
 # =============================================================================